@@ -5,10 +5,70 @@ from __future__ import annotations
 import importlib
 import sys
 
-from cipmaster.cip import config, fields, network, session, ui
+from cipmaster.cip import (
+    arrays,
+    assembly,
+    batch,
+    cache,
+    catalog,
+    config,
+    fields,
+    layout,
+    network,
+    process,
+    profiler,
+    realtime,
+    reconnect,
+    reload,
+    scheduler,
+    session,
+    stats,
+    ui,
+    watchdog,
+)
 
-for _name in ("config", "fields", "network", "session", "ui"):
+for _name in (
+    "arrays",
+    "assembly",
+    "batch",
+    "cache",
+    "catalog",
+    "config",
+    "fields",
+    "layout",
+    "network",
+    "process",
+    "profiler",
+    "realtime",
+    "reconnect",
+    "reload",
+    "scheduler",
+    "session",
+    "stats",
+    "ui",
+    "watchdog",
+):
     module = importlib.import_module(f"cipmaster.cip.{_name}")
     sys.modules[f"cip.{_name}"] = module
 
-__all__ = ["config", "fields", "network", "session", "ui"]
+__all__ = [
+    "arrays",
+    "assembly",
+    "batch",
+    "cache",
+    "catalog",
+    "config",
+    "fields",
+    "layout",
+    "network",
+    "process",
+    "profiler",
+    "realtime",
+    "reconnect",
+    "reload",
+    "scheduler",
+    "session",
+    "stats",
+    "ui",
+    "watchdog",
+]
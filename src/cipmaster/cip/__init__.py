@@ -1,9 +1,23 @@
 """CIP tooling utilities."""
 
 __all__ = [
+    "arrays",
+    "assembly",
+    "batch",
+    "cache",
+    "catalog",
     "config",
+    "layout",
     "network",
+    "process",
+    "profiler",
+    "realtime",
+    "reconnect",
+    "reload",
+    "scheduler",
     "session",
+    "stats",
     "ui",
+    "watchdog",
     "fields",
 ]
@@ -0,0 +1,161 @@
+"""Array-typed CIP signals.
+
+A signal declared with ``length`` greater than one (other than ``string`` and
+``bool``) occupies ``length`` consecutive little-endian elements of the
+assembly.  :class:`ArrayField` represents such a signal in the Scapy packet
+classes as a fixed-length byte string, while the compiled encoders and views
+expose it as a typed array: an :class:`array.array` copy, or a NumPy array
+when NumPy is installed.  Whole arrays, or slices of them, are converted with
+a single buffer operation instead of one field access per element.
+"""
+
+from __future__ import annotations
+
+import array
+import struct
+import sys
+from typing import Any, Iterable, List, Mapping, Optional, Union
+
+from scapy import all as scapy_all
+
+try:  # NumPy is optional; arrays fall back to the standard library.
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None  # type: ignore[assignment]
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+# struct format character of one element for each CIP element type.
+ELEMENT_FORMATS: Mapping[str, str] = {
+    "usint": "B",
+    "sint": "b",
+    "uint": "H",
+    "int": "h",
+    "udint": "I",
+    "dint": "i",
+    "real": "f",
+    "lreal": "d",
+    "lint": "q",
+}
+
+_ARRAY_CANDIDATES = {"B": "B", "b": "b", "H": "H", "h": "h", "I": "IL", "i": "il", "f": "f", "d": "d", "q": "ql"}
+_NUMPY_DTYPES = {"B": "<u1", "b": "<i1", "H": "<u2", "h": "<i2", "I": "<u4", "i": "<i4", "f": "<f4", "d": "<f8", "q": "<i8"}
+_BIG_ENDIAN_HOST = sys.byteorder == "big"
+
+
+def _array_typecode(fmt: str) -> str:
+    size = struct.calcsize(f"<{fmt}")
+    for code in _ARRAY_CANDIDATES[fmt]:
+        if array.array(code).itemsize == size:
+            return code
+    raise TypeError(f"no array typecode holds {size}-byte elements")  # pragma: no cover
+
+
+ARRAY_TYPECODES: Mapping[str, str] = {name: _array_typecode(fmt) for name, fmt in ELEMENT_FORMATS.items()}
+
+
+def is_array_signal(signal_type: str, length: int) -> bool:
+    return length > 1 and signal_type in ELEMENT_FORMATS
+
+
+class ArrayField(scapy_all.StrFixedLenField):
+    """Scapy field holding ``count`` little-endian elements of ``elem_type``."""
+
+    __slots__ = ["elem_type", "count", "item_size"]
+
+    def __init__(self, name: str, elem_type: str, count: int) -> None:
+        self.elem_type = elem_type
+        self.count = count
+        self.item_size = struct.calcsize(f"<{ELEMENT_FORMATS[elem_type]}")
+        super().__init__(name, bytes(count * self.item_size), count * self.item_size)
+
+    def i2repr(self, pkt: Optional[scapy_all.Packet], x: Any) -> str:
+        return repr(unpack_array(self.elem_type, x or b"", self.count).tolist())
+
+
+def unpack_array(elem_type: str, data: BufferLike, count: int, offset: int = 0) -> array.array:
+    """Return ``count`` elements of ``data`` starting at byte ``offset`` as a copy."""
+
+    values = array.array(ARRAY_TYPECODES[elem_type])
+    item_size = values.itemsize
+    chunk = memoryview(data)[offset : offset + count * item_size]
+    values.frombytes(chunk[: len(chunk) - len(chunk) % item_size])
+    if len(values) < count:
+        values.frombytes(bytes((count - len(values)) * item_size))
+    if _BIG_ENDIAN_HOST and item_size > 1:  # pragma: no cover - little-endian CI
+        values.byteswap()
+    return values
+
+
+def array_view(elem_type: str, data: BufferLike, count: int, offset: int = 0) -> Any:
+    """Return the elements of ``data`` as a NumPy view, or an array copy without NumPy.
+
+    Views over read-only buffers are read-only; no bytes are copied.
+    """
+
+    if numpy is None:
+        return unpack_array(elem_type, data, count, offset)
+    return numpy.frombuffer(data, dtype=_NUMPY_DTYPES[ELEMENT_FORMATS[elem_type]], count=count, offset=offset)
+
+
+def pack_array(elem_type: str, values: Any, count: int, *, pad: bool = True) -> bytes:
+    """Encode at most ``count`` elements of ``values`` as little-endian bytes.
+
+    ``values`` may be raw bytes in wire format, an :class:`array.array`, a
+    NumPy array or any iterable of numbers.  With ``pad`` missing trailing
+    elements are zero, otherwise only the given elements are returned.
+
+    Raises
+    ------
+    ValueError
+        If there are more than ``count`` elements or an element does not fit
+        the element type.
+    """
+
+    fmt = ELEMENT_FORMATS[elem_type]
+    item_size = struct.calcsize(f"<{fmt}")
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        data = bytes(values)
+        if len(data) % item_size:
+            raise ValueError(f"{len(data)} bytes is not a whole number of {elem_type} elements")
+    elif numpy is not None and isinstance(values, numpy.ndarray):
+        dtype = numpy.dtype(_NUMPY_DTYPES[fmt])
+        if values.dtype != dtype and not numpy.can_cast(values.dtype, dtype, casting="same_kind"):
+            raise ValueError(f"cannot store {values.dtype} values as {elem_type}")
+        data = numpy.ascontiguousarray(values, dtype=dtype).tobytes()
+    elif isinstance(values, array.array) and values.typecode == ARRAY_TYPECODES[elem_type]:
+        if _BIG_ENDIAN_HOST and item_size > 1:  # pragma: no cover - little-endian CI
+            values = array.array(values.typecode, values)
+            values.byteswap()
+        data = values.tobytes()
+    else:
+        items = list(values)
+        try:
+            data = struct.pack(f"<{len(items)}{fmt}", *items)
+        except struct.error as exc:
+            raise ValueError(f"invalid {elem_type} element: {exc}") from None
+
+    if len(data) > count * item_size:
+        raise ValueError(f"expects at most {count} elements, got {len(data) // item_size}")
+    if not pad:
+        return data
+    return data + bytes(count * item_size - len(data))
+
+
+def parse_elements(elem_type: str, values: Iterable[Any]) -> List[Any]:
+    """Convert textual elements (e.g. from the command line) to numbers."""
+
+    convert = float if elem_type in {"real", "lreal"} else lambda text: int(str(text).strip(), 0)
+    return [convert(value) for value in values]
+
+
+__all__ = [
+    "ARRAY_TYPECODES",
+    "ArrayField",
+    "ELEMENT_FORMATS",
+    "array_view",
+    "is_array_signal",
+    "pack_array",
+    "parse_elements",
+    "unpack_array",
+]
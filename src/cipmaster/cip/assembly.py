@@ -0,0 +1,563 @@
+"""Buffer-backed encoders compiled from CIP assembly packet classes.
+
+Building a Scapy packet re-serialises every field, including every spare bit,
+each time the packet is converted to bytes.  The helpers in this module walk a
+packet class once, record the byte offset, bit mask and :mod:`struct` format
+of every field and expose the result as an encoder that owns a preallocated
+``bytearray``.  Writes patch only the bytes owned by the field so producing a
+frame costs a single buffer copy.
+
+Received TO frames are exposed through read-only views that wrap the frame
+buffer and decode a field only when it is accessed.  :class:`ViewBuffers`
+keeps a few such views over preallocated buffers so that a cyclic receiver
+can copy every frame in place instead of creating a view per frame.
+
+Field values use the same representation as the Scapy packet class they were
+compiled from, which keeps the codecs in :mod:`cipmaster.cip.fields` usable
+unchanged and guarantees byte-identical frames.  Array signals are the
+exception: they read as typed arrays (see :mod:`cipmaster.cip.arrays`) and
+accept either typed values or the raw bytes the packet class stores.
+"""
+
+from __future__ import annotations
+
+import struct
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field as dataclass_field
+from typing import Any, Callable, Dict, FrozenSet, Iterator, Mapping, Optional, Set, Type, Union
+
+from scapy import all as scapy_all
+
+from .arrays import ArrayField, array_view, pack_array, unpack_array
+from .layout import AssemblyLayout
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+
+class _StructSlot:
+    """Descriptor for fixed-size numeric fields packed with :mod:`struct`."""
+
+    __slots__ = ("name", "field", "offset", "size", "_struct")
+
+    def __init__(self, name: str, field: scapy_all.Field, offset: int, fmt: str) -> None:
+        self.name = name
+        self.field = field
+        self.offset = offset
+        self._struct = struct.Struct(fmt)
+        self.size = self._struct.size
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        return self._struct.unpack_from(instance._buffer, self.offset)[0]
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        with instance._update_lock:
+            self._struct.pack_into(instance._buffer, self.offset, 0 if value is None else value)
+            instance._touch(self.name)
+
+
+class _BitSlot:
+    """Descriptor for Scapy ``BitField`` members (most significant bit first)."""
+
+    __slots__ = ("name", "field", "offset", "size", "mask", "shift")
+
+    def __init__(self, name: str, field: scapy_all.Field, bit_offset: int, bit_size: int) -> None:
+        end = bit_offset + bit_size
+        self.name = name
+        self.field = field
+        self.offset = bit_offset // 8
+        self.size = (end - 1) // 8 - self.offset + 1
+        self.shift = self.size * 8 - (end - self.offset * 8)
+        self.mask = ((1 << bit_size) - 1) << self.shift
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        buffer = instance._buffer
+        if self.size == 1:
+            return (buffer[self.offset] & self.mask) >> self.shift
+        raw = int.from_bytes(buffer[self.offset : self.offset + self.size], "big")
+        return (raw & self.mask) >> self.shift
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        bits = (int(value or 0) << self.shift) & self.mask
+        # Neighbouring signals share these bytes: read-modify-write as one update.
+        with instance._update_lock:
+            buffer = instance._buffer
+            if self.size == 1:
+                buffer[self.offset] = (buffer[self.offset] & ~self.mask) | bits
+            else:
+                end = self.offset + self.size
+                raw = int.from_bytes(buffer[self.offset : end], "big")
+                buffer[self.offset : end] = ((raw & ~self.mask) | bits).to_bytes(self.size, "big")
+            instance._touch(self.name)
+
+
+class _BytesSlot:
+    """Descriptor for fixed-length byte strings padded with NUL bytes."""
+
+    __slots__ = ("name", "field", "offset", "size", "_struct")
+
+    def __init__(self, name: str, field: scapy_all.Field, offset: int, size: int) -> None:
+        self.name = name
+        self.field = field
+        self.offset = offset
+        self.size = size
+        self._struct = struct.Struct(f"{size}s")
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        return bytes(instance._buffer[self.offset : self.offset + self.size])
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        if value is None:
+            value = b""
+        elif isinstance(value, str):
+            value = value.encode("utf-8")
+        with instance._update_lock:
+            self._struct.pack_into(instance._buffer, self.offset, bytes(value))
+            instance._touch(self.name)
+
+
+class _ArraySlot:
+    """Descriptor for array signals stored as consecutive little-endian elements.
+
+    Encoders return a copy of the elements so that changes always go through
+    ``__set__`` (and are tracked); views return a zero-copy, read-only NumPy
+    array when NumPy is available.
+    """
+
+    __slots__ = ("name", "field", "offset", "size", "elem_type", "count", "item_size")
+
+    def __init__(self, name: str, field: ArrayField, offset: int) -> None:
+        self.name = name
+        self.field = field
+        self.offset = offset
+        self.elem_type = field.elem_type
+        self.count = field.count
+        self.item_size = field.item_size
+        self.size = field.count * field.item_size
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        buffer = instance._buffer
+        if isinstance(buffer, memoryview):
+            return array_view(self.elem_type, buffer, self.count, self.offset)
+        return unpack_array(self.elem_type, buffer, self.count, self.offset)
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        data = pack_array(self.elem_type, b"" if value is None else value, self.count)
+        with instance._update_lock:
+            instance._buffer[self.offset : self.offset + self.size] = data
+            instance._touch(self.name)
+
+    def write(self, instance: Any, values: Any, start: int) -> None:
+        if not 0 <= start < self.count:
+            raise IndexError(f"{self.name} has {self.count} elements, cannot start at {start}")
+        data = pack_array(self.elem_type, values, self.count - start, pad=False)
+        begin = self.offset + start * self.item_size
+        with instance._update_lock:
+            instance._buffer[begin : begin + len(data)] = data
+            instance._touch(self.name)
+
+
+FieldSlot = Union[_StructSlot, _BitSlot, _BytesSlot, _ArraySlot]
+
+
+class _CompiledPacket:
+    """Behaviour shared by encoders and views generated for an assembly."""
+
+    __slots__ = ()
+
+    _buffer: Any
+    _compiled: "CompiledAssembly"
+    fields_desc: Any = ()
+    signal_info: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def get_field(self, name: str) -> scapy_all.Field:
+        """Return the Scapy field definition for ``name`` (mirrors ``Packet.get_field``)."""
+
+        return self._compiled.slots[name].field
+
+
+class AssemblyEncoder(_CompiledPacket):
+    """Mutable OT assembly backed by a preallocated ``bytearray``.
+
+    Concrete encoders are generated per assembly by
+    :func:`compile_packet_class`; each field is exposed as an attribute so
+    existing ``setattr``/``getattr`` call sites keep working.  The encoder
+    remembers which fields were written since :meth:`pop_dirty` was last
+    called and caches the frame returned by :func:`bytes` until the next
+    write.
+
+    Writes go to a staging buffer.  The IO thread calls :meth:`publish`
+    before each send to commit the staged frame; writes grouped with
+    :meth:`update` are committed all together or not yet.  A listener set
+    with :meth:`set_commit_listener` is called after every write outside an
+    update and once when the outermost update ends.
+    """
+
+    __slots__ = (
+        "_buffer",
+        "_dirty",
+        "_generation",
+        "_frame",
+        "_frame_generation",
+        "_update_lock",
+        "_group_lock",
+        "_published",
+        "_spare",
+        "_updating",
+        "_commit_listener",
+    )
+
+    def __init__(self, data: Optional[BufferLike] = None) -> None:
+        template = self._compiled.template
+        if data is not None and len(data) != len(template):
+            raise ValueError(
+                f"{self.__class__.__name__} expects {len(template)} bytes, got {len(data)}"
+            )
+        self._buffer = bytearray(template if data is None else data)
+        self._dirty: Set[str] = set()
+        self._generation = 0
+        self._frame = bytes(self._buffer)
+        self._frame_generation = 0
+        self._update_lock = threading.RLock()
+        self._group_lock = threading.RLock()
+        self._published = bytearray(self._buffer)
+        self._spare = bytearray(self._buffer)
+        self._updating = 0
+        self._commit_listener: Optional[Callable[[], None]] = None
+
+    def _touch(self, name: str) -> None:
+        self._dirty.add(name)
+        self._generation += 1
+        if not self._updating:
+            self._committed()
+
+    def _committed(self) -> None:
+        listener = self._commit_listener
+        if listener is not None:
+            listener()
+
+    def __bytes__(self) -> bytes:
+        generation = self._generation
+        if generation != self._frame_generation:
+            self._frame = bytes(self._buffer)
+            self._frame_generation = generation
+        return self._frame
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} encoder ({len(self._buffer)} bytes)>"
+
+    @property
+    def dirty_fields(self) -> FrozenSet[str]:
+        """Names of the fields written since the last :meth:`pop_dirty`."""
+
+        return frozenset(self._dirty)
+
+    def pop_dirty(self) -> Set[str]:
+        """Return and reset the set of fields written since the previous call."""
+
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def load(self, data: BufferLike) -> None:
+        """Replace the whole frame with ``data``.
+
+        Raises
+        ------
+        ValueError
+            If ``data`` is not exactly as long as the assembly.
+        """
+
+        if len(data) != len(self._buffer):
+            raise ValueError(f"{self.__class__.__name__} expects {len(self._buffer)} bytes, got {len(data)}")
+        with self._update_lock:
+            self._buffer[:] = data
+            self._generation += 1
+            committed = not self._updating
+        if committed:
+            self._committed()
+
+    @contextmanager
+    def update(self) -> Iterator["AssemblyEncoder"]:
+        """Group writes so that :meth:`publish` commits either all or none of them.
+
+        Groups wait for each other; single writes and the IO thread do not
+        wait for a group.
+        """
+
+        with self._group_lock:
+            with self._update_lock:
+                self._updating += 1
+            try:
+                yield self
+            finally:
+                with self._update_lock:
+                    self._updating -= 1
+        if not self._updating:
+            self._committed()
+
+    def set_commit_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """Call ``listener`` whenever written values become ready to send; ``None`` removes it.
+
+        The listener runs on the writing thread and must not block.
+        """
+
+        self._commit_listener = listener
+
+    def publish(self) -> bytearray:
+        """Commit the staged frame and return it for sending.
+
+        The staged bytes are copied into the spare frame buffer, which then
+        becomes the published one.  While another thread is inside
+        :meth:`update` the previously published frame is returned instead,
+        so a half-applied update is never sent.  Otherwise the commit only
+        waits for a bit field's read-modify-write to finish.  A returned
+        buffer is overwritten two commits later.
+        """
+
+        with self._update_lock:
+            if self._updating:
+                return self._published
+            spare = self._spare
+            spare[:] = self._buffer
+        self._spare, self._published = self._published, spare
+        return spare
+
+    def write_to(self, target: memoryview) -> None:
+        """Commit the staged frame with :meth:`publish` and copy it into ``target``.
+
+        ``target`` must be exactly as long as the assembly.
+        """
+
+        target[:] = self.publish()
+
+    def write_slice(self, name: str, values: Any, start: int = 0) -> None:
+        """Write ``values`` into array signal ``name`` from element ``start`` on.
+
+        Elements outside the written slice keep their current values.
+        """
+
+        slot = self._compiled.slots[name]
+        if not isinstance(slot, _ArraySlot):
+            raise TypeError(f"{name} is not an array signal")
+        slot.write(self, values, start)
+
+
+class AssemblyView(_CompiledPacket):
+    """Read-only, zero-copy view over a received assembly frame.
+
+    The view keeps a :class:`memoryview` of the frame and decodes a field only
+    when the matching attribute is read.  Frames shorter than the assembly are
+    zero padded, longer frames are truncated to the assembly size.
+    """
+
+    __slots__ = ("_buffer",)
+
+    def __init__(self, data: Optional[BufferLike] = None) -> None:
+        size = self._compiled.size
+        if data is None:
+            data = self._compiled.template
+        elif len(data) < size:
+            data = bytes(data) + bytes(size - len(data))
+        object.__setattr__(self, "_buffer", memoryview(data).toreadonly()[:size])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{self.__class__.__name__} view is read-only")
+
+    def __bytes__(self) -> bytes:
+        return self._buffer.tobytes()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} view ({len(self._buffer)} bytes)>"
+
+
+class ViewBuffers:
+    """Views of one assembly over preallocated buffers, reused in turn.
+
+    :meth:`load` copies a frame into the next buffer and returns the view
+    over it.  A returned view keeps its contents for ``count - 1`` further
+    loads and is then overwritten, so a consumer that needs a frame for
+    longer must copy it with :func:`bytes`.
+    """
+
+    def __init__(self, view_class: Type[AssemblyView], count: int = 2) -> None:
+        if count < 2:
+            raise ValueError(f"at least two buffers are needed, got {count}")
+        self.view_class = view_class
+        self._size = view_class._compiled.size
+        self._buffers = [bytearray(self._size) for _ in range(count)]
+        self._views = [view_class(buffer) for buffer in self._buffers]
+        self._index = 0
+
+    def load(self, data: BufferLike) -> AssemblyView:
+        """Copy ``data`` into the next buffer, padding or truncating it like a new view."""
+
+        index = self._index + 1
+        if index == len(self._buffers):
+            index = 0
+        self._index = index
+        buffer = self._buffers[index]
+        length = len(data)
+        if length == self._size:
+            buffer[:] = data
+        elif length > self._size:
+            buffer[:] = memoryview(data)[: self._size]
+        else:
+            buffer[:length] = data
+            buffer[length:] = bytes(self._size - length)
+        return self._views[index]
+
+
+@dataclass(frozen=True)
+class CompiledAssembly:
+    """Flat description of a packet class and the encoder generated from it."""
+
+    packet_class: Type[scapy_all.Packet]
+    size: int
+    template: bytes
+    slots: Mapping[str, FieldSlot]
+    encoder_class: Type[AssemblyEncoder] = dataclass_field(repr=False)
+    view_class: Type[AssemblyView] = dataclass_field(repr=False)
+
+    def new_encoder(self) -> AssemblyEncoder:
+        """Return a new encoder initialised with the packet class defaults."""
+
+        return self.encoder_class()
+
+    def migrate(self, source: AssemblyEncoder) -> AssemblyEncoder:
+        """Return a new encoder carrying over the values held by ``source``.
+
+        Only fields present in both assemblies with the same field type and
+        width are copied; new or retyped fields keep their defaults.
+        """
+
+        encoder = self.new_encoder()
+        old_slots = source._compiled.slots
+        for name, slot in self.slots.items():
+            old = old_slots.get(name)
+            if old is None or type(old.field) is not type(slot.field) or _slot_bits(old) != _slot_bits(slot):
+                continue
+            setattr(encoder, name, getattr(source, name))
+        encoder.pop_dirty()
+        return encoder
+
+    def view(self, data: Optional[BufferLike] = None) -> AssemblyView:
+        """Return a view over ``data`` (or over the packet class defaults)."""
+
+        return self.view_class(data)
+
+
+def _make_slot(packet_class: Type[scapy_all.Packet], field: scapy_all.Field, bit_offset: int) -> FieldSlot:
+    if isinstance(field, scapy_all.BitField):
+        return _BitSlot(field.name, field, bit_offset, field.size)
+
+    if bit_offset % 8:
+        raise ValueError(f"Field {field.name} of {packet_class.__name__} is not byte aligned")
+    offset = bit_offset // 8
+
+    if isinstance(field, ArrayField):
+        return _ArraySlot(field.name, field, offset)
+    if isinstance(field, scapy_all.StrFixedLenField):
+        return _BytesSlot(field.name, field, offset, int(field.length_from(None)))
+    if isinstance(getattr(field, "fmt", None), str) and isinstance(field.sz, int):
+        return _StructSlot(field.name, field, offset, field.fmt)
+    raise ValueError(
+        f"Field {field.name} of {packet_class.__name__} has unsupported type {type(field).__name__}"
+    )
+
+
+def _slot_bits(slot: FieldSlot) -> int:
+    if isinstance(slot, _BitSlot):
+        return slot.field.size
+    return slot.size * 8
+
+
+def _build_compiled(
+    packet_class: Type[scapy_all.Packet],
+    slots: Dict[str, FieldSlot],
+    size: int,
+) -> CompiledAssembly:
+    template = bytes(packet_class())
+    if len(template) != size:
+        raise ValueError(
+            f"{packet_class.__name__} builds {len(template)} bytes but its fields describe {size}"
+        )
+
+    namespace: Dict[str, Any] = {
+        "__slots__": (),
+        "fields_desc": [slot.field for slot in slots.values()],
+        "signal_info": getattr(packet_class, "signal_info", {}),
+    }
+    namespace.update(slots)
+    encoder_class = type(packet_class.__name__, (AssemblyEncoder,), dict(namespace))
+    view_class = type(packet_class.__name__, (AssemblyView,), dict(namespace))
+
+    compiled = CompiledAssembly(
+        packet_class=packet_class,
+        size=size,
+        template=template,
+        slots=slots,
+        encoder_class=encoder_class,
+        view_class=view_class,
+    )
+    encoder_class._compiled = compiled
+    view_class._compiled = compiled
+    return compiled
+
+
+def compile_packet_class(packet_class: Type[scapy_all.Packet]) -> CompiledAssembly:
+    """Compile every field of ``packet_class`` into a :class:`CompiledAssembly`.
+
+    Raises
+    ------
+    ValueError
+        If the packet class uses a field type that cannot be represented as a
+        fixed byte range.
+    """
+
+    slots: Dict[str, FieldSlot] = {}
+    bit_cursor = 0
+    for field in packet_class.fields_desc:
+        slot = _make_slot(packet_class, field, bit_cursor)
+        slots[field.name] = slot
+        bit_cursor += _slot_bits(slot)
+
+    if bit_cursor % 8:
+        raise ValueError(f"{packet_class.__name__} does not end on a byte boundary")
+    return _build_compiled(packet_class, slots, bit_cursor // 8)
+
+
+def compile_assembly(layout: AssemblyLayout, packet_class: Type[scapy_all.Packet]) -> CompiledAssembly:
+    """Compile the signals of ``layout`` into a :class:`CompiledAssembly`.
+
+    ``packet_class`` must have been generated from the same layout; it
+    provides the Scapy field definitions and defaults.  Skip spans do not
+    produce fields, so the resulting encoders and views only expose the
+    declared signals.
+    """
+
+    slots: Dict[str, FieldSlot] = {}
+    for signal in layout.signals:
+        slots[signal.name] = _make_slot(packet_class, getattr(packet_class, signal.name), signal.offset)
+    return _build_compiled(packet_class, slots, layout.size // 8)
+
+
+__all__ = [
+    "AssemblyEncoder",
+    "AssemblyView",
+    "CompiledAssembly",
+    "FieldSlot",
+    "ViewBuffers",
+    "compile_assembly",
+    "compile_packet_class",
+]
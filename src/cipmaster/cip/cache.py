@@ -0,0 +1,127 @@
+"""Persistent cache of compiled assembly layouts.
+
+Entries are JSON documents stored under a cache directory and keyed by a
+SHA-256 digest of the XML file content combined with :func:`code_version`.
+Editing a configuration file or upgrading the layout code therefore changes
+the key, so stale entries are never returned; they are pruned once the cache
+grows beyond its entry limit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 2
+CACHE_DIR_ENV = "CIPMASTER_CACHE_DIR"
+DEFAULT_MAX_ENTRIES = 256
+
+# Modules whose source determines the shape of a cached layout.
+_FINGERPRINT_MODULES = ("cache.py", "config.py", "layout.py")
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """Return a fingerprint of the code that produces cached layouts."""
+
+    digest = hashlib.sha256(f"format={CACHE_FORMAT}".encode())
+    package_dir = Path(__file__).resolve().parent
+    for name in _FINGERPRINT_MODULES:
+        digest.update(name.encode())
+        try:
+            digest.update((package_dir / name).read_bytes())
+        except OSError:
+            continue
+    return digest.hexdigest()[:16]
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory, honouring ``CIPMASTER_CACHE_DIR`` and ``XDG_CACHE_HOME``."""
+
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "cipmaster"
+
+
+class LayoutCache:
+    """Content-addressed store of compiled configuration layouts."""
+
+    def __init__(self, directory: Optional[Path] = None, *, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.directory = Path(directory) if directory is not None else default_cache_dir() / "layouts"
+        self.max_entries = max_entries
+
+    def key(self, content: bytes) -> str:
+        digest = hashlib.sha256(code_version().encode())
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry stored under ``key`` or ``None`` on a miss."""
+
+        path = self._path(key)
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.debug("Discarding unreadable layout cache entry %s", path, exc_info=True)
+            return None
+
+        if not isinstance(entry, dict) or entry.get("format") != CACHE_FORMAT:
+            return None
+        return entry
+
+    def store(self, key: str, entry: Dict[str, Any]) -> None:
+        """Persist ``entry`` atomically; failures are logged and ignored."""
+
+        payload = {**entry, "format": CACHE_FORMAT}
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=".tmp-", suffix=".json")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(payload, handle, separators=(",", ":"))
+                os.replace(tmp_name, self._path(key))
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+        except OSError:
+            logger.debug("Unable to write layout cache entry %s", key, exc_info=True)
+            return
+
+        self.prune()
+
+    def prune(self) -> None:
+        """Delete the least recently written entries beyond ``max_entries``."""
+
+        try:
+            entries = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        except OSError:
+            return
+        for path in entries[: max(0, len(entries) - self.max_entries)]:
+            try:
+                path.unlink()
+            except OSError:
+                continue
+
+
+__all__ = [
+    "CACHE_DIR_ENV",
+    "LayoutCache",
+    "code_version",
+    "default_cache_dir",
+]
@@ -0,0 +1,235 @@
+"""Persistent catalog of the signals declared across CIP configuration files.
+
+The catalog is a SQLite database that maps each signal id to the file,
+assembly, bit offset, type and length that declare it.  :meth:`SignalCatalog.refresh`
+only re-reads files whose modification time or size changed, and only
+re-indexes them when their content hash differs, so keeping the catalog up
+to date costs one ``stat`` per file.
+
+Every declaration in the XML is catalogued, including the ones the layout
+compiler rejects; those carry the layout error in
+:attr:`SignalLocation.problem`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from .cache import default_cache_dir
+from .config import index_assemblies, parse_signal_declarations
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signals (
+    name TEXT NOT NULL,
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    assembly TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    problem TEXT
+);
+CREATE INDEX IF NOT EXISTS signals_by_name ON signals(name);
+CREATE INDEX IF NOT EXISTS signals_by_path ON signals(path);
+"""
+
+# Bumped when the tables change; older catalogs are rebuilt from scratch.
+_SCHEMA_VERSION = 2
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+@dataclass(frozen=True)
+class SignalLocation:
+    """Where a signal is declared."""
+
+    name: str
+    path: str
+    assembly: str
+    offset: int
+    type: str
+    length: int
+    problem: Optional[str] = None
+
+
+@dataclass
+class RefreshStats:
+    """Counts of files handled by :meth:`SignalCatalog.refresh`."""
+
+    unchanged: int = 0
+    indexed: int = 0
+    removed: int = 0
+
+
+def default_catalog_path() -> Path:
+    return default_cache_dir() / "signals.sqlite3"
+
+
+def _signal_rows(path: str, content: bytes) -> Iterator[Tuple[str, str, str, int, str, int, Optional[str]]]:
+    root = ET.fromstring(content)
+    for info in index_assemblies(root).entries():
+        layout = info.layout
+        compiled = {(signal.name, signal.offset) for signal in layout.signals}
+        for signal in parse_signal_declarations(info.assembly):
+            problem = None
+            if (signal.name, signal.offset) not in compiled:
+                problem = next(
+                    (error for error in layout.errors if error.startswith(f"{signal.name} ")),
+                    "left out of the assembly layout",
+                )
+            yield signal.name, path, info.id, signal.offset, signal.type, signal.length, problem
+
+
+def _prunable(path: str, scopes: Optional[List[Path]]) -> bool:
+    if scopes is None or not os.path.exists(path):
+        return True
+    return any(Path(path).is_relative_to(scope) for scope in scopes)
+
+
+class SignalCatalog:
+    """SQLite backed index from signal id to its declarations."""
+
+    def __init__(self, path: Optional[PathLike] = None) -> None:
+        self.path = Path(path) if path is not None else default_catalog_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.path))
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            with self._connection:
+                self._connection.execute("DROP TABLE IF EXISTS signals")
+                self._connection.execute("DROP TABLE IF EXISTS files")
+                self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> "SignalCatalog":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def refresh(
+        self,
+        files: Iterable[PathLike],
+        *,
+        prune: bool = True,
+        roots: Optional[Iterable[PathLike]] = None,
+    ) -> RefreshStats:
+        """Bring the catalog up to date with ``files``.
+
+        With ``prune`` the catalog is restricted to ``files``; entries for any
+        other path are dropped.  Given ``roots``, only the entries inside one
+        of those directories are restricted, and entries elsewhere are dropped
+        only once their file no longer exists, so files indexed by an earlier
+        scan of other directories stay in the catalog.
+        """
+
+        stats = RefreshStats()
+        known = {
+            path: (mtime_ns, size, digest)
+            for path, mtime_ns, size, digest in self._connection.execute("SELECT path, mtime_ns, size, sha256 FROM files")
+        }
+        seen = set()
+
+        with self._connection:
+            for file in files:
+                path = str(Path(file).resolve())
+                seen.add(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                previous = known.get(path)
+                if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                    stats.unchanged += 1
+                    continue
+
+                try:
+                    content = Path(path).read_bytes()
+                except OSError:
+                    continue
+                digest = hashlib.sha256(content).hexdigest()
+                if previous is not None and previous[2] == digest:
+                    self._connection.execute(
+                        "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                        (stat.st_mtime_ns, stat.st_size, path),
+                    )
+                    stats.unchanged += 1
+                    continue
+
+                self._index_file(path, content, stat, digest)
+                stats.indexed += 1
+
+            if prune:
+                scopes = None if roots is None else [Path(root).resolve() for root in roots]
+                stale = [(path,) for path in known if path not in seen and _prunable(path, scopes)]
+                self._connection.executemany("DELETE FROM files WHERE path = ?", stale)
+                stats.removed = len(stale)
+        return stats
+
+    def _index_file(self, path: str, content: bytes, stat: os.stat_result, digest: str) -> None:
+        try:
+            rows = list(_signal_rows(path, content))
+        except (ET.ParseError, ValueError) as exc:
+            logger.info("Cataloguing %s without signals: %s", path, exc)
+            rows = []
+        self._connection.execute("DELETE FROM signals WHERE path = ?", (path,))
+        self._connection.execute(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+            (path, stat.st_mtime_ns, stat.st_size, digest),
+        )
+        self._connection.executemany(
+            "INSERT INTO signals (name, path, assembly, offset, type, length, problem) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def find(self, pattern: str, *, limit: Optional[int] = None) -> List[SignalLocation]:
+        """Return the declarations of signals matching ``pattern``.
+
+        A pattern containing ``*``, ``?`` or ``[`` is a case-sensitive glob;
+        a prefix glob such as ``BCHi_*`` is answered from the name index.  A
+        plain name is looked up exactly and, when nothing matches, as a
+        substring.
+        """
+
+        query = "SELECT name, path, assembly, offset, type, length, problem FROM signals WHERE name {} ? ORDER BY name, path, offset"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+
+        if _GLOB_CHARS.intersection(pattern):
+            rows = self._connection.execute(query.format("GLOB"), (pattern,)).fetchall()
+        else:
+            rows = self._connection.execute(query.format("="), (pattern,)).fetchall()
+            if not rows:
+                rows = self._connection.execute(query.format("GLOB"), (f"*{pattern}*",)).fetchall()
+        return [SignalLocation(*row) for row in rows]
+
+    def file_count(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+
+__all__ = [
+    "RefreshStats",
+    "SignalCatalog",
+    "SignalLocation",
+    "default_catalog_path",
+]
@@ -2,25 +2,174 @@
 
 from __future__ import annotations
 
-import operator
+import logging
 import os
 import xml.etree.ElementTree as ET
 from contextlib import ExitStack
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
 from importlib import resources
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Type
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Type
 
 from scapy import all as scapy_all
 
+from .arrays import ArrayField, is_array_signal
+from .assembly import CompiledAssembly, compile_assembly
+from .cache import LayoutCache
+from .fields import LEDoubleField
+from .layout import AssemblyLayout, SignalSpec, SkipSpan, compile_layout
+
+logger = logging.getLogger(__name__)
+
 
-@dataclass
 class PacketClassInfo:
-    """Container describing a dynamically created packet class."""
+    """An ``<assembly>`` element whose codecs are compiled on first use.
+
+    The layout, the Scapy packet class and the buffer-backed codecs are each
+    built the first time they are accessed, so indexing a configuration does
+    not pay for assemblies that no connection uses.  ``source`` holds the
+    serialised element when ``assembly`` only carries its attributes, as is
+    the case for entries restored from the layout cache.
+    """
+
+    def __init__(
+        self,
+        assembly: ET.Element,
+        assembly_size: Optional[int] = None,
+        *,
+        layout: Optional[AssemblyLayout] = None,
+        source: Optional[str] = None,
+        has_signals: Optional[bool] = None,
+    ) -> None:
+        self.assembly = assembly
+        self.assembly_size = int(assembly.attrib.get("size", 0)) if assembly_size is None else assembly_size
+        self.source = source
+        self.has_signals = bool(len(assembly)) if has_signals is None else has_signals
+        if layout is not None:
+            self.__dict__["layout"] = layout
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(id={self.id!r}, subtype={self.subtype!r}, "
+            f"instance={self.instance!r}, size={self.assembly_size})"
+        )
+
+    @property
+    def id(self) -> str:
+        return self.assembly.attrib.get("id", f"Assembly_{self.subtype}")
+
+    @property
+    def subtype(self) -> Optional[str]:
+        return self.assembly.attrib.get("subtype")
+
+    @property
+    def direction(self) -> Optional[str]:
+        return self.assembly.attrib.get("dir")
+
+    @property
+    def instance(self) -> Optional[int]:
+        text = self.assembly.attrib.get("instanceId")
+        try:
+            return int(text, 0) if text is not None else None
+        except ValueError:
+            return None
 
-    packet_class: Type[scapy_all.Packet]
-    assembly: ET.Element
-    assembly_size: int
+    @property
+    def layout_compiled(self) -> bool:
+        return "layout" in self.__dict__
+
+    @property
+    def is_compiled(self) -> bool:
+        """Whether a packet class or codec has been built for this assembly."""
+
+        return "packet_class" in self.__dict__ or "compiled" in self.__dict__
+
+    @cached_property
+    def layout(self) -> AssemblyLayout:
+        element = ET.fromstring(self.source) if self.source is not None else self.assembly
+        return parse_assembly_layout(element)
+
+    @cached_property
+    def packet_class(self) -> Type[scapy_all.Packet]:
+        return build_packet_class(self.layout)
+
+    @cached_property
+    def compiled(self) -> CompiledAssembly:
+        """Buffer-backed encoders and views for :attr:`packet_class`."""
+
+        return compile_assembly(self.layout, self.packet_class)
+
+
+class AssemblyIndex(Mapping[str, PacketClassInfo]):
+    """All assemblies of a configuration, indexed by id and instance.
+
+    Building the index only reads element attributes; nothing is compiled
+    until an entry's layout or codecs are requested.
+    """
+
+    def __init__(self, infos: Iterable[PacketClassInfo] = ()) -> None:
+        self._infos: List[PacketClassInfo] = list(infos)
+        self._by_id: Dict[str, PacketClassInfo] = {}
+        self._by_instance: Dict[int, List[PacketClassInfo]] = {}
+        self.duplicates: List[str] = []
+        for info in self._infos:
+            if info.id in self._by_id:
+                self.duplicates.append(info.id)
+                continue
+            self._by_id[info.id] = info
+            if info.instance is not None:
+                self._by_instance.setdefault(info.instance, []).append(info)
+
+    def __getitem__(self, assembly_id: str) -> PacketClassInfo:
+        return self._by_id[assembly_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._by_id)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def by_instance(self, instance: int, subtype: Optional[str] = None) -> Optional[PacketClassInfo]:
+        """Return the assembly with ``instance``, optionally of ``subtype``."""
+
+        for info in self._by_instance.get(instance, ()):
+            if subtype is None or info.subtype == subtype:
+                return info
+        return None
+
+    def with_subtype(self, subtype: str) -> List[PacketClassInfo]:
+        """Return the assemblies of ``subtype`` that declare signals, in file order."""
+
+        return [info for info in self._by_id.values() if info.subtype == subtype and info.has_signals]
+
+    def resolve(self, key: str, subtype: str) -> Optional[PacketClassInfo]:
+        """Return the assembly of ``subtype`` named by ``key``, an id or an instance number."""
+
+        info = self._by_id.get(key)
+        if info is None:
+            try:
+                instance = int(key, 0)
+            except ValueError:
+                return None
+            info = self.by_instance(instance, subtype)
+        if info is None or info.subtype != subtype or not info.has_signals:
+            return None
+        return info
+
+    def default(self, subtype: str) -> Optional[PacketClassInfo]:
+        """Return the first assembly of ``subtype``, used when none is selected."""
+
+        candidates = self.with_subtype(subtype)
+        return candidates[0] if candidates else None
+
+    def entries(self) -> Tuple[PacketClassInfo, ...]:
+        """Return every indexed assembly in file order, including duplicates."""
+
+        return tuple(self._infos)
+
+    def compiled_ids(self) -> List[str]:
+        return [assembly_id for assembly_id, info in self._by_id.items() if info.is_compiled]
 
 
 @dataclass
@@ -32,6 +181,7 @@ class CIPValidationResult:
     root: Optional[ET.Element] = None
     ot_info: Optional[PacketClassInfo] = None
     to_info: Optional[PacketClassInfo] = None
+    assemblies: AssemblyIndex = field(default_factory=AssemblyIndex)
 
 
 class ConfigNotFoundError(FileNotFoundError):
@@ -107,148 +257,100 @@ def resolve_config_path(
         raise ConfigNotFoundError(f"CIP configuration '{filename}' not found") from exc
 
 
-def create_packet_dict(fields_dict: List[Dict[str, int]], assembly_size: int) -> Dict[int, List[Dict[str, int]]]:
-    """Replicate the packet dictionary construction from the legacy CLI implementation."""
-
-    max_packet_size_bits = assembly_size
-    pack_bools: Dict[int, List[Dict[str, int]]] = {}
-    signals: Dict[int, List[Dict[str, int]]] = {}
-
-    cip_data_type_size = {
-        "usint": 1,
-        "uint": 2,
-        "udint": 4,
-        "real": 4,
-        "string": 1,
-        "sint": 1,
-        "int": 2,
-        "dint": 4,
-        "lreal": 8,
-        "lint": 8,
-    }
-
-    fields_dict.sort(key=operator.itemgetter("offset"))
-
-    sorted_dict: Dict[str, Dict[str, int]] = {}
-    for item in fields_dict:
-        sorted_dict[item["id"]] = {
-            "offset": item["offset"],
-            "type": item["type"],
-            "length": item["length"],
-        }
+def parse_signal_declarations(assembly_element: ET.Element) -> List[SignalSpec]:
+    """Return the signals declared by an ``<assembly>`` element, valid or not."""
 
-    for field_id, field_info in sorted_dict.items():
-        offset = field_info["offset"]
-        field_type = field_info["type"]
-        byte_index = offset // 8
+    return [
+        SignalSpec(
+            name=element.attrib.get("id", element.tag),
+            type=element.tag,
+            offset=int(element.attrib.get("offset", 0)),
+            length=int(element.attrib.get("length", 1)),
+        )
+        for element in assembly_element.findall(".//")
+    ]
 
-        if byte_index not in signals:
-            signals[byte_index] = []
 
-        if field_type == "bool":
-            signals[byte_index].append({"id": field_id, "offset": offset, "type": "bool", "length": 1})
+def parse_assembly_layout(assembly_element: ET.Element) -> AssemblyLayout:
+    """Compile the signals declared by an ``<assembly>`` element into a layout."""
 
-    len_counter = 0
-    temp_pad_index = 0
-    temp_pad_len = 0
-    for byte_index in range(max_packet_size_bits // 8):
-        if len_counter != 0:
-            len_counter -= 1
-            continue
+    assembly_size = int(assembly_element.attrib.get("size", 0))
+    subtype = assembly_element.attrib.get("subtype")
+    name = assembly_element.attrib.get("id", f"Assembly_{subtype}")
+    return compile_layout(name, assembly_size, parse_signal_declarations(assembly_element))
 
-        pack = signals.get(byte_index, [])
-        if not pack:
-            signals[byte_index] = []
-            field_data = None
-            for field_id, field_info in sorted_dict.items():
-                if field_info["offset"] == byte_index * 8 and field_info["type"] != "bool":
-                    field_data = (field_id, field_info["type"], field_info["length"])
-                    break
-
-            if field_data:
-                if temp_pad_len > 0:
-                    signals[temp_pad_index].append(
-                        {
-                            "id": f"spare_byte_{temp_pad_index}",
-                            "offset": temp_pad_index * 8,
-                            "type": "string",
-                            "length": temp_pad_len,
-                        }
-                    )
-                    temp_pad_len = 0
-                    temp_pad_index = 0
-
-                field_name, field_type, field_length = field_data
-                signals[byte_index].append(
-                    {
-                        "id": field_name,
-                        "offset": byte_index * 8,
-                        "type": field_type,
-                        "length": field_length,
-                    }
-                )
-                len_counter_field_size = cip_data_type_size.get(field_type, 1)
-                len_counter = field_length * len_counter_field_size - 1
-            else:
-                len_counter = 0
-                if temp_pad_len == 0:
-                    temp_pad_index = byte_index
-                temp_pad_len += 1
-        else:
-            if temp_pad_len > 0:
-                signals[temp_pad_index].append(
-                    {
-                        "id": f"spare_byte_{temp_pad_index}",
-                        "offset": temp_pad_index * 8,
-                        "type": "string",
-                        "length": temp_pad_len,
-                    }
-                )
-                temp_pad_len = 0
-                temp_pad_index = 0
-
-            occupied_offsets = {signal["offset"] % 8 for signal in pack}
-            for bit_index in range(8):
-                if bit_index not in occupied_offsets:
-                    bit_offset = byte_index * 8 + bit_index
-                    signals[byte_index].append(
-                        {
-                            "id": f"spare_bit_{byte_index}_{bit_index}",
-                            "offset": bit_offset,
-                            "type": "bool",
-                            "length": 1,
-                        }
-                    )
-            signals[byte_index].sort(key=lambda x: x["offset"])
-
-    if temp_pad_len > 0:
-        signals[temp_pad_index].append(
-            {
-                "id": f"spare_byte_{temp_pad_index}",
-                "offset": temp_pad_index * 8,
-                "type": "string",
-                "length": temp_pad_len,
-            }
-        )
 
-    return signals
+_SCAPY_FIELD_FACTORIES: Dict[str, Callable[[str], scapy_all.Field]] = {
+    "usint": lambda name: scapy_all.ByteField(name, 0),
+    "bool": lambda name: scapy_all.BitField(name, 0, 1),
+    "real": lambda name: scapy_all.IEEEFloatField(name, 0),
+    "udint": lambda name: scapy_all.LEIntField(name, 0),
+    "uint": lambda name: scapy_all.ShortField(name, 0),
+    "sint": lambda name: scapy_all.SignedByteField(name, 0),
+    "int": lambda name: scapy_all.LESignedShortField(name, 0),
+    "dint": lambda name: scapy_all.LESignedIntField(name, 0),
+    "lint": lambda name: scapy_all.LESignedLongField(name, 0),
+    "lreal": lambda name: LEDoubleField(name, 0.0),
+}
 
 
-def sorted_fields(packet: Dict[int, List[Dict[str, int]]]) -> List[Dict[str, int]]:
-    """Flatten the packet dictionary into a sorted list of field definitions."""
+def _skip_fields(offset: int, end: int) -> List[scapy_all.Field]:
+    """Return padding fields covering bits ``offset`` to ``end``.
 
-    fields: List[Dict[str, int]] = []
-    for signals in packet.values():
-        for signal in signals:
-            fields.append(
-                {
-                    "id": signal["id"],
-                    "offset": signal["offset"],
-                    "type": signal["type"],
-                    "length": signal["length"],
-                }
-            )
-    return sorted(fields, key=lambda item: item["offset"])
+    A skip span becomes at most three fields: the bits up to the next byte
+    boundary, the whole bytes in the middle and the trailing bits.
+    """
+
+    fields: List[scapy_all.Field] = []
+    head_end = min(end, -(-offset // 8) * 8)
+    if head_end > offset:
+        fields.append(scapy_all.BitField(f"spare_{offset}", 0, head_end - offset))
+        offset = head_end
+    body_end = end - end % 8
+    if body_end > offset:
+        fields.append(scapy_all.StrFixedLenField(f"spare_{offset}", b"", (body_end - offset) // 8))
+        offset = body_end
+    if end > offset:
+        fields.append(scapy_all.BitField(f"spare_{offset}", 0, end - offset))
+    return fields
+
+
+def build_packet_class(layout: AssemblyLayout) -> Type[scapy_all.Packet]:
+    """Create a Scapy packet class matching ``layout`` byte for byte.
+
+    Skip spans are rendered as a handful of padding fields so that the class
+    can still dissect and build complete frames for debugging.  Signals with
+    a ``length`` above one become :class:`~cipmaster.cip.arrays.ArrayField`
+    members covering every element.
+    """
+
+    field_desc: List[scapy_all.Field] = []
+    signal_info: Dict[str, Dict[str, int]] = {}
+
+    for item in layout.items():
+        if isinstance(item, SkipSpan):
+            field_desc.extend(_skip_fields(item.offset, item.end))
+            continue
+
+        signal_info[item.name] = {
+            "type": item.type,
+            "length": item.length,
+            "offset": item.offset,
+        }
+        if item.type == "string":
+            field_desc.append(scapy_all.StrFixedLenField(item.name, b"", item.length))
+            continue
+        if is_array_signal(item.type, item.length):
+            field_desc.append(ArrayField(item.name, item.type, item.length))
+            continue
+
+        field_desc.append(_SCAPY_FIELD_FACTORIES[item.type](item.name))
+
+    return type(
+        layout.name,
+        (scapy_all.Packet,),
+        {"name": layout.name, "fields_desc": field_desc, "signal_info": signal_info},
+    )
 
 
 def create_packet_class(assembly_element: ET.Element) -> Tuple[Optional[Type[scapy_all.Packet]], int]:
@@ -258,73 +360,118 @@ def create_packet_class(assembly_element: ET.Element) -> Tuple[Optional[Type[sca
     if subtype not in {"OT_EO", "TO"}:
         return None, 0
 
-    assembly_size = int(assembly_element.attrib.get("size", 0))
-    class_name = assembly_element.attrib.get("id", f"Assembly_{subtype}")
-
-    fields_dict: List[Dict[str, int]] = []
-    for field in assembly_element.findall(".//"):
-        field_len = int(field.attrib.get("length", 1))
-        fields_dict.append(
-            {
-                "id": field.attrib.get("id", field.tag),
-                "offset": int(field.attrib.get("offset", 0)),
-                "type": field.tag,
-                "length": field_len,
-            }
-        )
+    layout = parse_assembly_layout(assembly_element)
+    return build_packet_class(layout), layout.size
 
-    byte_packet_field = create_packet_dict(fields_dict, assembly_size)
-    sorted_field = sorted_fields(byte_packet_field)
-    field_desc = []
-    signal_info: Dict[str, Dict[str, int]] = {}
 
-    for field in sorted_field:
-        field_id = field["id"]
-        field_type = field["type"]
-        field_length = field["length"]
-        signal_info[field_id] = {
-            "type": field_type,
-            "length": field_length,
-            "offset": field["offset"],
-        }
+def index_assemblies(root: ET.Element) -> AssemblyIndex:
+    """Index every ``<assembly>`` under ``root`` without compiling any of them."""
 
-        if field_type == "usint":
-            field_desc.append(scapy_all.ByteField(field_id, 0))
-        elif field_type == "bool":
-            field_desc.append(scapy_all.BitField(field_id, 0, 1))
-        elif field_type == "real":
-            field_desc.append(scapy_all.IEEEFloatField(field_id, 0))
-        elif field_type == "string":
-            field_desc.append(scapy_all.StrFixedLenField(field_id, b"", int(field_length)))
-        elif field_type == "udint":
-            field_desc.append(scapy_all.LEIntField(field_id, 0))
-        elif field_type == "uint":
-            field_desc.append(scapy_all.ShortField(field_id, 0))
-        elif field_type == "sint":
-            field_desc.append(scapy_all.SignedByteField(field_id, 0))
-
-    dynamic_packet_class = type(
-        class_name,
-        (scapy_all.Packet,),
-        {"name": class_name, "fields_desc": field_desc, "signal_info": signal_info},
-    )
-    return dynamic_packet_class, assembly_size
+    return AssemblyIndex(PacketClassInfo(assembly) for assembly in root.findall("./assembly"))
 
 
-def _validate_assembly(root: ET.Element, subtype: str) -> Optional[PacketClassInfo]:
-    assemblies = [assembly for assembly in root.findall("./assembly") if assembly.get("subtype") == subtype and list(assembly)]
-    if len(assemblies) != 1:
-        return None
+def _layout_status(info: Optional[PacketClassInfo]) -> str:
+    if info is None:
+        return "SKIPPED"
+    if info.layout.valid:
+        return "OK"
+    errors = info.layout.errors
+    more = f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""
+    return f"FAILED: {errors[0]}{more}"
 
-    packet_class, assembly_size = create_packet_class(assemblies[0])
-    if packet_class is None:
-        return None
 
-    return PacketClassInfo(packet_class=packet_class, assembly=assemblies[0], assembly_size=assembly_size)
+_DEFAULT_SUBTYPES = ("OT_EO", "TO")
+
+
+def _assembly_rows(index: Optional[AssemblyIndex]) -> List[List[str]]:
+    """Return the validation rows for ``index``.
+
+    Only the layouts of the default OT/TO pair are compiled here; any other
+    assembly is checked when a connection first uses it.
+    """
+
+    if index is None:
+        return [[f"Assembly with Subtype '{subtype}'", "SKIPPED"] for subtype in _DEFAULT_SUBTYPES]
 
+    rows: List[List[str]] = []
+    for subtype in _DEFAULT_SUBTYPES:
+        rows.append([f"Assembly with Subtype '{subtype}'", "OK" if index.default(subtype) else "FAILED"])
+    duplicates = ", ".join(sorted(set(index.duplicates)))
+    rows.append(["Unique Assembly Ids", f"FAILED: {duplicates}" if duplicates else "OK"])
+    for subtype in _DEFAULT_SUBTYPES:
+        rows.append([f"Layout of Assembly '{subtype}'", _layout_status(index.default(subtype))])
+    return rows
 
-def validate_cip_config(xml_filepath: str) -> CIPValidationResult:
-    """Validate a CIP XML configuration file."""
+
+def _validate_content(content: bytes) -> Tuple[Optional[ET.Element], List[List[str]], Optional[AssemblyIndex]]:
+    """Parse ``content`` and index its assemblies."""
+
+    try:
+        root: Optional[ET.Element] = ET.fromstring(content)
+        parse_status = "OK"
+    except ET.ParseError as exc:
+        root = None
+        parse_status = f"FAILED: {exc}"
+
+    index = index_assemblies(root) if root is not None else None
+    return root, [["Parse XML", parse_status], *_assembly_rows(index)], index
+
+
+def _cache_entry(rows: List[List[str]], index: Optional[AssemblyIndex]) -> Dict[str, object]:
+    assemblies: List[Dict[str, object]] = []
+    for info in index.entries() if index is not None else ():
+        record: Dict[str, object] = {
+            "attrib": dict(info.assembly.attrib),
+            "size": info.assembly_size,
+            "has_signals": info.has_signals,
+        }
+        if info.layout_compiled:
+            record["layout"] = info.layout.to_dict()
+        else:
+            record["source"] = ET.tostring(info.assembly, encoding="unicode")
+        assemblies.append(record)
+    return {"results": rows, "assemblies": assemblies if index is not None else None}
+
+
+def _from_cache_entry(entry: Mapping[str, object]) -> Tuple[List[List[str]], Optional[AssemblyIndex]]:
+    rows = [list(row) for row in entry["results"]]  # type: ignore[union-attr]
+    records = entry["assemblies"]
+    if records is None:
+        return rows, None
+
+    infos: List[PacketClassInfo] = []
+    for data in records:  # type: ignore[union-attr]
+        layout = data.get("layout")
+        infos.append(
+            PacketClassInfo(
+                ET.Element("assembly", data["attrib"]),
+                int(data["size"]),
+                layout=AssemblyLayout.from_dict(layout) if layout is not None else None,
+                source=data.get("source"),
+                has_signals=bool(data["has_signals"]),
+            )
+        )
+    return rows, AssemblyIndex(infos)
+
+
+def validate_cip_config(
+    xml_filepath: str,
+    *,
+    use_cache: bool = True,
+    cache: Optional[LayoutCache] = None,
+) -> CIPValidationResult:
+    """Validate a CIP XML configuration file.
+
+    Compiled layouts are looked up in a :class:`~cipmaster.cip.cache.LayoutCache`
+    keyed by the file content, so a cache hit skips XML parsing and layout
+    compilation.  On a hit :attr:`CIPValidationResult.root` is ``None`` and the
+    ``assembly`` of each :class:`PacketClassInfo` only carries the attributes
+    of the original element.  Pass ``use_cache=False`` to always parse.
+
+    Every assembly is listed in :attr:`CIPValidationResult.assemblies`; only
+    the layouts of the default OT/TO pair are compiled during validation and
+    packet classes are built when first requested.
+    """
 
     results: List[List[str]] = []
     directory = os.path.dirname(xml_filepath) or "."
@@ -340,47 +487,51 @@ def validate_cip_config(xml_filepath: str) -> CIPValidationResult:
     results.append(["File is XML", "OK" if is_xml else "FAILED"])
 
     root: Optional[ET.Element] = None
-    parse_status: str
+    index: Optional[AssemblyIndex] = None
     if file_exists and is_xml:
         try:
-            tree = ET.parse(xml_filepath)
-            root = tree.getroot()
-            parse_status = "OK"
-        except ET.ParseError as exc:
-            parse_status = f"FAILED: {exc}"
-    else:
-        parse_status = "SKIPPED"
-    results.append(["Parse XML", parse_status])
-
-    ot_info: Optional[PacketClassInfo] = None
-    to_info: Optional[PacketClassInfo] = None
-    if parse_status == "OK" and root is not None:
-        ot_info = _validate_assembly(root, "OT_EO")
-        results.append(["One Assembly with Subtype 'OT_EO'", "OK" if ot_info else "FAILED"])
-
-        to_info = _validate_assembly(root, "TO")
-        results.append(["One Assembly with Subtype 'TO'", "OK" if to_info else "FAILED"])
+            content: Optional[bytes] = Path(xml_filepath).read_bytes()
+        except OSError as exc:
+            content = None
+            results.append(["Parse XML", f"FAILED: {exc}"])
+
+        if content is not None:
+            layout_cache = (cache or LayoutCache()) if use_cache else None
+            key = layout_cache.key(content) if layout_cache else ""
+            entry = layout_cache.load(key) if layout_cache else None
+            if entry is not None:
+                logger.debug("Layout cache hit for %s", xml_filepath)
+                rows, index = _from_cache_entry(entry)
+            else:
+                root, rows, index = _validate_content(content)
+                if layout_cache is not None:
+                    layout_cache.store(key, _cache_entry(rows, index))
+            results.extend(rows)
     else:
-        results.append(["One Assembly with Subtype 'OT_EO'", "SKIPPED"])
-        results.append(["One Assembly with Subtype 'TO'", "SKIPPED"])
+        results.append(["Parse XML", "SKIPPED"])
+        results.extend(_assembly_rows(None))
 
-    overall_status = all(status == "OK" for _, status in results if status in {"OK", "FAILED"})
+    overall_status = all(not status.startswith("FAILED") for _, status in results)
     results.append(["Overall Status", "OK" if overall_status else "FAILED"])
 
     return CIPValidationResult(
         results=results,
         overall_status=overall_status,
         root=root,
-        ot_info=ot_info,
-        to_info=to_info,
+        ot_info=index.default("OT_EO") if index is not None else None,
+        to_info=index.default("TO") if index is not None else None,
+        assemblies=index if index is not None else AssemblyIndex(),
     )
 
 
 __all__ = [
+    "AssemblyIndex",
     "PacketClassInfo",
     "CIPValidationResult",
+    "build_packet_class",
     "create_packet_class",
-    "create_packet_dict",
-    "sorted_fields",
+    "index_assemblies",
+    "parse_assembly_layout",
+    "parse_signal_declarations",
     "validate_cip_config",
 ]
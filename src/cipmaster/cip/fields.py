@@ -3,13 +3,18 @@
 from __future__ import annotations
 
 import struct
+import weakref
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, Tuple, Type
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Type
 
 from scapy import all as scapy_all
 
+from . import arrays
+
 Metadata = Dict[str, Any]
 ValidationInfo = Dict[str, Any]
+ErrorFactory = Callable[[str], str]
 
 
 @dataclass(frozen=True)
@@ -20,6 +25,7 @@ class FieldCodec:
     encode_func: Any
     decode_func: Any
     validation_provider: Any
+    convert_func: Any = None
 
 
 def _coerce_float(value: Any) -> float:
@@ -51,12 +57,7 @@ def _coerce_int(value: Any) -> int:
     raise ValueError("value must be an integer")
 
 
-def _build_error(
-    field_name: Optional[str],
-    base_message: str,
-    validation: ValidationInfo,
-    metadata: Optional[Metadata],
-) -> str:
+def _error_suffix(validation: ValidationInfo, metadata: Optional[Metadata]) -> str:
     detail_items = []
     value_range: Optional[Tuple[Any, Any]] = validation.get("range")
     if value_range:
@@ -87,16 +88,33 @@ def _build_error(
             detail_items.append(f"offset {offset}")
 
     detail_text = "; ".join(detail_items)
-    message = base_message
-    if detail_text:
-        message = f"{message} ({detail_text})"
+    return f" ({detail_text})" if detail_text else ""
+
 
+def _format_error(field_name: Optional[str], base_message: str, suffix: str) -> str:
+    message = f"{base_message}{suffix}"
     if field_name:
         message = f"Field {field_name} {message}"
-
     return f"{message}."
 
 
+def _build_error(
+    field_name: Optional[str],
+    base_message: str,
+    validation: ValidationInfo,
+    metadata: Optional[Metadata],
+) -> str:
+    return _format_error(field_name, base_message, _error_suffix(validation, metadata))
+
+
+def _error_factory(
+    field_name: Optional[str],
+    validation: ValidationInfo,
+    metadata: Optional[Metadata],
+) -> ErrorFactory:
+    return lambda base_message: _build_error(field_name, base_message, validation, metadata)
+
+
 def _validation_float(metadata: Optional[Metadata], packet: Optional[scapy_all.Packet], field: scapy_all.Field) -> ValidationInfo:
     return {"format": "floating point number"}
 
@@ -109,10 +127,14 @@ def _encode_float(
     field: scapy_all.Field,
 ) -> float:
     validation = _validation_float(metadata, packet, field)
+    return _convert_float(value, _error_factory(field_name, validation, metadata), validation)
+
+
+def _convert_float(value: Any, error: ErrorFactory, validation: ValidationInfo) -> float:
     try:
         numeric = _coerce_float(value)
     except (TypeError, ValueError):
-        raise ValueError(_build_error(field_name, "expects a floating point value", validation, metadata)) from None
+        raise ValueError(error("expects a floating point value")) from None
 
     byte_array = struct.pack("f", numeric)
     reversed_byte_array = byte_array[::-1]
@@ -135,6 +157,88 @@ def _decode_float(
     return struct.unpack("f", reversed_byte_array)[0]
 
 
+def _validation_signed(metadata: Optional[Metadata], packet: Optional[scapy_all.Packet], field: scapy_all.Field) -> ValidationInfo:
+    bits = field.sz * 8
+    return {"range": (-(1 << (bits - 1)), (1 << (bits - 1)) - 1), "format": f"decimal or hex ({bits}-bit signed)"}
+
+
+def _encode_signed(
+    value: Any,
+    field_name: Optional[str],
+    metadata: Optional[Metadata],
+    packet: Optional[scapy_all.Packet],
+    field: scapy_all.Field,
+) -> int:
+    validation = _validation_signed(metadata, packet, field)
+    return _convert_signed(value, _error_factory(field_name, validation, metadata), validation)
+
+
+def _convert_signed(value: Any, error: ErrorFactory, validation: ValidationInfo) -> int:
+    try:
+        numeric = _coerce_int(value)
+    except ValueError:
+        raise ValueError(error("expects an integer value")) from None
+
+    low, high = validation["range"]
+    if not (low <= numeric <= high):
+        raise ValueError(error("expects a value within range"))
+
+    return int(numeric)
+
+
+def _decode_signed(
+    value: Any,
+    metadata: Optional[Metadata],
+    packet: Optional[scapy_all.Packet],
+    field: scapy_all.Field,
+) -> Any:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class LEDoubleField(scapy_all.Field):
+    """Little-endian IEEE 754 double, the wire format of CIP ``LREAL`` signals."""
+
+    def __init__(self, name: str, default: float) -> None:
+        super().__init__(name, default, fmt="<d")
+
+
+def _validation_double(metadata: Optional[Metadata], packet: Optional[scapy_all.Packet], field: scapy_all.Field) -> ValidationInfo:
+    return {"format": "floating point number"}
+
+
+def _encode_double(
+    value: Any,
+    field_name: Optional[str],
+    metadata: Optional[Metadata],
+    packet: Optional[scapy_all.Packet],
+    field: scapy_all.Field,
+) -> float:
+    validation = _validation_double(metadata, packet, field)
+    return _convert_double(value, _error_factory(field_name, validation, metadata), validation)
+
+
+def _convert_double(value: Any, error: ErrorFactory, validation: ValidationInfo) -> float:
+    try:
+        return _coerce_float(value)
+    except (TypeError, ValueError):
+        raise ValueError(error("expects a floating point value")) from None
+
+
+def _decode_double(
+    value: Any,
+    metadata: Optional[Metadata],
+    packet: Optional[scapy_all.Packet],
+    field: scapy_all.Field,
+) -> Any:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
 def _validation_byte(metadata: Optional[Metadata], packet: Optional[scapy_all.Packet], field: scapy_all.Field) -> ValidationInfo:
     return {"range": (0, 0xFF), "format": "decimal or hex (0x00-0xFF)"}
 
@@ -147,13 +251,17 @@ def _encode_byte(
     field: scapy_all.Field,
 ) -> int:
     validation = _validation_byte(metadata, packet, field)
+    return _convert_byte(value, _error_factory(field_name, validation, metadata), validation)
+
+
+def _convert_byte(value: Any, error: ErrorFactory, validation: ValidationInfo) -> int:
     try:
         numeric = _coerce_int(value)
     except ValueError:
-        raise ValueError(_build_error(field_name, "expects an integer value", validation, metadata)) from None
+        raise ValueError(error("expects an integer value")) from None
 
     if not (0 <= numeric <= 0xFF):
-        raise ValueError(_build_error(field_name, "expects a value within range", validation, metadata))
+        raise ValueError(error("expects a value within range"))
 
     return int(numeric)
 
@@ -182,18 +290,22 @@ def _encode_short(
     field: scapy_all.Field,
 ) -> int:
     validation = _validation_short(metadata, packet, field)
+    return _convert_short(value, _error_factory(field_name, validation, metadata), validation)
+
+
+def _convert_short(value: Any, error: ErrorFactory, validation: ValidationInfo) -> int:
     try:
         numeric = _coerce_int(value)
     except ValueError:
-        raise ValueError(_build_error(field_name, "expects an integer value", validation, metadata)) from None
+        raise ValueError(error("expects an integer value")) from None
 
     if not (0 <= numeric <= 0xFFFF):
-        raise ValueError(_build_error(field_name, "expects a value within range", validation, metadata))
+        raise ValueError(error("expects a value within range"))
 
     try:
         byte_array = int(numeric).to_bytes(2, byteorder="big", signed=False)
     except OverflowError:
-        raise ValueError(_build_error(field_name, "expects a 16-bit value", validation, metadata)) from None
+        raise ValueError(error("expects a 16-bit value")) from None
 
     reversed_byte_array = byte_array[::-1]
     return int.from_bytes(reversed_byte_array, byteorder="big", signed=False)
@@ -231,6 +343,10 @@ def _encode_bool(
     field: scapy_all.Field,
 ) -> int:
     validation = _validation_bool(metadata, packet, field)
+    return _convert_bool(value, _error_factory(field_name, validation, metadata), validation)
+
+
+def _convert_bool(value: Any, error: ErrorFactory, validation: ValidationInfo) -> int:
     if isinstance(value, str):
         lowered = value.strip().lower()
         if lowered in {"1", "true"}:
@@ -243,7 +359,7 @@ def _encode_bool(
         if value in {0, 1}:
             return int(value)
 
-    raise ValueError(_build_error(field_name, "expects a boolean value", validation, metadata))
+    raise ValueError(error("expects a boolean value"))
 
 
 def _decode_bool(
@@ -278,23 +394,20 @@ def _encode_string(
     field: scapy_all.Field,
 ) -> bytes:
     validation = _validation_string(metadata, packet, field)
+    return _convert_string(value, _error_factory(field_name, validation, metadata), validation)
+
+
+def _convert_string(value: Any, error: ErrorFactory, validation: ValidationInfo) -> bytes:
     if isinstance(value, bytes):
         encoded = value
     elif isinstance(value, str):
         encoded = value.encode("utf-8")
     else:
-        raise ValueError(_build_error(field_name, "expects text or bytes", validation, metadata))
+        raise ValueError(error("expects text or bytes"))
 
     max_length = validation.get("max_length")
     if max_length is not None and len(encoded) > max_length:
-        raise ValueError(
-            _build_error(
-                field_name,
-                f"expects at most {max_length} bytes",
-                validation,
-                metadata,
-            )
-        )
+        raise ValueError(error(f"expects at most {max_length} bytes"))
 
     return encoded
 
@@ -313,6 +426,58 @@ def _decode_string(
     return value
 
 
+def _validation_array(metadata: Optional[Metadata], packet: Optional[scapy_all.Packet], field: scapy_all.Field) -> ValidationInfo:
+    return {
+        "max_length": field.count,
+        "length_unit": "elements",
+        "element_type": field.elem_type,
+        "format": f"comma separated {field.elem_type} values",
+    }
+
+
+def _encode_array(
+    value: Any,
+    field_name: Optional[str],
+    metadata: Optional[Metadata],
+    packet: Optional[scapy_all.Packet],
+    field: scapy_all.Field,
+) -> bytes:
+    validation = _validation_array(metadata, packet, field)
+    return _convert_array(value, _error_factory(field_name, validation, metadata), validation)
+
+
+def _convert_array(value: Any, error: ErrorFactory, validation: ValidationInfo) -> bytes:
+    elem_type = validation["element_type"]
+    try:
+        if isinstance(value, str):
+            items = [item for item in value.strip().strip("[]").split(",") if item.strip()]
+            value = arrays.parse_elements(elem_type, items)
+        return arrays.pack_array(elem_type, value, validation["max_length"])
+    except (TypeError, ValueError):
+        raise ValueError(error(f"expects up to {validation['max_length']} {elem_type} values")) from None
+
+
+def _decode_array(
+    value: Any,
+    metadata: Optional[Metadata],
+    packet: Optional[scapy_all.Packet],
+    field: scapy_all.Field,
+) -> Any:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return arrays.unpack_array(field.elem_type, value, field.count).tolist()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+_SIGNED_CODEC = FieldCodec(
+    name="signed",
+    encode_func=_encode_signed,
+    decode_func=_decode_signed,
+    validation_provider=_validation_signed,
+    convert_func=_convert_signed,
+)
+
 _CODEC_MAP: Tuple[Tuple[Type[scapy_all.Field], FieldCodec], ...] = (
     (
         scapy_all.IEEEFloatField,
@@ -321,6 +486,7 @@ _CODEC_MAP: Tuple[Tuple[Type[scapy_all.Field], FieldCodec], ...] = (
             encode_func=_encode_float,
             decode_func=_decode_float,
             validation_provider=_validation_float,
+            convert_func=_convert_float,
         ),
     ),
     (
@@ -330,6 +496,7 @@ _CODEC_MAP: Tuple[Tuple[Type[scapy_all.Field], FieldCodec], ...] = (
             encode_func=_encode_bool,
             decode_func=_decode_bool,
             validation_provider=_validation_bool,
+            convert_func=_convert_bool,
         ),
     ),
     (
@@ -339,6 +506,7 @@ _CODEC_MAP: Tuple[Tuple[Type[scapy_all.Field], FieldCodec], ...] = (
             encode_func=_encode_byte,
             decode_func=_decode_byte,
             validation_provider=_validation_byte,
+            convert_func=_convert_byte,
         ),
     ),
     (
@@ -348,6 +516,30 @@ _CODEC_MAP: Tuple[Tuple[Type[scapy_all.Field], FieldCodec], ...] = (
             encode_func=_encode_short,
             decode_func=_decode_short,
             validation_provider=_validation_short,
+            convert_func=_convert_short,
+        ),
+    ),
+    (scapy_all.LESignedShortField, _SIGNED_CODEC),
+    (scapy_all.LESignedIntField, _SIGNED_CODEC),
+    (scapy_all.LESignedLongField, _SIGNED_CODEC),
+    (
+        LEDoubleField,
+        FieldCodec(
+            name="double",
+            encode_func=_encode_double,
+            decode_func=_decode_double,
+            validation_provider=_validation_double,
+            convert_func=_convert_double,
+        ),
+    ),
+    (
+        arrays.ArrayField,
+        FieldCodec(
+            name="array",
+            encode_func=_encode_array,
+            decode_func=_decode_array,
+            validation_provider=_validation_array,
+            convert_func=_convert_array,
         ),
     ),
     (
@@ -357,6 +549,7 @@ _CODEC_MAP: Tuple[Tuple[Type[scapy_all.Field], FieldCodec], ...] = (
             encode_func=_encode_string,
             decode_func=_decode_string,
             validation_provider=_validation_string,
+            convert_func=_convert_string,
         ),
     ),
 )
@@ -423,13 +616,134 @@ def get_field_metadata(packet: scapy_all.Packet, field_name: str) -> Optional[Me
     return None
 
 
+class FieldSpec:
+    """Everything needed to read, write and validate one field.
+
+    Specs are built once per packet class by :func:`field_table`; the codec,
+    validation bounds and error message suffix are resolved up front so that
+    encoding a value does no lookups.
+    """
+
+    __slots__ = (
+        "name",
+        "field",
+        "codec",
+        "metadata",
+        "validation",
+        "offset",
+        "size",
+        "clear_value",
+        "_limits",
+        "_error_suffix",
+    )
+
+    def __init__(self, field: scapy_all.Field, metadata: Optional[Metadata]) -> None:
+        codec = get_field_codec(field)
+        limits = codec.validation_provider(metadata, None, field) if codec is not None else {}
+        self.name: str = field.name
+        self.field = field
+        self.codec = codec
+        self.metadata = MappingProxyType(dict(metadata)) if metadata else None
+        self.validation: Mapping[str, Any] = MappingProxyType(describe_validation(field, metadata=metadata))
+        self.offset: Optional[int] = metadata.get("offset") if metadata else None
+        self.size: Optional[int] = getattr(field, "size", None) if isinstance(field, scapy_all.BitField) else None
+        if codec is None:
+            self.clear_value: Any = None
+        elif codec.name == "string":
+            self.clear_value = b""
+        elif codec.name == "array":
+            self.clear_value = bytes(field.default)
+        else:
+            self.clear_value = 0
+        self._limits = limits
+        self._error_suffix = _error_suffix(limits, metadata)
+
+    def __repr__(self) -> str:
+        codec = self.codec.name if self.codec is not None else None
+        return f"FieldSpec(name={self.name!r}, codec={codec!r}, offset={self.offset!r})"
+
+    @property
+    def codec_name(self) -> Optional[str]:
+        return self.codec.name if self.codec is not None else None
+
+    def error(self, base_message: str) -> str:
+        return _format_error(self.name, base_message, self._error_suffix)
+
+    def encode(self, value: Any) -> Any:
+        """Convert a user value to the packet's internal representation."""
+
+        if self.codec is None:
+            return value
+        return self.codec.convert_func(value, self.error, self._limits)
+
+    def decode(self, value: Any) -> Any:
+        """Convert an internal value to its display representation."""
+
+        if self.codec is None:
+            return value
+        return self.codec.decode_func(value, self.metadata, None, self.field)
+
+    def read(self, packet: Any) -> Any:
+        return self.decode(getattr(packet, self.name))
+
+
+class FieldTable(Mapping[str, FieldSpec]):
+    """Immutable, ordered mapping of field names to :class:`FieldSpec`."""
+
+    __slots__ = ("_specs",)
+
+    def __init__(self, specs: Iterable[FieldSpec]) -> None:
+        self._specs: Dict[str, FieldSpec] = {spec.name: spec for spec in specs}
+
+    def __getitem__(self, name: str) -> FieldSpec:
+        return self._specs[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def decode_all(self, packet: Any) -> List[Tuple[str, Any]]:
+        """Return ``(name, decoded value)`` pairs for every field of ``packet``."""
+
+        return [(name, spec.decode(getattr(packet, name))) for name, spec in self._specs.items()]
+
+
+_FIELD_TABLES: "weakref.WeakKeyDictionary[type, FieldTable]" = weakref.WeakKeyDictionary()
+
+
+def field_table(packet: Any) -> FieldTable:
+    """Return the field table of ``packet`` (an instance or a packet class).
+
+    Tables are cached per class, so the cost of resolving codecs and metadata
+    is paid once per assembly rather than on every access.
+    """
+
+    packet_class = packet if isinstance(packet, type) else type(packet)
+    table = _FIELD_TABLES.get(packet_class)
+    if table is None:
+        signal_info = getattr(packet_class, "signal_info", {})
+        if not isinstance(signal_info, dict):
+            signal_info = {}
+        table = FieldTable(
+            FieldSpec(field, signal_info.get(field.name)) for field in getattr(packet_class, "fields_desc", ())
+        )
+        _FIELD_TABLES[packet_class] = table
+    return table
+
+
 __all__ = [
     "FieldCodec",
+    "FieldSpec",
+    "FieldTable",
+    "LEDoubleField",
     "Metadata",
     "ValidationInfo",
     "describe_validation",
     "decode_field_value",
     "encode_field_value",
+    "field_table",
     "get_field_codec",
     "get_field_metadata",
 ]
@@ -0,0 +1,192 @@
+"""Assembly layout compilation for CIP XML configuration files.
+
+An assembly declares its signals by bit offset.  :func:`compile_layout` sorts
+those declarations once, walks them in offset order and produces an
+:class:`AssemblyLayout` made of the declared signals plus the unused regions
+between them, represented as :class:`SkipSpan` entries rather than synthetic
+spare fields.  Overlapping, misaligned or out-of-range signals are reported
+as layout errors instead of silently producing a corrupt packet layout.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+CIP_DATA_TYPE_SIZES: Mapping[str, int] = {
+    "usint": 1,
+    "uint": 2,
+    "udint": 4,
+    "real": 4,
+    "string": 1,
+    "sint": 1,
+    "int": 2,
+    "dint": 4,
+    "lreal": 8,
+    "lint": 8,
+}
+
+
+@dataclass(frozen=True)
+class SignalSpec:
+    """A signal declared in an assembly.
+
+    ``offset`` is expressed in bits from the start of the assembly and
+    ``length`` in elements (bytes for strings).
+    """
+
+    name: str
+    type: str
+    offset: int
+    length: int = 1
+
+    @property
+    def bit_size(self) -> int:
+        if self.type == "bool":
+            return 1
+        return self.length * CIP_DATA_TYPE_SIZES[self.type] * 8
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.bit_size
+
+
+@dataclass(frozen=True)
+class SkipSpan:
+    """A region of the assembly that carries no declared signal."""
+
+    offset: int
+    size: int
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+
+LayoutItem = Union[SignalSpec, SkipSpan]
+
+
+@dataclass(frozen=True)
+class AssemblyLayout:
+    """Signals and skip spans of an assembly, sorted by bit offset."""
+
+    name: str
+    size: int
+    signals: Tuple[SignalSpec, ...]
+    gaps: Tuple[SkipSpan, ...]
+    errors: Tuple[str, ...] = ()
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    @cached_property
+    def by_name(self) -> Dict[str, SignalSpec]:
+        return {signal.name: signal for signal in self.signals}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON serialisable representation of the layout."""
+
+        return {
+            "name": self.name,
+            "size": self.size,
+            "signals": [[signal.name, signal.type, signal.offset, signal.length] for signal in self.signals],
+            "gaps": [[gap.offset, gap.size] for gap in self.gaps],
+            "errors": list(self.errors),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "AssemblyLayout":
+        """Rebuild a layout produced by :meth:`to_dict` without recompiling it."""
+
+        return cls(
+            name=data["name"],
+            size=int(data["size"]),
+            signals=tuple(SignalSpec(*signal) for signal in data["signals"]),
+            gaps=tuple(SkipSpan(*gap) for gap in data["gaps"]),
+            errors=tuple(data["errors"]),
+        )
+
+    def items(self) -> Iterator[LayoutItem]:
+        """Yield signals and skip spans in offset order."""
+
+        gaps = iter(self.gaps)
+        gap = next(gaps, None)
+        for signal in self.signals:
+            while gap is not None and gap.offset < signal.offset:
+                yield gap
+                gap = next(gaps, None)
+            yield signal
+        while gap is not None:
+            yield gap
+            gap = next(gaps, None)
+
+
+def compile_layout(name: str, size: int, declarations: Iterable[SignalSpec]) -> AssemblyLayout:
+    """Compile signal declarations into an :class:`AssemblyLayout`.
+
+    The declarations are sorted once by offset, so the cost is
+    ``O(n log n)`` in the number of signals regardless of the assembly size.
+    Signals that overlap an earlier signal, are not byte aligned (other than
+    ``bool``), use an unknown type or extend beyond ``size`` bits are left out
+    of the layout and described in :attr:`AssemblyLayout.errors`.
+    """
+
+    errors: List[str] = []
+    signals: List[SignalSpec] = []
+    gaps: List[SkipSpan] = []
+    seen: Dict[str, SignalSpec] = {}
+
+    if size % 8:
+        errors.append(f"assembly size {size} is not a whole number of bytes")
+
+    cursor = 0
+    previous: SignalSpec | None = None
+    for signal in sorted(declarations, key=lambda item: item.offset):
+        if signal.type != "bool" and signal.type not in CIP_DATA_TYPE_SIZES:
+            errors.append(f"{signal.name} has unsupported type '{signal.type}'")
+            continue
+        if signal.offset < 0 or signal.length < 1:
+            errors.append(f"{signal.name} has invalid offset {signal.offset} or length {signal.length}")
+            continue
+        if signal.type != "bool" and signal.offset % 8:
+            errors.append(f"{signal.name} at offset {signal.offset} is not byte aligned")
+            continue
+        if signal.end > size:
+            errors.append(f"{signal.name} ends at bit {signal.end} beyond assembly size {size}")
+            continue
+        if signal.name in seen:
+            errors.append(f"{signal.name} is declared more than once")
+            continue
+        if previous is not None and signal.offset < cursor:
+            errors.append(f"{signal.name} at offset {signal.offset} overlaps {previous.name}")
+            continue
+
+        if signal.offset > cursor:
+            gaps.append(SkipSpan(cursor, signal.offset - cursor))
+        signals.append(signal)
+        seen[signal.name] = signal
+        previous = signal
+        cursor = signal.end
+
+    if cursor < size:
+        gaps.append(SkipSpan(cursor, size - cursor))
+
+    return AssemblyLayout(
+        name=name,
+        size=size,
+        signals=tuple(signals),
+        gaps=tuple(gaps),
+        errors=tuple(errors),
+    )
+
+
+__all__ = [
+    "AssemblyLayout",
+    "CIP_DATA_TYPE_SIZES",
+    "LayoutItem",
+    "SignalSpec",
+    "SkipSpan",
+    "compile_layout",
+]
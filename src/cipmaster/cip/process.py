@@ -0,0 +1,644 @@
+"""Run the cyclic IO of a session in a dedicated child process.
+
+The interactive CLI, the wave threads and log formatting all compete with
+the IO threads for one interpreter lock.  :class:`ProcessSession` moves the
+:class:`~cipmaster.cip.session.CIPSession` into a child process so that none
+of that work delays an OT frame.
+
+The OT and TO assembly bytes live in one :mod:`multiprocessing.shared_memory`
+block, each guarded by a sequence lock (:class:`SeqlockRegion`).  The parent
+writes OT fields straight into shared memory through the encoder returned by
+:meth:`ProcessSession.start`, and reads the newest TO frame with
+:meth:`ProcessSession.to_snapshot`; neither needs a round trip to the child.
+The child copies the OT frame into its own encoder at the start of every
+cycle in which it changed and publishes every decoded TO frame.  Statistics
+and log records travel back over a queue once per ``report_interval``.
+With change-of-state sending, each committed OT write also sets a shared
+event that the child forwards to its session.
+"""
+
+from __future__ import annotations
+
+import copy
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from scapy import all as scapy_all
+
+from .assembly import AssemblyEncoder, AssemblyView, BufferLike, CompiledAssembly, compile_assembly
+from .config import build_packet_class
+from .fields import field_table
+from .layout import AssemblyLayout
+from .profiler import CycleProfiler
+from .realtime import RealtimeTuning, TuningStatus
+from .reconnect import OutageStats, ReconnectPolicy
+from .scheduler import ChangeOfStateStats, SchedulerStats
+from .session import CIPSession, ConnectionParameters
+from .stats import ConnectionTiming, SequenceAnomaly, SequenceCounters
+from .watchdog import TimeoutCallback
+from thirdparty.scapy_cip_enip.tgv2020 import Client
+
+logger = logging.getLogger(__name__)
+
+# Sequence counter in front of each frame, padded so the frame stays aligned.
+_SEQUENCE = struct.Struct("=I")
+_HEADER_SIZE = 8
+_SEQUENCE_MODULO = 1 << 32
+
+# A reader gives up when a writer stays inside its critical section this long.
+_READ_ATTEMPTS = 10_000
+
+# Fields the engine writes itself, kept when the parent's OT frame is loaded.
+_ENGINE_FIELDS = ("MPU_CDateTimeSec",)
+
+# Upper bound on how long the child waits for an OT change before checking for stop.
+_CHANGE_POLL = 0.5
+
+DEFAULT_REPORT_INTERVAL = 1.0
+
+
+class SeqlockRegion:
+    """One assembly frame in shared memory guarded by a sequence lock.
+
+    A writer makes the sequence counter odd, changes the frame and makes the
+    counter even again.  Readers copy the frame and retry when the counter
+    was odd or moved while they copied, so they never block the writer and
+    never return a torn frame.  There must be a single writing process;
+    writer threads within it serialise on :attr:`lock`, and a thread may
+    nest writes, which the reader then sees as one.
+
+    The protocol relies on the stores of the writer becoming visible to the
+    reader in program order, which holds on x86-64.
+    """
+
+    def __init__(self, buffer: memoryview, size: int) -> None:
+        if len(buffer) < _HEADER_SIZE + size:
+            raise ValueError(f"region needs {_HEADER_SIZE + size} bytes, got {len(buffer)}")
+        self.size = size
+        self.lock = threading.RLock()
+        self._depth = 0
+        self._buffer = buffer
+        self.data = buffer[_HEADER_SIZE : _HEADER_SIZE + size]
+
+    @staticmethod
+    def span(size: int) -> int:
+        """Bytes of shared memory taken by a region holding ``size`` bytes, kept 8-byte aligned."""
+
+        return _HEADER_SIZE + (size + 7) // 8 * 8
+
+    @property
+    def sequence(self) -> int:
+        """The sequence counter; even values mean no write is in progress."""
+
+        return _SEQUENCE.unpack_from(self._buffer)[0]
+
+    def _step(self) -> None:
+        _SEQUENCE.pack_into(self._buffer, 0, (self.sequence + 1) % _SEQUENCE_MODULO)
+
+    @contextmanager
+    def writing(self) -> Iterator[memoryview]:
+        """Hold the writer side while the body changes :attr:`data` in place."""
+
+        with self.lock:
+            self._depth += 1
+            if self._depth == 1:
+                self._step()
+            try:
+                yield self.data
+            finally:
+                self._depth -= 1
+                if not self._depth:
+                    self._step()
+
+    def write(self, data: BufferLike) -> None:
+        """Replace the whole frame with ``data``, which must be exactly :attr:`size` bytes long."""
+
+        with self.lock:
+            outermost = not self._depth
+            if outermost:
+                self._step()
+            try:
+                self.data[:] = data
+            finally:
+                if outermost:
+                    self._step()
+
+    def read_sequenced(self) -> Tuple[int, bytes]:
+        """Return a consistent copy of the frame with the sequence it was taken at.
+
+        Raises
+        ------
+        RuntimeError
+            If a write stays in progress for the whole retry budget, which
+            means the writing process died in the middle of a write.
+        """
+
+        for _ in range(_READ_ATTEMPTS):
+            before = self.sequence
+            if not before & 1:
+                data = self.data.tobytes()
+                if self.sequence == before:
+                    return before, data
+            time.sleep(0)
+        raise RuntimeError("shared assembly writer did not finish its write")
+
+    def read(self) -> bytes:
+        """Return a consistent copy of the frame (see :meth:`read_sequenced`)."""
+
+        return self.read_sequenced()[1]
+
+    def release(self) -> None:
+        """Release the views of the shared memory so that it can be closed."""
+
+        self.data.release()
+        self._buffer.release()
+
+
+class SharedAssemblies:
+    """The OT and TO :class:`SeqlockRegion` of one IO engine in one shared memory block.
+
+    The creating side owns the block and unlinks it on :meth:`close`; pass
+    ``name`` to attach to an existing block instead.
+    """
+
+    def __init__(self, ot_size: int, to_size: int, *, name: Optional[str] = None) -> None:
+        ot_span = SeqlockRegion.span(ot_size)
+        total = ot_span + SeqlockRegion.span(to_size)
+        self._owner = name is None
+        self._memory = shared_memory.SharedMemory(name=name, create=self._owner, size=total if self._owner else 0)
+        buffer = self._memory.buf
+        self.ot = SeqlockRegion(buffer[:ot_span], ot_size)
+        self.to = SeqlockRegion(buffer[ot_span:total], to_size)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def close(self) -> None:
+        self.ot.release()
+        self.to.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class _SharedEncoderMixin:
+    """Route public field writes of a compiled OT encoder through a :class:`SeqlockRegion`."""
+
+    __slots__ = ()
+
+    _region: Optional[SeqlockRegion]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        region = None if name.startswith("_") else self._region
+        if region is None:
+            object.__setattr__(self, name, value)
+            return
+        with region.writing():
+            object.__setattr__(self, name, value)
+
+    def write_slice(self, name: str, values: Any, start: int = 0) -> None:
+        region = self._region
+        if region is None:
+            super().write_slice(name, values, start)
+            return
+        with region.writing():
+            super().write_slice(name, values, start)
+
+    @contextmanager
+    def update(self) -> Iterator[AssemblyEncoder]:
+        # The region is always taken before the update lock, as in __setattr__.
+        region = self._region
+        if region is None:
+            with super().update():
+                yield self
+            return
+        with region.writing(), super().update():
+            yield self
+
+
+_shared_encoder_classes: Dict[Type[AssemblyEncoder], Type[AssemblyEncoder]] = {}
+
+
+def shared_encoder(assembly: CompiledAssembly, region: SeqlockRegion) -> AssemblyEncoder:
+    """Return an encoder of ``assembly`` whose frame is the data of ``region``.
+
+    Field writes happen under the region's write lock; :func:`detach_encoder`
+    gives the encoder a private copy of the frame again.
+    """
+
+    base = assembly.encoder_class
+    cls = _shared_encoder_classes.get(base)
+    if cls is None:
+        cls = _shared_encoder_classes[base] = type(base.__name__, (_SharedEncoderMixin, base), {"__slots__": ("_region",)})
+    encoder = cls(region.read())
+    encoder._buffer = region.data
+    encoder._region = region
+    return encoder
+
+
+def detach_encoder(encoder: AssemblyEncoder) -> None:
+    """Move an encoder from :func:`shared_encoder` back onto a private buffer."""
+
+    region = getattr(encoder, "_region", None)
+    if region is None:
+        return
+    with region.lock:
+        encoder._buffer = bytearray(region.data)
+        encoder._region = None
+
+
+def _compile(layout: AssemblyLayout) -> CompiledAssembly:
+    return compile_assembly(layout, build_packet_class(layout))
+
+
+@dataclass
+class EngineReport:
+    """Statistics of the IO process, sent to the parent every report interval."""
+
+    error_occurred: bool = False
+    timing: Optional[ConnectionTiming] = None
+    counters: Dict[int, SequenceCounters] = field(default_factory=dict)
+    anomalies: List[SequenceAnomaly] = field(default_factory=list)
+    transmit_stats: SchedulerStats = field(default_factory=SchedulerStats)
+    tuning_status: Dict[str, TuningStatus] = field(default_factory=dict)
+    outage_stats: OutageStats = field(default_factory=OutageStats)
+    change_stats: ChangeOfStateStats = field(default_factory=ChangeOfStateStats)
+
+
+class SequenceSnapshot:
+    """Read-only copy of a :class:`~cipmaster.cip.stats.SequenceTracker` taken in the IO process."""
+
+    def __init__(self, counters: Dict[int, SequenceCounters], anomalies: List[SequenceAnomaly]) -> None:
+        self._counters = counters
+        self._anomalies = anomalies
+
+    def counters(self) -> Dict[int, SequenceCounters]:
+        return dict(self._counters)
+
+    def anomalies(self) -> List[SequenceAnomaly]:
+        return list(self._anomalies)
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "connections": {connection_id: asdict(counters) for connection_id, counters in self._counters.items()},
+            "anomalies": [asdict(anomaly) for anomaly in self._anomalies],
+        }
+
+
+@dataclass(frozen=True)
+class _EngineSpec:
+    shared_name: str
+    ip_address: str
+    multicast_address: str
+    connection_params: ConnectionParameters
+    ot_layout: AssemblyLayout
+    to_layout: AssemblyLayout
+    client_factory: Any
+    debug_cip_frames: bool
+    drain_receive: bool
+    kernel_timestamps: bool
+    realtime: Optional[RealtimeTuning]
+    reconnect: Optional[ReconnectPolicy]
+    production_inhibit: Optional[float]
+    report_interval: float
+    log_level: int
+
+
+def _post(reports: Any, item: Any) -> None:
+    try:
+        reports.put_nowait(item)
+    except (queue.Full, ValueError, OSError):
+        pass
+
+
+def _engine_report(session: CIPSession) -> EngineReport:
+    # Copied here because the queue pickles items later, on its feeder thread.
+    tracker = session.sequence_tracker
+    return EngineReport(
+        error_occurred=session.error_occurred,
+        timing=copy.deepcopy(session.timing),
+        counters=tracker.counters() if tracker is not None else {},
+        anomalies=tracker.anomalies() if tracker is not None else [],
+        transmit_stats=copy.copy(session.transmit_stats),
+        tuning_status=copy.deepcopy(session.tuning_status),
+        outage_stats=copy.copy(session.outage_stats),
+        change_stats=copy.copy(session.change_stats),
+    )
+
+
+def _forward_changes(changed: Any, stop: Any, session: CIPSession) -> None:
+    while not stop.is_set():
+        if changed.wait(_CHANGE_POLL):
+            changed.clear()
+            session.notify_change()
+
+
+def _engine_main(spec: _EngineSpec, stop: Any, reports: Any, changed: Any = None) -> None:
+    """Entry point of the IO process."""
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(reports)]
+    root.setLevel(spec.log_level)
+
+    ot_assembly = _compile(spec.ot_layout)
+    to_assembly = _compile(spec.to_layout)
+    shared = SharedAssemblies(ot_assembly.size, to_assembly.size, name=spec.shared_name)
+    ot_region, to_region = shared.ot, shared.to
+    synced, frame = ot_region.read_sequenced()
+    ot_packet = ot_assembly.encoder_class(frame)
+    heartbeats = field_table(ot_packet)
+    preserved = [name for name in _ENGINE_FIELDS if name in ot_assembly.slots]
+
+    def heartbeat(name: str, value: int) -> None:
+        # Pick up the parent's writes first so the heartbeat is not lost in the load.
+        nonlocal synced
+        if ot_region.sequence != synced:
+            kept = [(field_name, getattr(ot_packet, field_name)) for field_name in preserved]
+            synced, frame = ot_region.read_sequenced()
+            ot_packet.load(frame)
+            for field_name, field_value in kept:
+                setattr(ot_packet, field_name, field_value)
+        signal = heartbeats.get(name)
+        if signal is None:
+            logger.warning("There is no heartbeat with the name: %s", name)
+        elif isinstance(signal.field, scapy_all.ByteField):
+            setattr(ot_packet, name, value)
+        else:
+            logger.warning("Heartbeat is not ByteField type")
+
+    def publish(to_packet: Any) -> None:
+        to_region.write(to_packet._buffer)
+
+    session = CIPSession(
+        client_factory=spec.client_factory,
+        debug_cip_frames=spec.debug_cip_frames,
+        drain_receive=spec.drain_receive,
+        on_connection_timeout=lambda gap: _post(reports, ("timeout", gap)),
+        kernel_timestamps=spec.kernel_timestamps,
+        realtime=spec.realtime,
+        reconnect=spec.reconnect,
+        production_inhibit=spec.production_inhibit,
+    )
+    parent = multiprocessing.parent_process()
+    try:
+        session.start(
+            ip_address=spec.ip_address,
+            multicast_address=spec.multicast_address,
+            connection_params=spec.connection_params,
+            to_packet_class=to_assembly.view_class,
+            ot_packet=ot_packet,
+            heartbeat_callback=heartbeat,
+            update_to_packet=publish,
+        )
+        if changed is not None:
+            threading.Thread(
+                target=_forward_changes, args=(changed, stop, session), name="cip-io-changes", daemon=True
+            ).start()
+        while not stop.wait(spec.report_interval):
+            _post(reports, ("report", _engine_report(session)))
+            if not session.running or (parent is not None and not parent.is_alive()):
+                break
+    finally:
+        session.stop()
+        _post(reports, ("report", _engine_report(session)))
+        shared.close()
+
+
+class ProcessSession:
+    """A :class:`~cipmaster.cip.session.CIPSession` running in a child process.
+
+    The options are those of :class:`CIPSession`; ``client_factory`` must be
+    picklable.  :attr:`timing`, :attr:`sequence_tracker`,
+    :attr:`transmit_stats`, :attr:`tuning_status`, :attr:`outage_stats`,
+    :attr:`change_stats` and :attr:`error_occurred` are copies refreshed every ``report_interval`` seconds.  Profiling and
+    assembly swaps are not available across the process boundary.
+    """
+
+    def __init__(
+        self,
+        *,
+        client_factory: Type[Client] = Client,
+        debug_cip_frames: bool = False,
+        drain_receive: bool = True,
+        on_connection_timeout: Optional[TimeoutCallback] = None,
+        kernel_timestamps: bool = False,
+        realtime: Optional[RealtimeTuning] = None,
+        reconnect: Optional[ReconnectPolicy] = None,
+        production_inhibit: Optional[float] = None,
+        report_interval: float = DEFAULT_REPORT_INTERVAL,
+        context: Optional[Any] = None,
+    ) -> None:
+        self._client_factory = client_factory
+        self.kernel_timestamps = kernel_timestamps
+        self.realtime = realtime
+        self.reconnect = reconnect
+        self.production_inhibit = production_inhibit
+        self.report_interval = report_interval
+        self._debug_cip_frames = debug_cip_frames
+        self._drain_receive = drain_receive
+        self._on_connection_timeout = on_connection_timeout
+        # A fresh interpreter: forking would copy the CLI's threads and locks.
+        self._context = context or multiprocessing.get_context("spawn")
+        self._process: Optional[Any] = None
+        self._stop: Optional[Any] = None
+        self._monitor: Optional[threading.Thread] = None
+        self._shared: Optional[SharedAssemblies] = None
+        self._to_view_class: Optional[Type[AssemblyView]] = None
+        self.ot_packet: Optional[AssemblyEncoder] = None
+        self.last_to_packet: Optional[AssemblyView] = None
+        self.error_occurred = False
+        self.transmit_stats = SchedulerStats()
+        self.timing: Optional[ConnectionTiming] = None
+        self.sequence_tracker: Optional[SequenceSnapshot] = None
+        self.tuning_status: Dict[str, TuningStatus] = {}
+        self.outage_stats = OutageStats()
+        self.change_stats = ChangeOfStateStats()
+        self.profiler: Optional[CycleProfiler] = None
+        self.last_profile: Optional[CycleProfiler] = None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(
+        self,
+        *,
+        ip_address: str,
+        multicast_address: str,
+        connection_params: ConnectionParameters,
+        ot_layout: AssemblyLayout,
+        to_layout: AssemblyLayout,
+        ot_packet: Optional[Any] = None,
+    ) -> AssemblyEncoder:
+        """Start the IO process and return the OT encoder backed by shared memory.
+
+        The values of ``ot_packet`` are carried over when it matches
+        ``ot_layout``.  Writes to the returned encoder reach the next OT frame
+        without involving the IO process.
+
+        Raises
+        ------
+        RuntimeError
+            If the IO process is already running.
+        """
+
+        if self.running:
+            raise RuntimeError("CIP session already running")
+        self._finish()
+
+        ot_assembly = _compile(ot_layout)
+        to_assembly = _compile(to_layout)
+        shared = self._shared = SharedAssemblies(ot_assembly.size, to_assembly.size)
+        initial = bytes(ot_packet) if ot_packet is not None else b""
+        shared.ot.write(initial if len(initial) == ot_assembly.size else ot_assembly.template)
+        shared.to.write(to_assembly.template)
+        self._to_view_class = to_assembly.view_class
+        self.ot_packet = shared_encoder(ot_assembly, shared.ot)
+        self.error_occurred = False
+        self.outage_stats = OutageStats()
+        self.change_stats = ChangeOfStateStats()
+        self.last_to_packet = None
+
+        spec = _EngineSpec(
+            shared_name=shared.name,
+            ip_address=ip_address,
+            multicast_address=multicast_address,
+            connection_params=connection_params,
+            ot_layout=ot_layout,
+            to_layout=to_layout,
+            client_factory=self._client_factory,
+            debug_cip_frames=self._debug_cip_frames,
+            drain_receive=self._drain_receive,
+            kernel_timestamps=self.kernel_timestamps,
+            realtime=self.realtime,
+            reconnect=self.reconnect,
+            production_inhibit=self.production_inhibit,
+            report_interval=self.report_interval,
+            log_level=logging.getLogger().getEffectiveLevel(),
+        )
+        self._stop = self._context.Event()
+        reports = self._context.Queue()
+        changed = None
+        if self.production_inhibit is not None:
+            changed = self._context.Event()
+            self.ot_packet.set_commit_listener(changed.set)
+        self._process = self._context.Process(
+            target=_engine_main, args=(spec, self._stop, reports, changed), name="cip-io-engine", daemon=True
+        )
+        self._process.start()
+        self._monitor = threading.Thread(
+            target=self._monitor_reports, args=(self._process, reports), name="cip-io-engine-monitor", daemon=True
+        )
+        self._monitor.start()
+        return self.ot_packet
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+        if self._process is not None:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                logger.warning("CIP IO process did not terminate cleanly; terminating it")
+                self._process.terminate()
+                self._process.join(timeout=1)
+        self._finish()
+
+    def _finish(self) -> None:
+        if self._monitor is not None:
+            self._monitor.join(timeout=2)
+            self._monitor = None
+        self._process = None
+        self._stop = None
+        shared, self._shared = self._shared, None
+        if shared is None:
+            return
+        self.last_to_packet = self._to_view_class(shared.to.read())
+        if self.ot_packet is not None:
+            self.ot_packet.set_commit_listener(None)
+            detach_encoder(self.ot_packet)
+        shared.close()
+
+    def to_snapshot(self) -> Optional[AssemblyView]:
+        """Return a view of the newest TO frame, or ``None`` when the IO process is not running."""
+
+        shared = self._shared
+        if shared is None or not self.running:
+            return None
+        return self._to_view_class(shared.to.read())
+
+    def timing_report(self) -> Optional[Dict[str, object]]:
+        """Return the cycle timing statistics last reported by the IO process."""
+
+        if self.timing is None:
+            return None
+        report = self.timing.report()
+        report["tuning"] = {thread: status.describe() for thread, status in self.tuning_status.items()}
+        report["outages"] = self.outage_stats.report()
+        if self.production_inhibit is not None:
+            report["change_of_state"] = asdict(self.change_stats)
+        return report
+
+    def sequence_report(self) -> Optional[Dict[str, object]]:
+        return self.sequence_tracker.report() if self.sequence_tracker is not None else None
+
+    def start_profiling(self, *, cprofile: bool = False, sample_interval: Optional[float] = None) -> CycleProfiler:
+        raise RuntimeError("IO cycle profiling is not available when the IO runs in a separate process")
+
+    def stop_profiling(self) -> Optional[CycleProfiler]:
+        return None
+
+    def request_swap(self, swap: Any) -> None:
+        raise RuntimeError("assembly swaps are not available when the IO runs in a separate process")
+
+    def _monitor_reports(self, process: Any, reports: Any) -> None:
+        while True:
+            try:
+                item = reports.get(timeout=0.5)
+            except queue.Empty:
+                if not process.is_alive():
+                    break
+                continue
+            except (EOFError, OSError):
+                break
+            if isinstance(item, logging.LogRecord):
+                logging.getLogger(item.name).handle(item)
+                continue
+            kind, payload = item
+            if kind == "report":
+                self._apply_report(payload)
+            elif kind == "timeout" and self._on_connection_timeout is not None:
+                try:
+                    self._on_connection_timeout(payload)
+                except Exception:
+                    logger.exception("Connection timeout callback failed")
+
+    def _apply_report(self, report: EngineReport) -> None:
+        self.error_occurred = report.error_occurred
+        self.timing = report.timing
+        self.sequence_tracker = SequenceSnapshot(report.counters, report.anomalies)
+        self.transmit_stats = report.transmit_stats
+        self.tuning_status = report.tuning_status
+        self.outage_stats = report.outage_stats
+        self.change_stats = report.change_stats
+
+
+__all__ = [
+    "DEFAULT_REPORT_INTERVAL",
+    "EngineReport",
+    "ProcessSession",
+    "SeqlockRegion",
+    "SequenceSnapshot",
+    "SharedAssemblies",
+    "detach_encoder",
+    "shared_encoder",
+]
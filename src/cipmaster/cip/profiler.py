@@ -0,0 +1,230 @@
+"""Opt-in per-stage profiling of the IO cycle.
+
+While a :class:`CycleProfiler` is installed on a session, the receive and
+transmit loops, and the client calls they make, split each cycle into
+stages and record the wall time and the thread CPU time of every stage
+into :class:`~cipmaster.cip.stats.TimingHistogram` instances.  When no
+profiler is installed the loops only test an attribute for ``None``.
+
+The profiler can additionally run :mod:`cProfile` inside the IO threads or
+sample their stacks into the collapsed format read by flame graph tools.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Union
+
+from .stats import TimingHistogram
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+RECEIVE_STAGES = ("wait", "receive", "enip_decode", "to_decode", "update_to_packet")
+TRANSMIT_STAGES = ("tx_wait", "heartbeat", "ot_build", "send")
+STAGES = RECEIVE_STAGES + TRANSMIT_STAGES
+
+PROFILE_PERCENTILES = (50.0, 99.0)
+
+
+class StageTimer:
+    """Measure consecutive stages of one thread's cycle."""
+
+    __slots__ = ("_profiler", "_wall", "_cpu")
+
+    def __init__(self, profiler: "CycleProfiler") -> None:
+        self._profiler = profiler
+        self.restart()
+
+    def restart(self) -> None:
+        """Start timing the next stage now."""
+
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+
+    def lap(self, stage: str) -> None:
+        """Close ``stage`` and start timing the next one."""
+
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        self._profiler.record(stage, wall - self._wall, cpu - self._cpu)
+        self._wall = wall
+        self._cpu = cpu
+
+
+class CycleProfiler:
+    """Per-stage wall and CPU time histograms of the IO threads.
+
+    With ``cprofile`` each IO thread also runs a :class:`cProfile.Profile`
+    while it uses this profiler; with ``sample_interval`` a background
+    thread samples the IO threads' stacks every ``sample_interval`` seconds.
+    """
+
+    def __init__(self, *, cprofile: bool = False, sample_interval: Optional[float] = None) -> None:
+        self.wall: Dict[str, TimingHistogram] = {stage: TimingHistogram(stage) for stage in STAGES}
+        self.cpu: Dict[str, TimingHistogram] = {stage: TimingHistogram(stage) for stage in STAGES}
+        self.cprofile = cprofile
+        self.sample_interval = sample_interval
+        self.started = time.time()
+        self.stopped: Optional[float] = None
+        self.stacks: Counter = Counter()
+        self._local = threading.local()
+        self._profiles: List[cProfile.Profile] = []
+        self._finished: List[cProfile.Profile] = []
+        self._threads: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        if sample_interval:
+            self._sampler = threading.Thread(target=self._sample, name="cip-profile-sampler", daemon=True)
+            self._sampler.start()
+
+    def timer(self) -> StageTimer:
+        """Return the calling thread's timer, enabling cProfile for it if requested."""
+
+        timer = getattr(self._local, "timer", None)
+        if timer is None:
+            timer = self._local.timer = StageTimer(self)
+            with self._lock:
+                self._threads.add(threading.get_ident())
+            if self.cprofile and self.stopped is None:
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:  # another profiler is active in this thread
+                    logger.warning("cProfile is already active in %s", threading.current_thread().name)
+                else:
+                    self._local.profile = profile
+                    with self._lock:
+                        self._profiles.append(profile)
+        return timer
+
+    def release(self) -> None:
+        """Stop profiling the calling thread; IO loops call this when they drop the profiler."""
+
+        profile = getattr(self._local, "profile", None)
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+            if profile is not None:
+                profile.disable()
+                self._local.profile = None
+                self._profiles.remove(profile)
+                self._finished.append(profile)
+
+    def record(self, stage: str, wall: float, cpu: float) -> None:
+        self.wall[stage].record(wall)
+        self.cpu[stage].record(cpu)
+
+    def stop(self) -> None:
+        self.stopped = time.time()
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1)
+
+    def _sample(self) -> None:
+        interval = self.sample_interval or 0.001
+        own = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(interval):
+            with self._lock:
+                threads = set(self._threads)
+            if not threads:
+                continue
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident not in threads:
+                    continue
+                if ident not in names:
+                    names[ident] = next((thread.name for thread in threading.enumerate() if thread.ident == ident), str(ident))
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names[ident])
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def rows(self) -> List[List[str]]:
+        """Per-stage table rows in milliseconds, skipping stages never reached."""
+
+        rows = []
+        for stage in STAGES:
+            wall, cpu = self.wall[stage], self.cpu[stage]
+            if not wall.count:
+                continue
+            wall_percentiles = wall.percentiles(PROFILE_PERCENTILES)
+            cpu_percentiles = cpu.percentiles(PROFILE_PERCENTILES)
+            rows.append(
+                [stage, str(wall.count)]
+                + [f"{wall_percentiles[percentile] * 1e3:.3f}" for percentile in PROFILE_PERCENTILES]
+                + [f"{wall.max * 1e3:.3f}"]
+                + [f"{cpu_percentiles[percentile] * 1e3:.3f}" for percentile in PROFILE_PERCENTILES]
+                + [f"{cpu.total * 1e3:.1f}"]
+            )
+        return rows
+
+    def write_cprofile(self, path: PathLike) -> None:
+        """Write the merged cProfile statistics of the IO threads to ``path``.
+
+        A thread's statistics can only be read once it has stopped profiling
+        itself, so this is meant to be called after :meth:`stop`.
+
+        Raises
+        ------
+        ValueError
+            If the profiler was not started with ``cprofile``, an IO thread
+            is still profiling, or no IO thread ran under it.
+        """
+
+        with self._lock:
+            if self._profiles:
+                raise ValueError("the IO threads are still profiling; stop the profiler first")
+            profiles = list(self._finished)
+        if not profiles:
+            raise ValueError("no cProfile data; start the profiler with cProfile enabled")
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(str(path))
+
+    def write_collapsed(self, path: PathLike) -> None:
+        """Write the sampled stacks to ``path`` in collapsed (folded) format.
+
+        Raises
+        ------
+        ValueError
+            If no stacks were sampled.
+        """
+
+        if not self.stacks:
+            raise ValueError("no stack samples; start the profiler with stack sampling enabled")
+        with open(path, "w", encoding="utf-8") as handle:
+            for stack, count in sorted(self.stacks.items()):
+                handle.write(f"{stack} {count}\n")
+
+
+PROFILE_HEADERS = (
+    ["Stage", "Samples"]
+    + [f"Wall p{percentile:g} (ms)" for percentile in PROFILE_PERCENTILES]
+    + ["Wall max (ms)"]
+    + [f"CPU p{percentile:g} (ms)" for percentile in PROFILE_PERCENTILES]
+    + ["CPU total (ms)"]
+)
+
+
+__all__ = [
+    "CycleProfiler",
+    "PROFILE_HEADERS",
+    "RECEIVE_STAGES",
+    "STAGES",
+    "StageTimer",
+    "TRANSMIT_STAGES",
+]
@@ -0,0 +1,162 @@
+"""Operating system tuning of the cyclic IO threads.
+
+On Linux the IO threads can be pinned to chosen CPUs, scheduled with the
+``SCHED_FIFO`` real-time policy and the multicast socket can busy-poll the
+network device.  Each setting is best effort: when the platform lacks it or
+the process is not privileged enough, the failure is logged and recorded in
+the returned :class:`TuningStatus` and the IO carries on untuned.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import sys
+from dataclasses import dataclass, field
+from typing import FrozenSet, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Python does not export SO_BUSY_POLL; this is its Linux value.
+_SO_BUSY_POLL = getattr(socket, "SO_BUSY_POLL", 46 if sys.platform.startswith("linux") else None)
+
+
+def parse_cpu_list(text: str) -> FrozenSet[int]:
+    """Parse a CPU list such as ``"2,3"`` or ``"0-1,4"`` (the ``taskset -c`` syntax).
+
+    Raises
+    ------
+    ValueError
+        If ``text`` is empty or not a valid list of non-negative CPU numbers.
+    """
+
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start, stop = int(first), int(last) if last else int(first)
+        if start < 0 or stop < start:
+            raise ValueError(f"invalid CPU range {part!r}")
+        cpus.update(range(start, stop + 1))
+    if not cpus:
+        raise ValueError("empty CPU list")
+    return frozenset(cpus)
+
+
+@dataclass(frozen=True)
+class RealtimeTuning:
+    """Requested tuning; ``None`` leaves the corresponding setting alone.
+
+    ``fifo_priority`` is the ``SCHED_FIFO`` priority (1-99) and
+    ``busy_poll`` the ``SO_BUSY_POLL`` budget in microseconds.
+    """
+
+    cpus: Optional[FrozenSet[int]] = None
+    fifo_priority: Optional[int] = None
+    busy_poll: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.fifo_priority is not None and not 1 <= self.fifo_priority <= 99:
+            raise ValueError(f"SCHED_FIFO priority must be 1-99, got {self.fifo_priority}")
+        if self.busy_poll is not None and self.busy_poll < 0:
+            raise ValueError(f"busy poll time must not be negative, got {self.busy_poll}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.cpus is not None or self.fifo_priority is not None or self.busy_poll is not None
+
+
+@dataclass
+class TuningStatus:
+    """Tuning actually in effect for one IO thread."""
+
+    thread: str
+    cpus: Optional[FrozenSet[int]] = None
+    fifo_priority: Optional[int] = None
+    busy_poll: Optional[int] = None
+    failures: List[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        """One-line summary such as ``"receive: CPUs 2-3, SCHED_FIFO 50"``."""
+
+        parts = []
+        if self.cpus is not None:
+            parts.append(f"CPUs {format_cpu_list(self.cpus)}")
+        if self.fifo_priority is not None:
+            parts.append(f"SCHED_FIFO {self.fifo_priority}")
+        if self.busy_poll is not None:
+            parts.append(f"busy poll {self.busy_poll} us")
+        text = ", ".join(parts) or "default scheduling"
+        if self.failures:
+            text += f" (not applied: {'; '.join(self.failures)})"
+        return f"{self.thread}: {text}"
+
+
+def format_cpu_list(cpus: FrozenSet[int]) -> str:
+    """Format ``cpus`` compactly, the inverse of :func:`parse_cpu_list`."""
+
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def tune_current_thread(tuning: RealtimeTuning, thread: str) -> TuningStatus:
+    """Apply the CPU affinity and scheduling policy of ``tuning`` to the calling thread."""
+
+    status = TuningStatus(thread)
+    if tuning.cpus is not None:
+        try:
+            os.sched_setaffinity(0, tuning.cpus)
+        except AttributeError:
+            status.failures.append("CPU affinity unsupported on this platform")
+        except OSError as exc:
+            status.failures.append(f"CPU affinity {format_cpu_list(tuning.cpus)}: {exc.strerror or exc}")
+        else:
+            status.cpus = frozenset(os.sched_getaffinity(0))
+    if tuning.fifo_priority is not None:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(tuning.fifo_priority))
+        except AttributeError:
+            status.failures.append("SCHED_FIFO unsupported on this platform")
+        except OSError as exc:
+            status.failures.append(f"SCHED_FIFO: {exc.strerror or exc}")
+        else:
+            status.fifo_priority = tuning.fifo_priority
+    for failure in status.failures:
+        logger.warning("Real-time tuning of the %s thread failed: %s", thread, failure)
+    return status
+
+
+def enable_busy_poll(sock: socket.socket, microseconds: int, status: TuningStatus) -> bool:
+    """Set ``SO_BUSY_POLL`` on ``sock``, recording the outcome in ``status``."""
+
+    if _SO_BUSY_POLL is None:
+        failure = "busy poll unsupported on this platform"
+    else:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, _SO_BUSY_POLL, microseconds)
+        except OSError as exc:
+            failure = f"busy poll: {exc.strerror or exc}"
+        else:
+            status.busy_poll = microseconds
+            return True
+    status.failures.append(failure)
+    logger.warning("Real-time tuning of the %s socket failed: %s", status.thread, failure)
+    return False
+
+
+__all__ = [
+    "RealtimeTuning",
+    "TuningStatus",
+    "enable_busy_poll",
+    "format_cpu_list",
+    "parse_cpu_list",
+    "tune_current_thread",
+]
@@ -0,0 +1,154 @@
+"""Reconnection policy and outage accounting for a supervised CIP session.
+
+When a :class:`~cipmaster.cip.session.CIPSession` configured with a
+:class:`ReconnectPolicy` loses its connection it registers a new session,
+sends a new forward open and resumes the IO, retrying with a bounded
+exponential backoff between handshakes.
+
+Between handshakes the target's EtherNet/IP TCP port is probed every packet
+interval.  A target that stops answering is therefore retried as soon as it
+accepts connections again instead of at the end of the current backoff
+delay, and no handshake is attempted while it is unreachable.
+"""
+
+from __future__ import annotations
+
+import logging
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+Probe = Callable[[Address, float], bool]
+
+ENIP_TCP_PORT = 44818
+
+
+@dataclass(frozen=True)
+class ReconnectPolicy:
+    """Backoff between reconnection handshakes, in seconds.
+
+    ``probe_interval`` defaults to the O->T packet interval of the lost
+    connection; ``0`` disables probing, so every handshake waits out its
+    backoff delay.
+    """
+
+    initial_delay: float = 0.1
+    max_delay: float = 5.0
+    multiplier: float = 2.0
+    probe_interval: Optional[float] = None
+    probe_port: int = ENIP_TCP_PORT
+
+    def __post_init__(self) -> None:
+        if self.initial_delay < 0 or self.max_delay < self.initial_delay:
+            raise ValueError(f"invalid backoff delays {self.initial_delay} to {self.max_delay}")
+        if self.multiplier < 1:
+            raise ValueError(f"backoff multiplier must be at least 1, got {self.multiplier}")
+        if self.probe_interval is not None and self.probe_interval < 0:
+            raise ValueError(f"probe interval must not be negative, got {self.probe_interval}")
+
+    def delays(self) -> Iterator[float]:
+        """Yield the delay before each successive handshake, capped at :attr:`max_delay`."""
+
+        delay = self.initial_delay
+        while True:
+            yield delay
+            delay = min(delay * self.multiplier, self.max_delay)
+
+
+@dataclass
+class OutageStats:
+    """Connection losses of a supervised session and the time spent without IO."""
+
+    outages: int = 0
+    downtime: float = 0.0
+    attempts: int = 0
+    down_since: Optional[float] = None
+
+    def begin(self, now: float) -> None:
+        """Record the loss of the connection at monotonic time ``now``."""
+
+        if self.down_since is None:
+            self.outages += 1
+            self.down_since = now
+
+    def end(self, now: float) -> Optional[float]:
+        """Record the IO resuming at ``now`` and return how long it was down."""
+
+        if self.down_since is None:
+            return None
+        outage = now - self.down_since
+        self.downtime += outage
+        self.down_since = None
+        return outage
+
+    def total_downtime(self, now: Optional[float] = None) -> float:
+        """Downtime including the outage in progress, if any."""
+
+        if self.down_since is None:
+            return self.downtime
+        return self.downtime + (time.monotonic() if now is None else now) - self.down_since
+
+    def report(self) -> Dict[str, object]:
+        report = asdict(self)
+        report["downtime"] = self.total_downtime()
+        report["down"] = report.pop("down_since") is not None
+        return report
+
+
+def probe_target(address: Address, timeout: float) -> bool:
+    """Return whether ``address`` accepts a TCP connection within ``timeout`` seconds."""
+
+    try:
+        connection = socket.create_connection(address, timeout=timeout)
+    except OSError:
+        return False
+    connection.close()
+    return True
+
+
+def wait_for_target(
+    address: Address,
+    delay: float,
+    interval: float,
+    stop: threading.Event,
+    *,
+    probe: Probe = probe_target,
+) -> bool:
+    """Block until the next handshake is due; return ``False`` if ``stop`` was set.
+
+    A handshake is due once ``delay`` has passed and the target accepts
+    connections, or straight away when the target accepts them again after a
+    failed probe.  Without probing (``interval`` of 0) it is due after ``delay``.
+    """
+
+    if interval <= 0:
+        return not stop.wait(delay)
+    deadline = time.monotonic() + delay
+    was_down = False
+    while not stop.is_set():
+        started = time.monotonic()
+        up = probe(address, interval)
+        if up and (was_down or started >= deadline):
+            return not stop.is_set()
+        if not up and not was_down:
+            was_down = True
+            logger.info("CIP target %s:%d is unreachable; probing every %.1f ms", address[0], address[1], interval * 1e3)
+        now = time.monotonic()
+        pause = deadline - now if up else interval - (now - started)
+        if stop.wait(max(pause, 0.0)):
+            return False
+    return False
+
+
+__all__ = [
+    "ENIP_TCP_PORT",
+    "OutageStats",
+    "ReconnectPolicy",
+    "probe_target",
+    "wait_for_target",
+]
@@ -0,0 +1,272 @@
+"""Hot reloading of CIP configuration files for a running session.
+
+:class:`ConfigWatcher` reports XML files that change in the configuration
+directories, using inotify on Linux and falling back to polling file
+modification times elsewhere.  :func:`plan_reload` compares the assemblies
+of a changed file with the ones used by the open connection and compiles
+replacements only for those whose layout changed.  A replacement must keep
+the assembly size, since the connection sizes were fixed by the forward open;
+anything else is rejected and requires a reconnect.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import PacketClassInfo, index_assemblies
+from .session import AssemblySwap, SwapCallback
+
+logger = logging.getLogger(__name__)
+
+ChangeCallback = Callable[[Path], None]
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_MODIFY
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyBackend:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    name = "inotify"
+
+    def __init__(self, directories: Iterable[Path]) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._watches: Dict[int, Path] = {}
+        try:
+            for directory in directories:
+                wd = libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), _WATCH_MASK)
+                if wd < 0:
+                    error = ctypes.get_errno()
+                    raise OSError(error, os.strerror(error), str(directory))
+                self._watches[wd] = Path(directory)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def read(self, timeout: float) -> Set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[Path] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            directory = self._watches.get(wd)
+            if directory is not None and name:
+                changed.add(directory / os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    """Detect changes by comparing modification times and sizes."""
+
+    name = "poll"
+
+    def __init__(self, directories: Iterable[Path], wake: threading.Event) -> None:
+        self._directories = [Path(directory) for directory in directories]
+        self._wake = wake
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot: Dict[Path, Tuple[int, int]] = {}
+        for directory in self._directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout: float) -> Set[Path]:
+        self._wake.wait(timeout)
+        snapshot = self._scan()
+        changed = {path for path, stamp in snapshot.items() if self._snapshot.get(path) != stamp}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class ConfigWatcher:
+    """Invoke ``callback`` for each XML file that changes under ``directories``.
+
+    Bursts of events, such as an editor writing a file in several steps, are
+    coalesced over ``debounce`` seconds so each file is reported once.
+    """
+
+    def __init__(
+        self,
+        directories: Iterable[Path],
+        callback: ChangeCallback,
+        *,
+        poll_interval: float = 1.0,
+        debounce: float = 0.2,
+        use_inotify: bool = True,
+    ) -> None:
+        self.directories = [Path(directory) for directory in directories if Path(directory).is_dir()]
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify
+        self.backend: Optional[str] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _create_backend(self):  # type: ignore[no-untyped-def]
+        if self.use_inotify and sys.platform.startswith("linux"):
+            try:
+                return _InotifyBackend(self.directories)
+            except (OSError, AttributeError):
+                logger.info("inotify unavailable; polling configuration directories", exc_info=True)
+        return _PollingBackend(self.directories, self._stop_event)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop_event.clear()
+        backend = self._create_backend()
+        self.backend = backend.name
+        self._thread = threading.Thread(target=self._run, args=(backend,), name="cip-config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, backend) -> None:  # type: ignore[no-untyped-def]
+        try:
+            while not self._stop_event.is_set():
+                changed = backend.read(self.poll_interval)
+                if changed and self.debounce and backend.name == "inotify":
+                    changed |= backend.read(self.debounce)
+                for path in sorted(changed):
+                    if self._stop_event.is_set() or path.suffix.lower() != ".xml" or not path.is_file():
+                        continue
+                    try:
+                        self.callback(path)
+                    except Exception:
+                        logger.exception("Configuration reload callback failed for %s", path)
+        finally:
+            backend.close()
+
+
+@dataclass
+class ReloadPlan:
+    """Assemblies of a changed file that can replace the connected ones.
+
+    A plan with :attr:`rejected` entries should not be applied at all, so
+    that the OT and TO sides never come from different file revisions.
+    """
+
+    path: Path
+    ot: Optional[PacketClassInfo] = None
+    to: Optional[PacketClassInfo] = None
+    rejected: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return self.ot is not None or self.to is not None
+
+    def to_swap(self, on_applied: Optional[SwapCallback] = None) -> AssemblySwap:
+        return AssemblySwap(
+            ot_assembly=self.ot.compiled if self.ot is not None else None,
+            to_packet_class=self.to.compiled.view_class if self.to is not None else None,
+            on_applied=on_applied,
+        )
+
+
+def _compare(current: PacketClassInfo, replacement: Optional[PacketClassInfo]) -> Tuple[Optional[PacketClassInfo], Optional[str]]:
+    if replacement is None:
+        return None, f"assembly {current.id} was removed"
+    if replacement.layout == current.layout:
+        return None, None
+    if replacement.assembly_size != current.assembly_size:
+        return None, (
+            f"assembly {current.id} changed size from {current.assembly_size} to "
+            f"{replacement.assembly_size} bits; reconnect to apply"
+        )
+    if not replacement.layout.valid:
+        return None, f"assembly {current.id} has layout errors: {replacement.layout.errors[0]}"
+    return replacement, None
+
+
+def plan_reload(
+    path: Path,
+    *,
+    ot: Optional[PacketClassInfo] = None,
+    to: Optional[PacketClassInfo] = None,
+) -> ReloadPlan:
+    """Compare ``path`` with the connected ``ot`` and ``to`` assemblies.
+
+    Codecs are compiled here for the assemblies that changed, so that the IO
+    thread only has to migrate values when it installs them.
+    """
+
+    plan = ReloadPlan(path=Path(path))
+    try:
+        root = ET.fromstring(Path(path).read_bytes())
+    except (OSError, ET.ParseError) as exc:
+        plan.rejected.append(f"unable to read {path}: {exc}")
+        return plan
+
+    index = index_assemblies(root)
+    for role, current in (("ot", ot), ("to", to)):
+        if current is None:
+            continue
+        replacement, reason = _compare(current, index.get(current.id))
+        if reason is not None:
+            plan.rejected.append(reason)
+        elif replacement is not None:
+            replacement.compiled  # build the codecs here rather than on the IO thread
+            setattr(plan, role, replacement)
+    return plan
+
+
+__all__ = [
+    "ConfigWatcher",
+    "ReloadPlan",
+    "plan_reload",
+]
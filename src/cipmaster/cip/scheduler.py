@@ -0,0 +1,206 @@
+"""Fixed-rate scheduling of the cyclic OT transmission.
+
+:class:`CyclicScheduler` releases a loop at the requested packet interval
+(RPI) on the monotonic clock.  Deadlines are computed from the start time
+and the cycle index rather than by adding the period to the previous wake-up,
+so sleep overshoot never accumulates into drift.  When the loop falls behind
+by one period or more the elapsed slots are skipped, keeping the original
+phase, and counted in :attr:`SchedulerStats.missed` instead of being sent in
+a burst.
+
+:class:`ChangeOfStateTrigger` adds change-of-state production on top of the
+cyclic schedule: a committed OT value releases the loop early, at most once
+per production inhibit time, while the cyclic frames keep their phase.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+Clock = Callable[[], float]
+Sleep = Callable[[float], None]
+
+# Requested packet interval of the forward open request, in seconds.
+DEFAULT_RPI = 0.2
+
+
+@dataclass
+class SchedulerStats:
+    """Counters describing how well the schedule was kept."""
+
+    cycles: int = 0
+    missed: int = 0
+    max_lateness: float = 0.0
+    total_lateness: float = 0.0
+
+    @property
+    def mean_lateness(self) -> float:
+        return self.total_lateness / self.cycles if self.cycles else 0.0
+
+
+class CyclicScheduler:
+    """Release a loop every ``period`` seconds.
+
+    ``spin`` is the final stretch before each deadline that is busy-waited
+    instead of slept, trading a little CPU for wake-up precision.
+    """
+
+    def __init__(
+        self,
+        period: float,
+        *,
+        spin: float = 0.0002,
+        clock: Clock = time.monotonic,
+        sleep: Sleep = time.sleep,
+    ) -> None:
+        if period <= 0:
+            raise ValueError(f"period must be positive, got {period}")
+        self.period = period
+        self.spin = spin
+        self.stats = SchedulerStats()
+        self._clock = clock
+        self._sleep = sleep
+        self._origin: Optional[float] = None
+        self._index = 0
+
+    @property
+    def next_deadline(self) -> Optional[float]:
+        if self._origin is None:
+            return None
+        return self._origin + self._index * self.period
+
+    def start(self) -> None:
+        """Restart the schedule; the first cycle is released immediately."""
+
+        self._origin = self._clock()
+        self._index = 0
+        self.stats = SchedulerStats()
+
+    def wait(self, stop: Optional[threading.Event] = None) -> bool:
+        """Block until the next deadline.
+
+        Returns ``False`` without waiting further if ``stop`` is set.
+        """
+
+        if self._origin is None:
+            self.start()
+        deadline = self._origin + self._index * self.period  # type: ignore[operator]
+
+        while True:
+            remaining = deadline - self._clock() - self.spin
+            if remaining <= 0:
+                break
+            if stop is not None:
+                if stop.wait(remaining):
+                    return False
+            else:
+                self._sleep(remaining)
+        while self._clock() < deadline:
+            pass
+
+        lateness = self._clock() - deadline
+        missed = int(lateness // self.period)
+        if missed:
+            logger.warning("Cyclic schedule overran by %.1f ms; skipping %d cycle(s)", lateness * 1e3, missed)
+        self._index += 1 + missed
+
+        stats = self.stats
+        stats.cycles += 1
+        stats.missed += missed
+        stats.total_lateness += lateness
+        if lateness > stats.max_lateness:
+            stats.max_lateness = lateness
+        return stop is None or not stop.is_set()
+
+
+@dataclass
+class ChangeOfStateStats:
+    """Counters of the frames released by a change of state."""
+
+    sends: int = 0
+    inhibited: int = 0
+
+
+class ChangeOfStateTrigger:
+    """Release a :class:`CyclicScheduler` loop early when a new value is committed.
+
+    After :meth:`notify` the next :meth:`wait` returns as soon as ``inhibit``
+    seconds (the production inhibit time) have passed since the previous
+    send, unless the next cyclic deadline comes first.  The loop calls
+    :meth:`sending` right before it assembles each frame, so one frame
+    carries every change notified until then.  :attr:`released_early` tells
+    whether the last :meth:`wait` released such a frame rather than a cycle.
+    """
+
+    def __init__(self, scheduler: CyclicScheduler, inhibit: float, *, clock: Clock = time.monotonic) -> None:
+        if inhibit < 0:
+            raise ValueError(f"inhibit time must not be negative, got {inhibit}")
+        self.scheduler = scheduler
+        self.inhibit = inhibit
+        self.stats = ChangeOfStateStats()
+        self._clock = clock
+        self._changed = threading.Event()
+        self._last_send: Optional[float] = None
+        self.released_early = False
+
+    def notify(self) -> None:
+        """Request a frame ahead of the next cyclic deadline; safe from any thread."""
+
+        self._changed.set()
+
+    def sending(self) -> None:
+        """Mark the start of a send; changes notified from now on need another frame."""
+
+        self._changed.clear()
+        self._last_send = self._clock()
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Block until the next cyclic deadline or change-of-state release.
+
+        Returns ``False`` without waiting further if ``stop`` is set; call
+        :meth:`notify` after setting it to wake a pending wait.
+        """
+
+        scheduler = self.scheduler
+        self.released_early = False
+        held = False
+        while not stop.is_set():
+            deadline = scheduler.next_deadline
+            if deadline is None:
+                break
+            cyclic = deadline - scheduler.spin
+            now = self._clock()
+            if self._changed.is_set():
+                release = now if self._last_send is None else self._last_send + self.inhibit
+                if release > now and not held:
+                    held = True
+                    self.stats.inhibited += 1
+                if release >= cyclic:
+                    # The cyclic frame comes first and carries the change.
+                    break
+                if release <= now:
+                    self.stats.sends += 1
+                    self.released_early = True
+                    return True
+                if stop.wait(release - now):
+                    return False
+            elif cyclic > now:
+                self._changed.wait(cyclic - now)
+            else:
+                break
+        return not stop.is_set() and scheduler.wait(stop)
+
+
+__all__ = [
+    "ChangeOfStateStats",
+    "ChangeOfStateTrigger",
+    "CyclicScheduler",
+    "DEFAULT_RPI",
+    "SchedulerStats",
+]
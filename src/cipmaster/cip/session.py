@@ -2,21 +2,31 @@
 
 from __future__ import annotations
 
-import calendar
 import logging
 import threading
 import time
-from dataclasses import dataclass
-from typing import Callable, Optional, Type
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Type
 
 from scapy import all as scapy_all
 
+from .assembly import AssemblyView, CompiledAssembly, ViewBuffers
+from .profiler import CycleProfiler, StageTimer
+from .realtime import RealtimeTuning, TuningStatus, enable_busy_poll, tune_current_thread
+from .reconnect import OutageStats, ReconnectPolicy, wait_for_target
+from .scheduler import DEFAULT_RPI, ChangeOfStateStats, ChangeOfStateTrigger, CyclicScheduler, SchedulerStats
+from .stats import ConnectionTiming, SequenceTracker
+from .watchdog import ConnectionWatchdog, TimeoutCallback, timeout_multiplier
 from thirdparty.scapy_cip_enip.tgv2020 import Client
 
 logger = logging.getLogger(__name__)
 
 HeartbeatCallback = Callable[[str, int], None]
 UpdatePacketCallback = Callable[[scapy_all.Packet], None]
+SwapCallback = Callable[[Any, Type[Any]], None]
+
+# Upper bound on how long the receive thread blocks before checking for stop.
+_RECEIVE_TIMEOUT = 0.5
 
 
 @dataclass
@@ -25,8 +35,34 @@ class ConnectionParameters:
     to_param: int
 
 
+@dataclass
+class AssemblySwap:
+    """Replacement codecs to install at the next IO cycle boundary.
+
+    ``ot_assembly`` is migrated from the running OT encoder so the values set
+    by the user survive the swap.  ``on_applied`` receives the new OT packet
+    and TO packet class while the session lock is held, so it must not take
+    that lock itself.
+    """
+
+    ot_assembly: Optional[CompiledAssembly] = None
+    to_packet_class: Optional[Type[Any]] = None
+    on_applied: Optional[SwapCallback] = None
+
+
 class CIPSession:
-    """Manage the lifecycle of a CIP IO communication session."""
+    """Manage the lifecycle of a CIP IO communication session.
+
+    With a ``reconnect`` policy the session thread survives connection
+    losses: it registers a new session, reopens the connection and resumes
+    the IO with the current OT encoder, so the values written by the user
+    carry over.  :attr:`outage_stats` counts the losses and the downtime.
+
+    With a ``production_inhibit`` time (in seconds) OT frames are also sent on
+    a change of state: a value committed to a compiled encoder goes out as
+    soon as that much time has passed since the previous frame, without
+    waiting for the next cycle.  The cyclic frames continue unchanged.
+    """
 
     def __init__(
         self,
@@ -34,14 +70,43 @@ class CIPSession:
         client_factory: Type[Client] = Client,
         lock: Optional[threading.Lock] = None,
         debug_cip_frames: bool = False,
+        drain_receive: bool = True,
+        on_connection_timeout: Optional[TimeoutCallback] = None,
+        kernel_timestamps: bool = False,
+        realtime: Optional[RealtimeTuning] = None,
+        reconnect: Optional[ReconnectPolicy] = None,
+        production_inhibit: Optional[float] = None,
     ) -> None:
         self._client_factory = client_factory
+        # Reconnect after a lost connection instead of ending the session.
+        self.reconnect = reconnect
+        self.outage_stats = OutageStats()
+        # Minimum time between change-of-state OT frames; None sends cyclically only.
+        self.production_inhibit = production_inhibit
+        self.change_stats = ChangeOfStateStats()
+        self._change_trigger: Optional[ChangeOfStateTrigger] = None
+        # Time TO frames with SO_TIMESTAMPNS kernel receive timestamps.
+        self.kernel_timestamps = kernel_timestamps
+        # CPU affinity, SCHED_FIFO and busy-poll settings for the IO threads.
+        self.realtime = realtime
+        self.tuning_status: Dict[str, TuningStatus] = {}
+        self._drain_receive = drain_receive
+        self._on_connection_timeout = on_connection_timeout
         self._lock = lock or threading.Lock()
         self._debug_cip_frames = debug_cip_frames
         self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._client: Optional[Client] = None
+        self._pending_swap: Optional[AssemblySwap] = None
+        self._to_packet_class: Optional[Type[Any]] = None
+        self._ot_packet: Any = None
         self.error_occurred: bool = False
+        self.transmit_stats = SchedulerStats()
+        self.watchdog: Optional[ConnectionWatchdog] = None
+        self.timing: Optional[ConnectionTiming] = None
+        self.sequence_tracker: Optional[SequenceTracker] = None
+        self.profiler: Optional[CycleProfiler] = None
+        self.last_profile: Optional[CycleProfiler] = None
 
     @property
     def running(self) -> bool:
@@ -63,8 +128,12 @@ class CIPSession:
 
         self._stop_event.clear()
         self.error_occurred = False
+        self.outage_stats = OutageStats()
+        self._ot_packet = ot_packet
+        self._to_packet_class = to_packet_class
 
-        def _run() -> None:
+        def _connect() -> bool:
+            # One connection: RegisterSession, ForwardOpen, IO until it ends.
             try:
                 self._client = self._client_factory(IPAddr=ip_address, MulticastGroupIPaddr=multicast_address)
                 self._client.ot_connection_param = connection_params.ot_param
@@ -72,31 +141,33 @@ class CIPSession:
 
                 if not self._client.connected:
                     logger.warning("Unable to establish CIP session")
-                    self.error_occurred = True
-                    return
+                    return True
 
                 if not self._client.forward_open():
                     logger.warning("Forward open request failed")
-                    self.error_occurred = True
-                    return
+                    return True
 
-                self.error_occurred = self.manage_io_communication(
+                outage = self.outage_stats.end(time.monotonic())
+                if outage is not None:
+                    logger.info("CIP connection restored after %.3f s", outage)
+                error_occurred = self.manage_io_communication(
                     self._client,
-                    to_packet_class=to_packet_class,
-                    ot_packet=ot_packet,
+                    to_packet_class=self._to_packet_class,
+                    ot_packet=self._ot_packet,
                     heartbeat_callback=heartbeat_callback,
                     update_to_packet=update_to_packet,
                 )
 
-                if not self.error_occurred and self._client is not None:
+                if not error_occurred and self._client is not None:
                     try:
                         if getattr(self._client, "connected", False):
                             self._client.forward_close()
                     except Exception:  # pragma: no cover - best effort cleanup
                         logger.exception("Failed to close CIP session cleanly")
+                return error_occurred
             except Exception:  # pragma: no cover - defensive
                 logger.exception("Unexpected error while running CIP session")
-                self.error_occurred = True
+                return True
             finally:
                 if self._client is not None:
                     try:
@@ -106,11 +177,31 @@ class CIPSession:
                     finally:
                         self._client = None
 
+        def _run() -> None:
+            delays: Iterator[float] = iter(())
+            while True:
+                self.error_occurred = _connect()
+                policy = self.reconnect
+                if not self.error_occurred or policy is None or self._stop_event.is_set():
+                    return
+                if self.outage_stats.down_since is None:
+                    # A new outage; the backoff restarts from its initial delay.
+                    self.outage_stats.begin(time.monotonic())
+                    delays = policy.delays()
+                    logger.warning("CIP connection lost; reconnecting to %s", ip_address)
+                interval = policy.probe_interval
+                if interval is None:
+                    interval = self.timing.ot_rpi if self.timing is not None and self.timing.ot_rpi else DEFAULT_RPI
+                if not wait_for_target((ip_address, policy.probe_port), next(delays), interval, self._stop_event):
+                    return
+                self.outage_stats.attempts += 1
+
         self._thread = threading.Thread(target=_run, daemon=True)
         self._thread.start()
 
     def stop(self) -> None:
         self._stop_event.set()
+        self.notify_change()
         if self._thread is not None:
             self._thread.join(timeout=5)
             if self._thread.is_alive():
@@ -118,6 +209,95 @@ class CIPSession:
             self._thread = None
         self._client = None
 
+    def timing_report(self) -> Optional[Dict[str, object]]:
+        """Return the cycle timing statistics of the current or last connection."""
+
+        if self.timing is None:
+            return None
+        report = self.timing.report()
+        report["tuning"] = {thread: status.describe() for thread, status in self.tuning_status.items()}
+        report["outages"] = self.outage_stats.report()
+        if self.production_inhibit is not None:
+            report["change_of_state"] = asdict(self.change_stats)
+        return report
+
+    def notify_change(self) -> None:
+        """Request an OT frame ahead of the next cycle, subject to the production inhibit time.
+
+        Compiled encoders notify the session by themselves; this is for OT
+        packets that cannot.  Does nothing without change-of-state sending.
+        """
+
+        trigger = self._change_trigger
+        if trigger is not None:
+            trigger.notify()
+
+    def sequence_report(self) -> Optional[Dict[str, object]]:
+        """Return the loss, duplicate and reordering totals and recent anomalies."""
+
+        return self.sequence_tracker.report() if self.sequence_tracker is not None else None
+
+    def start_profiling(self, *, cprofile: bool = False, sample_interval: Optional[float] = None) -> CycleProfiler:
+        """Install a new :class:`CycleProfiler`; the IO loops pick it up at their next cycle."""
+
+        self.stop_profiling()
+        self.profiler = CycleProfiler(cprofile=cprofile, sample_interval=sample_interval)
+        return self.profiler
+
+    def stop_profiling(self) -> Optional[CycleProfiler]:
+        """Remove the running profiler and keep it in :attr:`last_profile`."""
+
+        profiler, self.profiler = self.profiler, None
+        if profiler is not None:
+            profiler.stop()
+            self.last_profile = profiler
+        return profiler
+
+    def _tune_thread(self, thread: str, client: Optional[Client] = None) -> None:
+        # Runs on the IO thread being tuned; affinity and policy are per thread.
+        tuning = self.realtime
+        if tuning is None or not tuning.enabled:
+            return
+        status = tune_current_thread(tuning, thread)
+        if client is not None and tuning.busy_poll is not None:
+            sock = getattr(client, "MulticastSock", None)
+            if sock is None:
+                status.failures.append("busy poll: no multicast socket")
+            else:
+                enable_busy_poll(sock, tuning.busy_poll, status)
+        self.tuning_status[thread] = status
+
+    def _switch_profiler(
+        self, previous: Optional[CycleProfiler], client: Client, attribute: str
+    ) -> Tuple[Optional[CycleProfiler], Optional[StageTimer]]:
+        # Runs on the IO thread itself so cProfile is enabled and disabled there.
+        if previous is not None:
+            previous.release()
+        profiler = self.profiler
+        timer = profiler.timer() if profiler is not None else None
+        setattr(client, attribute, timer)
+        return profiler, timer
+
+    def request_swap(self, swap: AssemblySwap) -> None:
+        """Schedule ``swap`` for the next cycle, replacing any pending one."""
+
+        self._pending_swap = swap
+
+    def _apply_pending_swap(self, ot_packet: Any, to_packet_class: Type[Any]) -> Tuple[Any, Type[Any]]:
+        swap, self._pending_swap = self._pending_swap, None
+        if swap is None:
+            return ot_packet, to_packet_class
+
+        with self._lock:
+            if swap.ot_assembly is not None:
+                ot_packet = self._ot_packet = swap.ot_assembly.migrate(ot_packet)
+            if swap.to_packet_class is not None:
+                to_packet_class = self._to_packet_class = swap.to_packet_class
+            if swap.on_applied is not None:
+                swap.on_applied(ot_packet, to_packet_class)
+        logger.info("Swapped assembly codecs at cycle boundary")
+        return ot_packet, to_packet_class
+
     def manage_io_communication(
         self,
         client: Client,
@@ -126,68 +306,309 @@ class CIPSession:
         ot_packet: scapy_all.Packet,
         heartbeat_callback: HeartbeatCallback,
         update_to_packet: UpdatePacketCallback,
+        rpi: Optional[float] = None,
     ) -> bool:
-        """Manage the cyclic CIP IO communication loop."""
-
+        """Manage the cyclic CIP IO communication loop.
+
+        OT frames are sent every ``rpi`` seconds on this thread, defaulting to
+        the interval accepted in the forward open response, while TO frames
+        are received on a separate thread.  A stalled target therefore delays
+        neither our transmissions nor their timing.
+
+        When ``to_packet_class`` is a compiled :class:`AssemblyView` class the
+        received frames are copied into reused views (see
+        :class:`ViewBuffers`): a view passed to ``update_to_packet`` is
+        overwritten two frames later, so copy it to keep it longer.
+        """
+
+        period = rpi if rpi is not None else negotiated_rpi(client)
+        self._to_packet_class = to_packet_class
+        self._ot_packet = ot_packet
+        self.timing = ConnectionTiming(
+            ot_connection_id=getattr(client, "enip_connection_id_OT", 0) or 0,
+            to_connection_id=getattr(client, "enip_connection_id_TO", 0) or 0,
+            ot_rpi=period,
+            to_rpi=_to_interval(client),
+        )
+        if self.kernel_timestamps:
+            enable = getattr(client, "enable_kernel_timestamps", None)
+            if enable is None or not enable():
+                logger.warning("Kernel receive timestamps are unavailable; timing TO frames in user space")
+        self.tuning_status = {}
+        self.sequence_tracker = SequenceTracker()
+        client.io_frame_observer = self._frame_observed
+        done = threading.Event()
+        receive_failed = threading.Event()
+        receiver = threading.Thread(
+            target=self._receive_loop,
+            args=(client, update_to_packet, done, receive_failed),
+            name="cip-io-receive",
+            daemon=True,
+        )
+        receiver.start()
+        try:
+            error_occurred = self._transmit_loop(client, ot_packet, heartbeat_callback, period, done)
+        finally:
+            done.set()
+            receiver.join(timeout=_RECEIVE_TIMEOUT * 2)
+
+        stats = self.transmit_stats
+        logger.info("OT transmission stopped after %d cycles with %d missed deadlines", stats.cycles, stats.missed)
+        superseded = getattr(client, "superseded_frames", 0)
+        if superseded:
+            logger.info("Skipped %d superseded TO frames", superseded)
+        return error_occurred or receive_failed.is_set()
+
+    def _transmit_loop(
+        self,
+        client: Client,
+        ot_packet: Any,
+        heartbeat_callback: HeartbeatCallback,
+        period: float,
+        done: threading.Event,
+    ) -> bool:
+        self._tune_thread("transmit")
         mpu_alive = 0
         cip_app_counter = 65500
-        error_occurred = False
+        scheduler = CyclicScheduler(period)
+        scheduler.start()
+        self.transmit_stats = scheduler.stats
+        release = scheduler.wait
+        trigger: Optional[ChangeOfStateTrigger] = None
+        if self.production_inhibit is not None:
+            trigger = self._change_trigger = ChangeOfStateTrigger(scheduler, self.production_inhibit)
+            self.change_stats = trigger.stats
+            release = trigger.wait
+            _watch_commits(ot_packet, trigger.notify)
+        timing = self.timing
+        profiler: Optional[CycleProfiler] = None
+        timer: Optional[StageTimer] = None
+        # The timestamp field is only written when the second changes.
+        has_date_time = hasattr(ot_packet, "MPU_CDateTimeSec")
+        date_time_sec = -1
+        # Compiled encoders send their committed frame, never one being written.
+        publish = getattr(ot_packet, "publish", None)
+
+        try:
+            while release(self._stop_event):
+                if done.is_set():
+                    break
+                if self.profiler is not profiler:
+                    profiler, timer = self._switch_profiler(profiler, client, "send_stage_timer")
+                elif timer is not None:
+                    timer.lap("tx_wait")
+                if self._pending_swap is not None:
+                    if trigger is not None:
+                        _watch_commits(ot_packet, None)
+                    ot_packet, _ = self._apply_pending_swap(ot_packet, self._to_packet_class)
+                    if trigger is not None:
+                        _watch_commits(ot_packet, trigger.notify)
+                    has_date_time = hasattr(ot_packet, "MPU_CDateTimeSec")
+                    date_time_sec = -1
+                    publish = getattr(ot_packet, "publish", None)
+
+                # Change-of-state frames repeat the heartbeat of the cycle they
+                # interrupt and stay out of the cyclic timing.
+                cyclic = trigger is None or not trigger.released_early
+                if cyclic:
+                    if mpu_alive >= 255:
+                        mpu_alive = 0
+                    else:
+                        mpu_alive += 1
+
+                try:
+                    heartbeat_callback("MPU_CTCMSAlive", mpu_alive)
+                except Exception:
+                    logger.exception("Heartbeat callback failed")
+                    return True
+                if timer is not None:
+                    timer.lap("heartbeat")
+
+                if has_date_time:
+                    now = int(time.time())
+                    if now != date_time_sec:
+                        ot_packet.MPU_CDateTimeSec = date_time_sec = now
+
+                if trigger is not None:
+                    trigger.sending()
+                try:
+                    client.send_UDP_ENIP_CIP_IO(
+                        CIP_Sequence_Count=cip_app_counter,
+                        Header=1,
+                        AppData=publish() if publish is not None else ot_packet,
+                    )
+                except Exception:
+                    logger.exception("Failed to send CIP IO packet")
+                    return True
+                if timing is not None and cyclic:
+                    timing.frame_sent(time.monotonic())
+                    timing.deadline_misses = scheduler.stats.missed
+
+                # Every frame carries new data, so the CIP sequence count
+                # advances on change-of-state frames too.
+                if cip_app_counter < 65535:
+                    cip_app_counter += 1
+                else:
+                    cip_app_counter = 0
+        finally:
+            if trigger is not None:
+                self._change_trigger = None
+                _watch_commits(ot_packet, None)
+            if profiler is not None:
+                profiler.release()
+                client.send_stage_timer = None
+
+        return False
+
+    def _receive_loop(
+        self,
+        client: Client,
+        update_to_packet: UpdatePacketCallback,
+        done: threading.Event,
+        failed: threading.Event,
+    ) -> None:
+        receive = client.recv_UDP_ENIP_CIP_IO
+        if self._drain_receive:
+            # Under load only the newest queued TO frame is worth decoding.
+            receive = getattr(client, "recv_latest_UDP_ENIP_CIP_IO", receive)
+
+        self._tune_thread("receive", client)
+        watchdog = self.watchdog = ConnectionWatchdog(
+            connection_timeout(client), on_timeout=self._on_connection_timeout
+        )
+        watchdog.start()
+
+        # Compiled TO views are refilled in place rather than created per frame.
+        views: Optional[ViewBuffers] = None
+        views_class: Optional[Type[Any]] = None
+        profiler: Optional[CycleProfiler] = None
+        timer: Optional[StageTimer] = None
+        try:
+            while not done.is_set() and not self._stop_event.is_set():
+                if self.profiler is not profiler:
+                    profiler, timer = self._switch_profiler(profiler, client, "receive_stage_timer")
+                elif timer is not None:
+                    timer.restart()
+                # The client laps the wait, receive and ENIP decode stages.
+                pkg_cip_io = receive(self._debug_cip_frames, min(watchdog.remaining(), _RECEIVE_TIMEOUT))
+
+                if pkg_cip_io is None:
+                    if done.is_set() or self._stop_event.is_set():
+                        break  # the target went quiet because we stopped sending
+                    if watchdog.check():
+                        failed.set()
+                        done.set()
+                        return
+                    continue
+                watchdog.feed()
+
+                payload = getattr(pkg_cip_io, "payload", b"")
+                if not isinstance(payload, (bytes, bytearray, memoryview)):
+                    payload = bytes(payload)
+                if not len(payload):
+                    logger.debug("Received CIP IO packet with empty payload; retrying")
+                    continue
+
+                try:
+                    if timer is not None:
+                        timer.restart()
+                    with self._lock:
+                        packet_class = self._to_packet_class
+                        if packet_class is not views_class:
+                            views, views_class = _view_buffers(packet_class), packet_class
+                        if views is not None:
+                            to_packet = views.load(payload)
+                        else:
+                            to_packet = packet_class(bytes(payload))
+                    if timer is not None:
+                        timer.lap("to_decode")
+                    update_to_packet(to_packet)
+                    if timer is not None:
+                        timer.lap("update_to_packet")
+                except Exception:
+                    logger.exception("Unable to parse TO packet from CIP IO payload")
+                    failed.set()
+                    done.set()
+                    return
+        finally:
+            if profiler is not None:
+                profiler.release()
+                client.receive_stage_timer = None
 
-        while not error_occurred and not self._stop_event.is_set():
-            pkg_cip_io = client.recv_UDP_ENIP_CIP_IO(self._debug_cip_frames, 0.5)
+    def _frame_observed(
+        self,
+        connection_id: Optional[int],
+        sequence: Optional[int],
+        cip_sequence_count: Optional[int],
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Account for every received frame, including those a drained receive skips.
 
-            if pkg_cip_io is None:
-                logger.debug("No CIP IO packet received; retrying")
-                continue
+        The client calls this with the counters and kernel timestamp of each
+        datagram it reads, so TO arrivals are timed when they reached the
+        host rather than when the newest of them was decoded.
+        """
 
-            payload_bytes = bytes(getattr(pkg_cip_io, "payload", b""))
-            if not payload_bytes:
-                logger.debug("Received CIP IO packet with empty payload; retrying")
-                continue
+        tracker = self.sequence_tracker
+        if tracker is not None:
+            tracker.observe(connection_id, sequence, cip_sequence_count, timestamp)
+        timing = self.timing
+        if timing is not None and (not timing.to_connection_id or connection_id in (None, timing.to_connection_id)):
+            timing.frame_received(_arrival_time(timestamp), kernel=timestamp is not None)
 
-            try:
-                with self._lock:
-                    to_packet = to_packet_class(payload_bytes)
-                update_to_packet(to_packet)
-            except Exception:
-                logger.exception("Unable to parse TO packet from CIP IO payload")
-                error_occurred = True
-                break
-
-            if mpu_alive >= 255:
-                mpu_alive = 0
-            else:
-                mpu_alive += 1
 
-            try:
-                heartbeat_callback("MPU_CTCMSAlive", mpu_alive)
-            except Exception:
-                logger.exception("Heartbeat callback failed")
-                error_occurred = True
-                break
+def _watch_commits(ot_packet: Any, listener: Optional[Callable[[], None]]) -> None:
+    set_listener = getattr(ot_packet, "set_commit_listener", None)
+    if set_listener is not None:
+        set_listener(listener)
 
-            ot_packet.MPU_CDateTimeSec = calendar.timegm(time.gmtime())
 
-            try:
-                client.send_UDP_ENIP_CIP_IO(
-                    CIP_Sequence_Count=cip_app_counter,
-                    Header=1,
-                    AppData=ot_packet,
-                )
-            except Exception:
-                logger.exception("Failed to send CIP IO packet")
-                error_occurred = True
-                break
+def _arrival_time(timestamp: Optional[float]) -> float:
+    """Return the monotonic arrival time of a frame with kernel wall-clock ``timestamp``.
 
-            if cip_app_counter < 65535:
-                cip_app_counter += 1
-            else:
-                cip_app_counter = 0
+    Without a kernel timestamp the frame is taken to arrive now.
+    """
+
+    now = time.monotonic()
+    if timestamp is None:
+        return now
+    return now - max(time.time() - timestamp, 0.0)
+
+
+def _view_buffers(packet_class: Type[Any]) -> Optional[ViewBuffers]:
+    if isinstance(packet_class, type) and issubclass(packet_class, AssemblyView):
+        return ViewBuffers(packet_class)
+    return None
+
+
+def negotiated_rpi(client: Client) -> float:
+    """Return the O->T packet interval granted to ``client``, in seconds."""
+
+    api = getattr(client, "ot_api", None)
+    if isinstance(api, int) and api > 0:
+        return api / 1_000_000
+    return DEFAULT_RPI
+
+
+def _to_interval(client: Client) -> float:
+    api = getattr(client, "to_api", None)
+    return api / 1_000_000 if isinstance(api, int) and api > 0 else DEFAULT_RPI
+
+
+def connection_timeout(client: Client) -> float:
+    """Return the T->O inactivity timeout of ``client``'s connection, in seconds.
+
+    This is the granted T->O packet interval times the forward open timeout
+    multiplier.
+    """
 
-        return error_occurred
+    return _to_interval(client) * timeout_multiplier(getattr(client, "connection_timeout_multiplier", 0))
 
 
 __all__ = [
+    "AssemblySwap",
     "CIPSession",
     "ConnectionParameters",
+    "connection_timeout",
+    "negotiated_rpi",
 ]
@@ -0,0 +1,383 @@
+"""Cycle timing and sequence statistics for CIP IO connections.
+
+:class:`TimingHistogram` is a fixed-bucket, log-linear histogram in the
+style of HdrHistogram: values are recorded in microseconds into buckets
+whose width grows with the magnitude of the value, so every recorded value
+is kept with a relative error below 2 % and an update is a couple of integer
+operations.  :class:`ConnectionTiming` groups the histograms the IO loop
+records for one connection.  :class:`SequenceTracker` checks the ENIP and
+CIP sequence counters of received frames for loss, duplicates and
+reordering.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Sub-buckets per power of two; 2**-(_SUB_BUCKET_BITS - 1) is the precision.
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKET_MASK = (1 << _SUB_BUCKET_BITS) - 1
+# Longest recordable interval; longer ones are clamped to it.
+MAX_TRACKED_SECONDS = 60.0
+
+REPORTED_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def _bucket_index(micros: int) -> int:
+    magnitude = micros.bit_length() - _SUB_BUCKET_BITS
+    if magnitude <= 0:
+        return micros
+    return (magnitude << _SUB_BUCKET_BITS) + (micros >> magnitude)
+
+
+def _bucket_upper(index: int) -> int:
+    magnitude = index >> _SUB_BUCKET_BITS
+    sub_bucket = index & _SUB_BUCKET_MASK
+    if magnitude == 0:
+        return sub_bucket
+    return ((sub_bucket + 1) << magnitude) - 1
+
+
+_MAX_MICROS = int(MAX_TRACKED_SECONDS * 1_000_000)
+_BUCKETS = _bucket_index(_MAX_MICROS) + 1
+
+
+class TimingHistogram:
+    """Histogram of durations with constant-time :meth:`record`.
+
+    ``nominal`` is the expected duration, in seconds; the largest deviation
+    from it is tracked as :attr:`max_jitter`.
+    """
+
+    __slots__ = ("name", "nominal", "count", "min", "max", "total", "max_jitter", "_counts")
+
+    def __init__(self, name: str, nominal: Optional[float] = None) -> None:
+        self.name = name
+        self.nominal = nominal
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.min = 0.0
+        self.max = 0.0
+        self.total = 0.0
+        self.max_jitter = 0.0
+        self._counts = [0] * _BUCKETS
+
+    def record(self, seconds: float) -> None:
+        micros = int(seconds * 1_000_000)
+        if micros < 0:
+            micros = 0
+        elif micros > _MAX_MICROS:
+            micros = _MAX_MICROS
+        self._counts[_bucket_index(micros)] += 1
+
+        if self.count == 0 or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.count += 1
+        self.total += seconds
+        if self.nominal is not None:
+            jitter = abs(seconds - self.nominal)
+            if jitter > self.max_jitter:
+                self.max_jitter = jitter
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentiles(self, percentiles: Iterable[float] = REPORTED_PERCENTILES) -> Dict[float, float]:
+        """Return the value at or below which each percentile of samples fall, in seconds.
+
+        Values are the upper bound of the matching bucket, capped to :attr:`max`.
+        """
+
+        wanted = sorted(percentiles)
+        result: Dict[float, float] = {}
+        if not self.count:
+            return {percentile: 0.0 for percentile in wanted}
+
+        targets = [(percentile, max(1, -(-self.count * percentile // 100))) for percentile in wanted]
+        position = 0
+        cumulative = 0
+        for index, bucket_count in enumerate(self._counts):
+            if not bucket_count:
+                continue
+            cumulative += bucket_count
+            while position < len(targets) and cumulative >= targets[position][1]:
+                result[targets[position][0]] = min(_bucket_upper(index) / 1_000_000, self.max)
+                position += 1
+            if position == len(targets):
+                break
+        return result
+
+    def summary(self) -> Dict[str, float]:
+        data: Dict[str, float] = {
+            "count": self.count,
+            "min": self.min,
+            "mean": self.mean,
+            "max": self.max,
+            "max_jitter": self.max_jitter,
+        }
+        for percentile, value in self.percentiles().items():
+            data[f"p{percentile:g}"] = value
+        return data
+
+
+@dataclass
+class ConnectionTiming:
+    """Timing histograms of one CIP IO connection.
+
+    * ``to_interarrival``: time between consecutive received TO frames.
+    * ``turnaround``: time from a TO frame to the next OT frame sent.
+    * ``ot_interdeparture``: time between consecutive sent OT frames.
+
+    ``kernel_timestamped`` counts the TO frames whose arrival time came from
+    the kernel receive timestamp rather than from the receiving thread.
+    """
+
+    ot_connection_id: int = 0
+    to_connection_id: int = 0
+    ot_rpi: Optional[float] = None
+    to_rpi: Optional[float] = None
+    to_interarrival: TimingHistogram = field(init=False)
+    turnaround: TimingHistogram = field(init=False)
+    ot_interdeparture: TimingHistogram = field(init=False)
+    deadline_misses: int = 0
+    kernel_timestamped: int = 0
+    _last_receive: Optional[float] = field(default=None, init=False, repr=False)
+    _pending_turnaround: bool = field(default=False, init=False, repr=False)
+    _last_send: Optional[float] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.to_interarrival = TimingHistogram("TO inter-arrival", self.to_rpi)
+        self.turnaround = TimingHistogram("Receive-to-send turnaround")
+        self.ot_interdeparture = TimingHistogram("OT inter-departure", self.ot_rpi)
+
+    @property
+    def histograms(self) -> Tuple[TimingHistogram, TimingHistogram, TimingHistogram]:
+        return self.to_interarrival, self.turnaround, self.ot_interdeparture
+
+    def frame_received(self, now: float, *, kernel: bool = False) -> None:
+        """Record a TO frame received at monotonic time ``now``.
+
+        ``kernel`` tells that ``now`` was derived from a kernel timestamp.
+        """
+
+        if kernel:
+            self.kernel_timestamped += 1
+        last = self._last_receive
+        if last is not None:
+            self.to_interarrival.record(now - last)
+        self._last_receive = now
+        self._pending_turnaround = True
+
+    def frame_sent(self, now: float) -> None:
+        """Record an OT frame sent at monotonic time ``now``."""
+
+        last = self._last_send
+        if last is not None:
+            self.ot_interdeparture.record(now - last)
+        self._last_send = now
+        if self._pending_turnaround:
+            self._pending_turnaround = False
+            received = self._last_receive
+            if received is not None:
+                self.turnaround.record(now - received)
+
+    def report(self) -> Dict[str, object]:
+        """Return a plain-data snapshot suitable for display or JSON."""
+
+        return {
+            "ot_connection_id": self.ot_connection_id,
+            "to_connection_id": self.to_connection_id,
+            "ot_rpi": self.ot_rpi,
+            "to_rpi": self.to_rpi,
+            "deadline_misses": self.deadline_misses,
+            "kernel_timestamped": self.kernel_timestamped,
+            "to_interarrival": self.to_interarrival.summary(),
+            "turnaround": self.turnaround.summary(),
+            "ot_interdeparture": self.ot_interdeparture.summary(),
+        }
+
+
+def format_rows(timing: ConnectionTiming) -> List[List[str]]:
+    """Render ``timing`` as table rows in milliseconds."""
+
+    rows: List[List[str]] = []
+    for histogram in timing.histograms:
+        summary = histogram.summary()
+        rows.append(
+            [histogram.name, str(histogram.count)]
+            + [f"{summary[f'p{percentile:g}'] * 1e3:.3f}" for percentile in REPORTED_PERCENTILES]
+            + [f"{histogram.max * 1e3:.3f}", f"{histogram.max_jitter * 1e3:.3f}" if histogram.nominal else "-"]
+        )
+    return rows
+
+
+_ENIP_SEQUENCE_MODULO = 1 << 32
+_CIP_SEQUENCE_MODULO = 1 << 16
+
+# Kinds of :class:`SequenceAnomaly`.
+GAP = "gap"
+DUPLICATE = "duplicate"
+OUT_OF_ORDER = "out_of_order"
+CIP_GAP = "cip_gap"
+CIP_OUT_OF_ORDER = "cip_out_of_order"
+
+
+@dataclass(frozen=True)
+class SequenceAnomaly:
+    """One irregularity in the sequence counters of a connection.
+
+    ``timestamp`` is wall-clock time, to line up with captures and logs.
+    """
+
+    timestamp: float
+    connection_id: int
+    kind: str
+    expected: int
+    received: int
+
+
+@dataclass
+class SequenceCounters:
+    """Running totals for one connection."""
+
+    frames: int = 0
+    lost: int = 0
+    duplicates: int = 0
+    out_of_order: int = 0
+    cip_gaps: int = 0
+    cip_out_of_order: int = 0
+
+
+class _ConnectionSequence:
+    __slots__ = ("counters", "sequence", "cip_sequence_count")
+
+    def __init__(self, sequence: int, cip_sequence_count: Optional[int]) -> None:
+        self.counters = SequenceCounters(frames=1)
+        self.sequence = sequence
+        self.cip_sequence_count = cip_sequence_count
+
+
+class SequenceTracker:
+    """Track the counters of received frames per connection.
+
+    The 32-bit ENIP sequence number increases with every frame, so a jump
+    means frames were lost, a repeat is a duplicate and a step back is a frame
+    arriving out of order (which is then no longer counted as lost).  The
+    16-bit CIP sequence count only increases when the producer has new data;
+    it must never go back, and it may not advance further than the ENIP
+    sequence does.  The last ``history`` anomalies are kept.
+    """
+
+    def __init__(self, history: int = 64, *, clock: Callable[[], float] = time.time) -> None:
+        self._connections: Dict[int, _ConnectionSequence] = {}
+        self._anomalies: Deque[SequenceAnomaly] = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def observe(
+        self,
+        connection_id: Optional[int],
+        sequence: Optional[int],
+        cip_sequence_count: Optional[int],
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Record a frame; frames without a sequenced address are ignored.
+
+        ``timestamp`` is the kernel receive time of the frame, if known, and
+        dates any anomaly it reveals instead of the tracker's clock.
+        """
+
+        if connection_id is None or sequence is None:
+            return
+        state = self._connections.get(connection_id)
+        if state is None:
+            self._connections[connection_id] = _ConnectionSequence(sequence, cip_sequence_count)
+            return
+
+        counters = state.counters
+        counters.frames += 1
+        delta = (sequence - state.sequence) % _ENIP_SEQUENCE_MODULO
+        if delta == 0:
+            counters.duplicates += 1
+            self._report(timestamp, connection_id, DUPLICATE, (state.sequence + 1) % _ENIP_SEQUENCE_MODULO, sequence)
+            return
+        if delta >= _ENIP_SEQUENCE_MODULO // 2:
+            counters.out_of_order += 1
+            if counters.lost:
+                counters.lost -= 1
+            self._report(timestamp, connection_id, OUT_OF_ORDER, (state.sequence + 1) % _ENIP_SEQUENCE_MODULO, sequence)
+            return
+
+        expected = (state.sequence + 1) % _ENIP_SEQUENCE_MODULO
+        if delta > 1:
+            counters.lost += delta - 1
+            self._report(timestamp, connection_id, GAP, expected, sequence)
+        state.sequence = sequence
+
+        previous_count = state.cip_sequence_count
+        state.cip_sequence_count = cip_sequence_count
+        if previous_count is None or cip_sequence_count is None:
+            return
+        cip_delta = (cip_sequence_count - previous_count) % _CIP_SEQUENCE_MODULO
+        if cip_delta >= _CIP_SEQUENCE_MODULO // 2:
+            counters.cip_out_of_order += 1
+            self._report(timestamp, connection_id, CIP_OUT_OF_ORDER, previous_count, cip_sequence_count)
+        elif cip_delta > delta:
+            counters.cip_gaps += 1
+            self._report(timestamp, connection_id, CIP_GAP, (previous_count + delta) % _CIP_SEQUENCE_MODULO, cip_sequence_count)
+
+    def _report(self, timestamp: Optional[float], connection_id: int, kind: str, expected: int, received: int) -> None:
+        if timestamp is None:
+            timestamp = self._clock()
+        with self._lock:
+            self._anomalies.append(SequenceAnomaly(timestamp, connection_id, kind, expected, received))
+
+    def counters(self) -> Dict[int, SequenceCounters]:
+        """Return a copy of the totals of every connection seen."""
+
+        return {connection_id: SequenceCounters(**asdict(state.counters)) for connection_id, state in list(self._connections.items())}
+
+    def anomalies(self) -> List[SequenceAnomaly]:
+        """Return the recent anomalies, oldest first."""
+
+        with self._lock:
+            return list(self._anomalies)
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "connections": {connection_id: asdict(counters) for connection_id, counters in self.counters().items()},
+            "anomalies": [asdict(anomaly) for anomaly in self.anomalies()],
+        }
+
+
+FORMAT_HEADERS = ["Metric", "Samples"] + [f"p{percentile:g} (ms)" for percentile in REPORTED_PERCENTILES] + [
+    "Max (ms)",
+    "Max jitter (ms)",
+]
+
+
+__all__ = [
+    "CIP_GAP",
+    "CIP_OUT_OF_ORDER",
+    "ConnectionTiming",
+    "DUPLICATE",
+    "FORMAT_HEADERS",
+    "GAP",
+    "MAX_TRACKED_SECONDS",
+    "OUT_OF_ORDER",
+    "REPORTED_PERCENTILES",
+    "SequenceAnomaly",
+    "SequenceCounters",
+    "SequenceTracker",
+    "TimingHistogram",
+    "format_rows",
+]
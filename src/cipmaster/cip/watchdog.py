@@ -0,0 +1,114 @@
+"""Inactivity watchdog for the consumed side of a CIP IO connection.
+
+A class 1 connection times out when no frame arrives for the requested
+packet interval multiplied by the connection timeout multiplier of the
+forward open.  Until the first frame arrives the watchdog uses a longer
+initial timeout, so that a target that needs time to start producing is not
+dropped straight away.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+Clock = Callable[[], float]
+TimeoutCallback = Callable[[float], None]
+
+# Inactivity timeout used until the first frame of a new connection.
+INITIAL_TIMEOUT = 10.0
+
+
+def timeout_multiplier(code: int) -> int:
+    """Return the factor encoded by a forward open timeout multiplier ``code``."""
+
+    if not 0 <= code <= 7:
+        raise ValueError(f"connection timeout multiplier must be 0-7, got {code}")
+    return 4 << code
+
+
+class ConnectionWatchdog:
+    """Declare a connection timed out after ``timeout`` seconds of silence.
+
+    The first expiry sets :attr:`timed_out`, records the silence that
+    triggered it in :attr:`timeout_gap` and calls ``on_timeout`` with it.
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        *,
+        initial_timeout: Optional[float] = None,
+        on_timeout: Optional[TimeoutCallback] = None,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        if timeout <= 0:
+            raise ValueError(f"timeout must be positive, got {timeout}")
+        self.timeout = timeout
+        self.initial_timeout = max(timeout, INITIAL_TIMEOUT if initial_timeout is None else initial_timeout)
+        self.on_timeout = on_timeout
+        self.timed_out = threading.Event()
+        self.timeout_gap: Optional[float] = None
+        self.max_gap = 0.0
+        self.frames = 0
+        self._clock = clock
+        self._last = clock()
+        self._deadline = self._last + self.initial_timeout
+
+    def start(self) -> None:
+        """Arm the watchdog for a newly opened connection."""
+
+        self._last = self._clock()
+        self._deadline = self._last + self.initial_timeout
+        self.frames = 0
+        self.max_gap = 0.0
+        self.timeout_gap = None
+        self.timed_out.clear()
+
+    def feed(self) -> None:
+        """Record a frame received now."""
+
+        now = self._clock()
+        if self.frames:
+            gap = now - self._last
+            if gap > self.max_gap:
+                self.max_gap = gap
+        self.frames += 1
+        self._last = now
+        self._deadline = now + self.timeout
+
+    def remaining(self) -> float:
+        """Seconds until the connection times out, never negative."""
+
+        return max(self._deadline - self._clock(), 0.0)
+
+    def check(self) -> bool:
+        """Return whether the connection has timed out, reporting it once."""
+
+        if self.timed_out.is_set():
+            return True
+        now = self._clock()
+        if now < self._deadline:
+            return False
+
+        gap = now - self._last
+        self.timeout_gap = gap
+        self.timed_out.set()
+        logger.error("CIP connection timed out: no TO frame for %.1f ms (timeout %.1f ms)", gap * 1e3, self.timeout * 1e3)
+        if self.on_timeout is not None:
+            try:
+                self.on_timeout(gap)
+            except Exception:
+                logger.exception("Connection timeout callback failed")
+        return True
+
+
+__all__ = [
+    "ConnectionWatchdog",
+    "INITIAL_TIMEOUT",
+    "timeout_multiplier",
+]
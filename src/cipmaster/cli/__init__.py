@@ -2,12 +2,31 @@
 
 from __future__ import annotations
 
+import dataclasses
+import json
+from typing import Tuple
+
 import click
+from tabulate import tabulate
+
+from cipmaster.cip import batch as cip_batch
+from cipmaster.cip import catalog as cip_catalog
+from cipmaster.cip import config as cip_config
+from cipmaster.cip import realtime as cip_realtime
 
 from .app import CIPCLI, RunConfiguration, main as _app_main
 
 
-@click.command()
+def _cpu_list(ctx: click.Context, param: click.Parameter, value: str | None):
+    if value is None:
+        return None
+    try:
+        return cip_realtime.parse_cpu_list(value)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc)) from exc
+
+
+@click.group(invoke_without_command=True)
 @click.option("--auto-continue", type=bool, default=None, help="Skip the confirmation prompt when starting the CLI.")
 @click.option("--cip-filename", type=str, default=None, help="CIP configuration file to load on start.")
 @click.option("--target-ip", type=str, default=None, help="Target IP address for communication tests.")
@@ -18,23 +37,173 @@ from .app import CIPCLI, RunConfiguration, main as _app_main
     default=None,
     help="Override automatic network configuration enablement.",
 )
+@click.option(
+    "--kernel-timestamps",
+    type=bool,
+    default=None,
+    help="Time received TO frames with kernel receive timestamps (SO_TIMESTAMPNS).",
+)
+@click.option("--io-cpus", type=str, default=None, callback=_cpu_list, help="Pin the IO threads to these CPUs, e.g. '2,3' or '2-3'.")
+@click.option(
+    "--io-fifo-priority",
+    type=click.IntRange(1, 99),
+    default=None,
+    help="Run the IO threads with SCHED_FIFO at this priority when permitted.",
+)
+@click.option(
+    "--busy-poll",
+    type=click.IntRange(min=0),
+    default=None,
+    help="SO_BUSY_POLL time in microseconds for the multicast socket.",
+)
+@click.option(
+    "--io-process",
+    type=bool,
+    default=None,
+    help="Run the cyclic IO in a separate process, exchanging assemblies through shared memory.",
+)
+@click.option(
+    "--reconnect",
+    type=bool,
+    default=None,
+    help="Reconnect automatically with exponential backoff when the CIP connection is lost.",
+)
+@click.option(
+    "--change-of-state",
+    type=click.FloatRange(min=0),
+    default=None,
+    metavar="INHIBIT_MS",
+    help="Also send the OT frame whenever a value is set, at most once per INHIBIT_MS milliseconds.",
+)
+@click.pass_context
 def main(
+    ctx: click.Context,
     auto_continue: bool | None,
     cip_filename: str | None,
     target_ip: str | None,
     multicast_address: str | None,
     enable_network: bool | None,
+    kernel_timestamps: bool | None,
+    io_cpus: frozenset[int] | None,
+    io_fifo_priority: int | None,
+    busy_poll: int | None,
+    io_process: bool | None,
+    reconnect: bool | None,
+    change_of_state: float | None,
 ) -> None:
     """Invoke the interactive CIP master CLI."""
 
+    if ctx.invoked_subcommand is not None:
+        return
+
     configuration = RunConfiguration(
         auto_continue=auto_continue,
         cip_filename=cip_filename,
         target_ip=target_ip,
         multicast_address=multicast_address,
         enable_network=enable_network,
+        kernel_timestamps=kernel_timestamps,
+        io_cpus=io_cpus,
+        io_fifo_priority=io_fifo_priority,
+        busy_poll=busy_poll,
+        io_process=io_process,
+        reconnect=reconnect,
+        change_of_state=change_of_state,
     )
     _app_main(config=configuration)
 
 
+def _format_line(result: cip_batch.FileValidation) -> str:
+    if result.ok:
+        return f"OK      {result.path}"
+    reasons = [result.error] if result.error else [f"{name}: {status}" for name, status in result.failures]
+    return f"FAILED  {result.path}  ({'; '.join(reasons) or 'unknown failure'})"
+
+
+@main.command()
+@click.argument("paths", nargs=-1, type=click.Path(exists=True))
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=None, help="Worker processes (default: CPU count).")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "jsonl"]),
+    default="table",
+    show_default=True,
+    help="Emit one table line or one JSON object per file.",
+)
+@click.option("--recursive", "-r", is_flag=True, help="Search directories recursively for XML files.")
+def validate(paths: Tuple[str, ...], jobs: int | None, output_format: str, recursive: bool) -> None:
+    """Validate CIP XML files in PATHS, or the packaged configurations.
+
+    Results are streamed as each file completes.  The command exits with
+    status 1 when any file fails validation.
+    """
+
+    if paths:
+        files = list(cip_batch.iter_xml_files(paths, recursive=recursive))
+    else:
+        files = sorted(cip_config.get_available_config_files().values())
+    if not files:
+        raise click.UsageError("No XML configuration files found.")
+
+    failed = 0
+    for result in cip_batch.validate_files(files, jobs=jobs):
+        failed += not result.ok
+        if output_format == "jsonl":
+            click.echo(json.dumps(result.to_dict()))
+        else:
+            click.echo(_format_line(result))
+
+    if output_format == "table":
+        click.echo(f"{len(files) - failed}/{len(files)} configuration files passed validation.")
+    if failed:
+        raise click.exceptions.Exit(1)
+
+
+@main.command()
+@click.argument("pattern")
+@click.option(
+    "--dir",
+    "directories",
+    multiple=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="Additional directory of XML files to include (searched recursively).",
+)
+@click.option("--no-refresh", is_flag=True, help="Query the catalog without checking files for changes.")
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Maximum number of matches to show.")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "jsonl"]),
+    default="table",
+    show_default=True,
+    help="Emit a table or one JSON object per match.",
+)
+def find(pattern: str, directories: Tuple[str, ...], no_refresh: bool, limit: int | None, output_format: str) -> None:
+    """Find the configuration files that declare signals matching PATTERN.
+
+    PATTERN is a signal id, a substring of one, or a glob such as 'BCHi_*'.
+    The catalog is refreshed incrementally before each query.
+    """
+
+    with cip_catalog.SignalCatalog() as catalog:
+        if not no_refresh:
+            files = list(cip_config.get_available_config_files().values())
+            files.extend(cip_batch.iter_xml_files(directories, recursive=True))
+            # Keep what earlier '--dir' scans indexed elsewhere.
+            roots = [*cip_config.iter_config_directories(), *directories]
+            catalog.refresh(files, roots=roots)
+        matches = catalog.find(pattern, limit=limit)
+
+    if output_format == "jsonl":
+        for match in matches:
+            click.echo(json.dumps(dataclasses.asdict(match)))
+    elif matches:
+        rows = [[m.name, m.path, m.assembly, m.offset, m.type, m.length, m.problem or ""] for m in matches]
+        click.echo(tabulate(rows, headers=["Signal", "File", "Assembly", "Offset", "Type", "Length", "Problem"]))
+    if not matches:
+        click.echo(f"No signal matches '{pattern}'.", err=True)
+        raise click.exceptions.Exit(1)
+
+
 __all__ = ["CIPCLI", "RunConfiguration", "main"]
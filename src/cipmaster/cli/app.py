@@ -9,11 +9,18 @@ import logging
 from datetime import datetime
 import binascii
 from dataclasses import dataclass
-from typing import Any, Optional
+from pathlib import Path
+from typing import Any, FrozenSet, Optional
 
 from cipmaster.cip import config as cip_config
 from cipmaster.cip import fields as cip_fields
 from cipmaster.cip import network as cip_network
+from cipmaster.cip import process as cip_process
+from cipmaster.cip import profiler as cip_profiler
+from cipmaster.cip import realtime as cip_realtime
+from cipmaster.cip import reconnect as cip_reconnect
+from cipmaster.cip import reload as cip_reload
+from cipmaster.cip import stats as cip_stats
 from cipmaster.cip.ui import ClickUserInterface, UserInterface
 from cipmaster.cli.ui_helpers import CLIUIHelpers
 from cipmaster.services.config_loader import ConfigLoaderService
@@ -34,6 +41,8 @@ logging.basicConfig(
 
 ENABLE_NETWORK = True
 DEBUG_CIP_FRAMES=bool(False)
+# Field codecs whose signals can be driven by the wave commands.
+FLOAT_CODECS = ("float", "double")
 
 
 @dataclass
@@ -45,6 +54,13 @@ class RunConfiguration:
     target_ip: Optional[str] = None
     multicast_address: Optional[str] = None
     enable_network: Optional[bool] = None
+    kernel_timestamps: Optional[bool] = None
+    io_cpus: Optional[FrozenSet[int]] = None
+    io_fifo_priority: Optional[int] = None
+    busy_poll: Optional[int] = None
+    io_process: Optional[bool] = None
+    reconnect: Optional[bool] = None
+    change_of_state: Optional[float] = None
 
 
 class CIPCLI:
@@ -100,11 +116,20 @@ class CIPCLI:
         
         self.bCIPErrorOccured = bool(False)
         self.TO_packet_class = None
+        self.TO_view_class = None
         self.OT_packet_class = None
         self.xml = None
         self.ot_eo_assemblies = None
         self.to_assemblies = None
-        self.session = self.sessions.create_session(lock=self.lock, debug_cip_frames=DEBUG_CIP_FRAMES)
+        self.assemblies = None
+        self.ot_info = None
+        self.to_info = None
+        self.config_watcher = None
+        self.session = self.sessions.create_session(
+            lock=self.lock,
+            debug_cip_frames=DEBUG_CIP_FRAMES,
+            on_connection_timeout=self._on_connection_timeout,
+        )
 
 
 
@@ -216,35 +241,85 @@ class CIPCLI:
         self.overall_cip_valid = validation.overall_status
         self.cip_test_flag = validation.overall_status
         self.root = validation.root
-        self.ot_eo_assemblies = validation.ot_info.assembly if validation.ot_info else None
-        self.to_assemblies = validation.to_info.assembly if validation.to_info else None
+        self.assemblies = validation.assemblies
+        self.cip_xml_path = xml_filepath
+        self._use_assemblies(validation.ot_info, validation.to_info)
+
+        table = tabulate(validation.results, headers=["Test Case", "Status"], tablefmt="fancy_grid")
+        self.echo(table)
+        self.echo("")
 
-        if validation.ot_info and validation.ot_info.packet_class is not None:
-            self.OT_packet_class = validation.ot_info.packet_class
-            self.OT_packet = self.OT_packet_class()
-            expected = validation.ot_info.assembly_size // 8
+        if not validation.overall_status:
+            self.echo("Some tests failed. Restarting CIP Tool.")
+
+        return validation.overall_status
+
+    def _use_assemblies(self, ot_info, to_info):
+        """Build the codecs of the OT and TO assemblies the next 'start' connects."""
+        self.ot_info = ot_info
+        self.to_info = to_info
+        self.ot_eo_assemblies = ot_info.assembly if ot_info else None
+        self.to_assemblies = to_info.assembly if to_info else None
+
+        if ot_info and ot_info.packet_class is not None:
+            self.OT_packet_class = ot_info.packet_class
+            self.OT_packet = ot_info.compiled.new_encoder()
+            expected = ot_info.assembly_size // 8
             self.echo(f"Length of OT Assembly Expected: {expected}")
             self.echo(f"Length of OT Assembly Formed: {len(self.OT_packet)}")
         else:
             self.OT_packet_class = None
 
-        if validation.to_info and validation.to_info.packet_class is not None:
-            self.TO_packet_class = validation.to_info.packet_class
-            self.TO_packet = self.TO_packet_class()
-            expected = validation.to_info.assembly_size // 8
+        if to_info and to_info.packet_class is not None:
+            self.TO_packet_class = to_info.packet_class
+            self.TO_view_class = to_info.compiled.view_class
+            self.TO_packet = self.TO_view_class()
+            expected = to_info.assembly_size // 8
             self.echo(f"Length of TO Assembly Expected: {expected}")
             self.echo(f"Length of TO Assembly Formed: {len(self.TO_packet)}")
         else:
             self.TO_packet_class = None
+            self.TO_view_class = None
 
-        table = tabulate(validation.results, headers=["Test Case", "Status"], tablefmt="fancy_grid")
-        self.echo(table)
-        self.echo("")
+    def select_assemblies(self, ot_key=None, to_key=None):
+        """List the assemblies of the configuration, or connect another OT/TO pair on the next 'start'."""
+        self.logger.info("Executing select_assemblies function")
+        if not self.assemblies:
+            self.echo("No CIP configuration loaded. Run 'cip_config' first.")
+            return False
 
-        if not validation.overall_status:
-            self.echo("Some tests failed. Restarting CIP Tool.")
+        if ot_key is None:
+            current = {self.ot_info, self.to_info}
+            rows = [
+                [
+                    info.id,
+                    info.subtype,
+                    f"0x{info.instance:x}" if info.instance is not None else "-",
+                    info.assembly_size // 8,
+                    "*" if info in current else "",
+                ]
+                for info in self.assemblies.values()
+            ]
+            self.echo(tabulate(rows, headers=["Assembly", "Subtype", "Instance", "Bytes", "Selected"], tablefmt="fancy_grid"))
+            return True
 
-        return validation.overall_status
+        if self.session.running:
+            self.echo("Stop the communication before selecting other assemblies.")
+            return False
+        ot_info = self.assemblies.resolve(ot_key, "OT_EO")
+        to_info = self.assemblies.resolve(to_key, "TO")
+        for key, info, subtype in ((ot_key, ot_info, "OT_EO"), (to_key, to_info, "TO")):
+            if info is None:
+                self.echo(f"No {subtype} assembly with signals matches '{key}'.")
+                return False
+            if info.layout.errors:
+                self.echo(f"Assembly {info.id} has layout errors: {'; '.join(info.layout.errors)}")
+                return False
+
+        self.stop_all_thread()
+        self._use_assemblies(ot_info, to_info)
+        self.echo(f"Selected OT assembly {ot_info.id} and TO assembly {to_info.id}.")
+        return True
 
     def config_network(
         self,
@@ -327,6 +402,11 @@ class CIPCLI:
             ("get <name>", "Get the current value of a field"),
             ("frame", "Print the packet header and payload"),
             ("fields", "Display the field names"),
+            ("assembly [<ot_id> <to_id>]", "List the assemblies or select the OT/TO pair to connect"),
+            ("stats", "Show cycle timing statistics of the connection"),
+            ("profile start [cprofile|stacks]", "Profile the stages of each IO cycle"),
+            ("profile stop", "Stop profiling the IO cycle"),
+            ("profile dump [path]", "Show per-stage timings and write the cProfile or stack file"),
             ("wave <name> <max_val> <min_val> <period(ms)>", "Wave a field value"),
             ("stop_wave <name>", "Stop waving for a field value"),
             ("tria <name> <max_val> <min_val> <period(ms)>", "Wave a field value with a triangular waveform"),
@@ -370,15 +450,11 @@ class CIPCLI:
     ###-------------------------------------------------------------###
     
     def MPU_heartbeat(self, field_name,field_value):
-        self.logger.info("MPU_HeartBeat function executing")
-        self.logger.info(f"field name:{field_name}")
-        self.logger.info(f"field value:{field_value}")
-        
-        if hasattr(self.OT_packet,field_name):
-            field = getattr(self.OT_packet.__class__, field_name)
-            if isinstance(field, scapy_all.ByteField):
+        # Called every OT cycle: no per-call log records or formatting.
+        spec = cip_fields.field_table(self.OT_packet).get(field_name)
+        if spec is not None:
+            if isinstance(spec.field, scapy_all.ByteField):
                     setattr(self.OT_packet, field_name, field_value)
-                    self.logger.info("MPU_HeartBeat set")
             else:
                 self.logger.warning("Heartbeat is not ByteField type")
         else:
@@ -418,31 +494,23 @@ class CIPCLI:
     def set_field(self, field_name, field_value):
         self.logger.info("Executing set_field function")
         self.stop_wave(field_name)
+        # Holding the lock keeps a hot-reload swap from replacing the encoder under the write.
         self.lock.acquire()
         try:
-            if not hasattr(self.OT_packet, field_name):
+            spec = cip_fields.field_table(self.OT_packet).get(field_name)
+            if spec is None:
                 self.write(f"Field {field_name} not found.")
                 return
 
-            field = getattr(self.OT_packet.__class__, field_name)
-            metadata = cip_fields.get_field_metadata(self.OT_packet, field_name)
-            codec = cip_fields.get_field_codec(field)
-            if codec is None:
-                validation = cip_fields.describe_validation(field, packet=self.OT_packet, metadata=metadata)
-                field_type = validation.get("type", field.__class__.__name__)
+            if spec.codec is None:
+                field_type = spec.validation.get("type", spec.field.__class__.__name__)
                 self.write(
                     f"Field {field_name} has unsupported type {field_type} and cannot be set via this command."
                 )
                 return
 
             try:
-                encoded_value = cip_fields.encode_field_value(
-                    field,
-                    field_value,
-                    field_name=field_name,
-                    packet=self.OT_packet,
-                    metadata=metadata,
-                )
+                encoded_value = spec.encode(field_value)
             except ValueError as exc:
                 self.write(str(exc))
                 return
@@ -456,19 +524,16 @@ class CIPCLI:
     def clear_field(self, field_name):
         self.logger.info("Executing clear_field function")
         self.stop_wave(field_name)
-        if hasattr(self.OT_packet, field_name):
-            field = getattr(self.OT_packet.__class__, field_name)
-            codec = cip_fields.get_field_codec(field)
-            if codec is None:
-                self.write(f"Cannot clear field {field_name}: unsupported field type.")
-            elif codec.name == "string":
-                setattr(self.OT_packet, field_name, b"")
-                self.write(f"Cleared {field_name}")
+        with self.lock:
+            spec = cip_fields.field_table(self.OT_packet).get(field_name)
+            if spec is not None:
+                if spec.codec is None:
+                    self.write(f"Cannot clear field {field_name}: unsupported field type.")
+                else:
+                    setattr(self.OT_packet, field_name, spec.clear_value)
+                    self.write(f"Cleared {field_name}")
             else:
-                setattr(self.OT_packet, field_name, 0)
-                self.write(f"Cleared {field_name}")
-        else:
-            self.write(f"Field {field_name} not found.")
+                self.write(f"Field {field_name} not found.")
             
     def get_field(self, field_name):
         self.logger.info("Executing get_field function")
@@ -476,13 +541,13 @@ class CIPCLI:
         self.echo("")
         self.echo(tabulate([[timestamp]], headers=["Timestamp", ""], tablefmt="fancy_grid"))
         
-        if hasattr(self.OT_packet, field_name):
+        if field_name in cip_fields.field_table(self.OT_packet):
             field_value = self.get_big_endian_value(self.OT_packet, field_name)
             packet_type = self.OT_packet.__class__.__name__
             field_data = [(packet_type, field_name, self.decrease_font_size(str(field_value)))]
             
             # self.echo(f"{field_name}: {field_value}")
-        elif hasattr(self.TO_packet, field_name):
+        elif field_name in cip_fields.field_table(self.TO_packet):
             field_value = self.get_big_endian_value(self.TO_packet, field_name)
             packet_type = self.TO_packet.__class__.__name__
             field_data = [(packet_type, field_name, self.decrease_font_size(str(field_value)))]
@@ -498,16 +563,111 @@ class CIPCLI:
         self.echo("")
           
     def get_big_endian_value(self, packet, field_name):
-        field = getattr(packet.__class__, field_name)
-        field_value = getattr(packet, field_name)
-        metadata = cip_fields.get_field_metadata(packet, field_name)
-        return cip_fields.decode_field_value(
-            field,
-            field_value,
-            packet=packet,
-            metadata=metadata,
-        )
+        return cip_fields.field_table(packet)[field_name].read(packet)
     
+    def print_stats(self):
+        timing = self.session.timing
+        if timing is None:
+            self.echo("No timing statistics yet. Run 'start' first.")
+            return
+        self.echo(
+            f"OT connection 0x{timing.ot_connection_id:08x} (RPI {timing.ot_rpi * 1e3:.1f} ms), "
+            f"TO connection 0x{timing.to_connection_id:08x} (RPI {timing.to_rpi * 1e3:.1f} ms)"
+        )
+        self.echo(tabulate(cip_stats.format_rows(timing), headers=cip_stats.FORMAT_HEADERS, tablefmt="fancy_grid"))
+        self.echo(f"Missed OT deadlines: {timing.deadline_misses}")
+        source = "kernel (SO_TIMESTAMPNS)" if timing.kernel_timestamped else "receive thread"
+        self.echo(f"TO arrival times from: {source}")
+        if self.session.tuning_status:
+            for status in self.session.tuning_status.values():
+                self.echo(f"Real-time tuning {status.describe()}")
+        else:
+            self.echo("Real-time tuning: none")
+        if self.session.reconnect is not None:
+            outages = self.session.outage_stats
+            state = " (reconnecting)" if outages.down_since is not None else ""
+            self.echo(
+                f"Connection outages: {outages.outages}, total downtime {outages.total_downtime():.3f} s, "
+                f"{outages.attempts} reconnection attempts{state}"
+            )
+        if self.session.production_inhibit is not None:
+            changes = self.session.change_stats
+            self.echo(
+                f"Change-of-state OT frames: {changes.sends}, {changes.inhibited} changes delayed by the "
+                f"{self.session.production_inhibit * 1e3:.1f} ms production inhibit time"
+            )
+
+        tracker = self.session.sequence_tracker
+        if tracker is None:
+            return
+        counters = tracker.counters()
+        rows = [
+            [f"0x{connection_id:08x}", c.frames, c.lost, c.duplicates, c.out_of_order, c.cip_gaps, c.cip_out_of_order]
+            for connection_id, c in sorted(counters.items())
+        ]
+        self.echo(tabulate(
+            rows,
+            headers=["Connection", "Frames", "Lost", "Duplicates", "Out of order", "CIP gaps", "CIP out of order"],
+            tablefmt="fancy_grid",
+        ))
+        anomalies = tracker.anomalies()[-10:]
+        if anomalies:
+            self.echo("Recent sequence anomalies:")
+            for anomaly in anomalies:
+                moment = datetime.fromtimestamp(anomaly.timestamp).strftime("%H:%M:%S.%f")[:-3]
+                self.echo(
+                    f"  {moment} 0x{anomaly.connection_id:08x} {anomaly.kind}: "
+                    f"expected {anomaly.expected}, received {anomaly.received}"
+                )
+
+    def profile_command(self, args):
+        action = args[0] if args else ""
+        if action == "start" and len(args) <= 2:
+            mode = args[1] if len(args) == 2 else ""
+            if mode not in ("", "cprofile", "stacks"):
+                self.echo("Usage: profile start [cprofile|stacks]")
+                return
+            try:
+                self.session.start_profiling(
+                    cprofile=mode == "cprofile",
+                    sample_interval=0.001 if mode == "stacks" else None,
+                )
+            except RuntimeError as exc:
+                self.echo(f"Unable to profile: {exc}")
+                return
+            self.echo(f"IO cycle profiling started{f' with {mode}' if mode else ''}.")
+        elif action == "stop" and len(args) == 1:
+            if self.session.stop_profiling() is None:
+                self.echo("IO cycle profiling is not running.")
+            else:
+                self.echo("IO cycle profiling stopped.")
+        elif action == "dump" and len(args) <= 2:
+            self.dump_profile(args[1] if len(args) == 2 else None)
+        else:
+            self.echo("Usage: profile start [cprofile|stacks] | profile stop | profile dump [path]")
+
+    def dump_profile(self, path=None):
+        profiler = self.session.profiler or self.session.last_profile
+        if profiler is None:
+            self.echo("No profile yet. Run 'profile start' first.")
+            return
+        rows = profiler.rows()
+        if not rows:
+            self.echo("No IO cycles profiled yet.")
+        else:
+            self.echo(tabulate(rows, headers=cip_profiler.PROFILE_HEADERS, tablefmt="fancy_grid"))
+        if path is None:
+            return
+        try:
+            if profiler.cprofile:
+                profiler.write_cprofile(path)
+            else:
+                profiler.write_collapsed(path)
+        except (OSError, ValueError) as exc:
+            self.echo(f"Unable to write profile to {path}: {exc}")
+            return
+        self.echo(f"Profile written to {path}")
+
     def print_frame(self):
         # Print timestamp
         self.write(*"=" * 50, sep="")
@@ -516,7 +676,7 @@ class CIPCLI:
         self.echo(tabulate([[timestamp]], headers=["Timestamp", ""], tablefmt="fancy_grid"))
         self.lock.acquire()
         class_name_OT = self.OT_packet.__class__.__name__
-        field_data_OT = [(field.name, self.decrease_font_size(str(self.get_big_endian_value(self.OT_packet, field.name)))) for field in self.OT_packet.fields_desc]
+        field_data_OT = [(name, self.decrease_font_size(str(value))) for name, value in cip_fields.field_table(self.OT_packet).decode_all(self.OT_packet)]
         self.lock.release()
         self.echo(f"\t\t\t {class_name_OT} \t\t\t")
         self.echo(tabulate(field_data_OT, headers=["Field Name", "Field Value"], tablefmt="fancy_grid"))
@@ -524,7 +684,7 @@ class CIPCLI:
         
         self.lock.acquire()
         class_name_TO = self.TO_packet.__class__.__name__
-        field_data_TO = [(field.name, self.decrease_font_size(str(self.get_big_endian_value(self.TO_packet, field.name)))) for field in self.TO_packet.fields_desc]
+        field_data_TO = [(name, self.decrease_font_size(str(value))) for name, value in cip_fields.field_table(self.TO_packet).decode_all(self.TO_packet)]
         self.lock.release()
         self.echo(f"\t\t\t {class_name_TO} \t\t\t")
         self.echo(tabulate(field_data_TO, headers=["Field Name", "Field Value"], tablefmt="fancy_grid"))
@@ -676,10 +836,8 @@ class CIPCLI:
     def wave_field(self, field_name, max_value, min_value, period_ms):
         self.logger.info("Executing wave_field function")
         self.stop_wave(field_name)
-        field = getattr(self.OT_packet.__class__, field_name)
-        metadata = cip_fields.get_field_metadata(self.OT_packet, field_name)
-        codec = cip_fields.get_field_codec(field)
-        if codec is None or codec.name != "float":
+        spec = cip_fields.field_table(self.OT_packet).get(field_name)
+        if spec is None or spec.codec_name not in FLOAT_CODECS:
             self.write(f"Field {field_name} is not a floating point field and cannot be waved.")
             return
 
@@ -706,19 +864,8 @@ class CIPCLI:
                 elapsed_time = current_time - start_time
                 wave_value = amplitude * math.sin(2 * math.pi * elapsed_time / period_seconds) + offset
 
-                try:
-                    encoded_value = cip_fields.encode_field_value(
-                        field,
-                        wave_value,
-                        field_name=field_name,
-                        packet=self.OT_packet,
-                        metadata=metadata,
-                    )
-                except ValueError as exc:
-                    self.write(str(exc))
+                if not self._write_wave_value(field_name, wave_value):
                     break
-
-                setattr(self.OT_packet, field_name, encoded_value)
                 time.sleep(0.01)
 
         self.stop_events[field_name] = threading.Event()
@@ -729,10 +876,8 @@ class CIPCLI:
     def tria_field(self, field_name, max_value, min_value, period_ms):
         self.logger.info("Executing tria_field function")
         self.stop_wave(field_name)
-        field = getattr(self.OT_packet.__class__, field_name)
-        metadata = cip_fields.get_field_metadata(self.OT_packet, field_name)
-        codec = cip_fields.get_field_codec(field)
-        if codec is None or codec.name != "float":
+        spec = cip_fields.field_table(self.OT_packet).get(field_name)
+        if spec is None or spec.codec_name not in FLOAT_CODECS:
             self.write(f"Field {field_name} is not a floating point field and cannot be waved.")
             return
 
@@ -759,19 +904,8 @@ class CIPCLI:
                 elapsed_time = current_time - start_time
                 phase = elapsed_time / period_seconds
                 wave_value = (amplitude * (2 * abs(phase - math.floor(phase + 0.5)) - 1)) + offset
-                try:
-                    encoded_value = cip_fields.encode_field_value(
-                        field,
-                        wave_value,
-                        field_name=field_name,
-                        packet=self.OT_packet,
-                        metadata=metadata,
-                    )
-                except ValueError as exc:
-                    self.write(str(exc))
+                if not self._write_wave_value(field_name, wave_value):
                     break
-
-                setattr(self.OT_packet, field_name, encoded_value)
                 time.sleep(0.01)
 
         self.stop_events[field_name] = threading.Event()
@@ -783,10 +917,8 @@ class CIPCLI:
     def box_field(self, field_name, max_value, min_value, period_ms, duty_cycle):
         self.logger.info("Executing box_field function")
         self.stop_wave(field_name)
-        field = getattr(self.OT_packet.__class__, field_name)
-        metadata = cip_fields.get_field_metadata(self.OT_packet, field_name)
-        codec = cip_fields.get_field_codec(field)
-        if codec is None or codec.name != "float":
+        spec = cip_fields.field_table(self.OT_packet).get(field_name)
+        if spec is None or spec.codec_name not in FLOAT_CODECS:
             self.write(f"Field {field_name} is not a floating point field and cannot be waved.")
             return
 
@@ -815,19 +947,8 @@ class CIPCLI:
                 elapsed_time = current_time - start_time
                 duty_period = period_seconds * duty_cycle
                 wave_value = max_value if (elapsed_time % period_seconds) < duty_period else min_value
-                try:
-                    encoded_value = cip_fields.encode_field_value(
-                        field,
-                        wave_value,
-                        field_name=field_name,
-                        packet=self.OT_packet,
-                        metadata=metadata,
-                    )
-                except ValueError as exc:
-                    self.write(str(exc))
+                if not self._write_wave_value(field_name, wave_value):
                     break
-
-                setattr(self.OT_packet, field_name, encoded_value)
                 time.sleep(0.01)
 
         self.stop_events[field_name] = threading.Event()
@@ -835,6 +956,47 @@ class CIPCLI:
         wave_thread_instance.start()
         self.write(f"Generating square wave for {field_name} with duty cycle {duty_cycle} every {period_ms} milliseconds.")
             
+    def _write_wave_value(self, field_name, wave_value):
+        """Write one wave sample; return False when the wave has to end.
+
+        The field is looked up again on every sample because a hot reload
+        may have swapped in an OT encoder without it.
+        """
+        with self.lock:
+            spec = cip_fields.field_table(self.OT_packet).get(field_name)
+            if spec is None:
+                self.logger.info(f"Stopping wave for {field_name}: the field is no longer in the OT assembly")
+                return False
+            try:
+                encoded_value = spec.encode(wave_value)
+            except ValueError as exc:
+                self.write(str(exc))
+                return False
+            setattr(self.OT_packet, field_name, encoded_value)
+        return True
+
+    def _stop_invalidated_waves(self, old_packet, new_packet):
+        """Stop the waves of fields that a reloaded OT assembly removed or re-encoded."""
+        old_table = cip_fields.field_table(old_packet)
+        new_table = cip_fields.field_table(new_packet)
+        for field_name, stop_event in self.stop_events.items():
+            if stop_event.is_set():
+                continue
+            before, after = old_table.get(field_name), new_table.get(field_name)
+            if (
+                before is None
+                or after is None
+                or type(after.field) is not type(before.field)
+                or after.size != before.size
+            ):
+                stop_event.set()
+                self.echo(f"\nWaving for '{field_name}' has been stopped: the reloaded assembly changed it.\n")
+
+    def shutdown(self):
+        """Stop the wave threads and the configuration watcher before exiting."""
+        self.stop_all_thread()
+        self._stop_config_watcher()
+
     def stop_all_thread(self):
         self.logger.info(f"{self.stop_all_thread.__name__}: Stopping all wave threads for domain")
         for field_name in self.stop_events:
@@ -859,9 +1021,35 @@ class CIPCLI:
                 for line in last_100_lines:
                     self.echo(line.strip())
     
+    def _on_connection_timeout(self, gap):
+        action = "Reconnecting..." if self.session.reconnect is not None else "Run 'start' to reconnect."
+        self.echo(f"CIP connection timed out: no TO frame received for {gap * 1e3:.1f} ms. {action}")
+
     def _update_to_packet(self, packet):
         with self.lock:
             self.TO_packet = packet
+
+    @property
+    def TO_packet(self):
+        # With the IO in its own process the newest frame is read from shared memory.
+        to_snapshot = getattr(getattr(self, "session", None), "to_snapshot", None)
+        packet = to_snapshot() if to_snapshot is not None else None
+        return packet if packet is not None else self._TO_packet
+
+    @TO_packet.setter
+    def TO_packet(self, packet):
+        self._TO_packet = packet
+
+    def use_io_process(self):
+        """Run the cyclic IO in a child process from the next 'start' on."""
+        self.session = self.sessions.create_process_session(
+            debug_cip_frames=DEBUG_CIP_FRAMES,
+            on_connection_timeout=self._on_connection_timeout,
+            kernel_timestamps=self.session.kernel_timestamps,
+            realtime=self.session.realtime,
+            reconnect=self.session.reconnect,
+            production_inhibit=self.session.production_inhibit,
+        )
     
     def start_comm(self):
         self.logger.info("Executing CIP Communication Start function")
@@ -889,28 +1077,99 @@ class CIPCLI:
         params = params_result.to_connection_parameters(self.sessions.ConnectionParameters)
 
         try:
-            self.sessions.start_session(
-                self.session,
-                ip_address=self.ip_address,
-                multicast_address=self.user_multicast_address,
-                connection_params=params,
-                to_packet_class=self.TO_packet_class,
-                ot_packet=self.OT_packet,
-                heartbeat_callback=self.MPU_heartbeat,
-                update_to_packet=self._update_to_packet,
-            )
+            if isinstance(self.session, cip_process.ProcessSession):
+                self.OT_packet = self.session.start(
+                    ip_address=self.ip_address,
+                    multicast_address=self.user_multicast_address,
+                    connection_params=params,
+                    ot_layout=self.ot_info.layout,
+                    to_layout=self.to_info.layout,
+                    ot_packet=self.OT_packet,
+                )
+            else:
+                self.sessions.start_session(
+                    self.session,
+                    ip_address=self.ip_address,
+                    multicast_address=self.user_multicast_address,
+                    connection_params=params,
+                    to_packet_class=self.TO_view_class or self.TO_packet_class,
+                    ot_packet=self.OT_packet,
+                    heartbeat_callback=self.MPU_heartbeat,
+                    update_to_packet=self._update_to_packet,
+                )
         except RuntimeError as exc:
             self.echo(str(exc))
+            return
+
+        self._start_config_watcher()
+
+    def _start_config_watcher(self):
+        if self.config_watcher is not None or self.cip_xml_path is None:
+            return
+        directories = {Path(self.cip_xml_path).resolve().parent}
+        directories.update(Path(directory).resolve() for directory in self.config_loader.iter_config_directories())
+        self.config_watcher = cip_reload.ConfigWatcher(sorted(directories), self._reload_configuration)
+        self.config_watcher.start()
+        self.logger.info(f"Watching {len(directories)} configuration directories ({self.config_watcher.backend})")
+
+    def _stop_config_watcher(self):
+        if self.config_watcher is not None:
+            self.config_watcher.stop()
+            self.config_watcher = None
+
+    def _reload_configuration(self, path):
+        if self.cip_xml_path is None or Path(path).resolve() != Path(self.cip_xml_path).resolve():
+            return
+        if not self.session.running:
+            self.logger.info("Ignoring configuration change: the CIP session is not running")
+            return
+
+        plan = cip_reload.plan_reload(path, ot=self.ot_info, to=self.to_info)
+        if plan.rejected:
+            for reason in plan.rejected:
+                self.echo(f"Configuration reload skipped: {reason}")
+            return
+        if not plan.changed:
+            return
+        if isinstance(self.session, cip_process.ProcessSession):
+            self.echo("Configuration changed: restart the CIP communication to apply it to the IO process.")
+            return
+
+        def _applied(ot_packet, to_packet_class):
+            # Runs on the IO thread with self.lock held.
+            if plan.ot is not None:
+                self._stop_invalidated_waves(self.OT_packet, ot_packet)
+                self.ot_info = plan.ot
+                self.OT_packet_class = plan.ot.packet_class
+                self.OT_packet = ot_packet
+            if plan.to is not None:
+                self.to_info = plan.to
+                self.TO_packet_class = plan.to.packet_class
+                self.TO_view_class = to_packet_class
+
+        self.session.request_swap(plan.to_swap(on_applied=_applied))
+        changed = [info.id for info in (plan.ot, plan.to) if info is not None]
+        self.echo(f"Configuration reloaded: {', '.join(changed)} will be swapped at the next cycle.")
 
     def stop_comm(self):
         self.logger.info(f"{self.stop_comm.__name__}: Stopping comm thread")
         if not self.session.running:
+            # The session may have ended on an error; its watcher is still running.
+            self._stop_config_watcher()
             self.echo("No active CIP communication session.")
             return
 
+        self._stop_config_watcher()
         self.sessions.stop_session(self.session)
+        last_to_packet = getattr(self.session, "last_to_packet", None)
+        if last_to_packet is not None:
+            self.TO_packet = last_to_packet
         self.bCIPErrorOccured = self.session.error_occurred
-        self.echo("CIP communication stopped.")
+        stats = self.session.transmit_stats
+        self.echo(
+            f"CIP communication stopped after {stats.cycles} OT cycles "
+            f"({stats.missed} missed deadlines, max lateness {stats.max_lateness * 1e3:.2f} ms)."
+        )
 
 
  
@@ -936,6 +1195,12 @@ class CIPCLI:
                         self.get_field(command[1])
                     elif command[0] == "frame" and len(command) == 1:
                         self.print_frame()
+                    elif command[0] == "stats" and len(command) == 1:
+                        self.print_stats()
+                    elif command[0] == "profile":
+                        self.profile_command(command[1:])
+                    elif command[0] == "assembly" and len(command) in (1, 3):
+                        self.select_assemblies(*command[1:])
                     elif command[0] == "fields" and len(command) == 1:
                         self.list_fields()
                     elif command[0] == "wave" and len(command) == 5:
@@ -961,14 +1226,14 @@ class CIPCLI:
                         self.help_menu()
                     elif command[0] == "exit":
                         self.echo("Exiting !")
-                        self.stop_all_thread()
+                        self.shutdown()
                         sys.exit()
                     else:
                         self.echo("Invalid cmd")
             
         except KeyboardInterrupt:
             self.echo("Exiting !!")
-            self.stop_all_thread()
+            self.shutdown()
             sys.exit()
 
 
@@ -993,6 +1258,21 @@ def main(
         cli_factory = lambda: CIPCLI(ui=ui, network_configurator=network_configurator)
 
     cmd = cli or cli_factory()
+    if configuration.io_process:
+        cmd.use_io_process()
+    if configuration.kernel_timestamps is not None:
+        cmd.session.kernel_timestamps = configuration.kernel_timestamps
+    tuning = cip_realtime.RealtimeTuning(
+        cpus=configuration.io_cpus,
+        fifo_priority=configuration.io_fifo_priority,
+        busy_poll=configuration.busy_poll,
+    )
+    if tuning.enabled:
+        cmd.session.realtime = tuning
+    if configuration.reconnect:
+        cmd.session.reconnect = cip_reconnect.ReconnectPolicy()
+    if configuration.change_of_state is not None:
+        cmd.session.production_inhibit = configuration.change_of_state / 1e3
     cmd.display_banner()
     cmd.progress_bar("Initializing", 1)
 
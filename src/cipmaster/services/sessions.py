@@ -5,6 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Callable, Optional, Type
 
+from cipmaster.cip import process as cip_process
 from cipmaster.cip import session as cip_session
 
 
@@ -31,6 +32,9 @@ class SessionService:
     def create_session(self, *args, **kwargs):
         return cip_session.CIPSession(*args, **kwargs)
 
+    def create_process_session(self, **kwargs):
+        return cip_process.ProcessSession(**kwargs)
+
     def calculate_connection_params(self, ot_assembly, to_assembly) -> CalculatedConnectionParameters:
         def _extract_size(node) -> Optional[int]:
             if node is None:
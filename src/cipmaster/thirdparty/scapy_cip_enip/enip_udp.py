@@ -87,6 +87,64 @@ class CIP_IO(scapy_all.Packet):
         scapy_all.LEIntField("Header", 0),
     ]
 
+# Item count, sequenced address item, connected data item header and CIP IO
+# header of a cyclic implicit IO datagram, and the offsets of the fields
+# that change from one datagram to the next.
+SEQUENCED_IO_HEADER = struct.Struct("<HHHIIHHHI")
+SEQUENCE_OFFSET = 10
+CIP_IO_OFFSET = 18
+_CONNECTED_DATA_OFFSET = CIP_IO_OFFSET
+
+
+class CIPIOFrame(object):
+    """Cyclic implicit IO datagram decoded without Scapy.
+
+    Exposes the same ``CIP_Sequence_Count``, ``Header`` and ``payload``
+    attributes as a dissected :class:`CIP_IO`; ``payload`` is a memoryview
+    of the application data inside the original datagram.  ``timestamp`` is
+    the kernel receive time when the receiver asked for one, else ``None``.
+    """
+
+    __slots__ = ("connection_id", "sequence", "CIP_Sequence_Count", "Header", "payload", "timestamp")
+
+    def __init__(self, connection_id, sequence, CIP_Sequence_Count, Header, payload, timestamp=None):
+        self.connection_id = connection_id
+        self.sequence = sequence
+        self.CIP_Sequence_Count = CIP_Sequence_Count
+        self.Header = Header
+        self.payload = payload
+        self.timestamp = timestamp
+
+
+def decode_sequenced_io(data, frame=None):
+    """Decode a sequenced address plus connected data datagram in one pass.
+
+    Returns ``None`` unless ``data`` holds exactly these two items with
+    consistent lengths, in which case the caller should fall back to the
+    Scapy dissector.  When ``frame`` is given it is filled in and returned
+    instead of allocating a new :class:`CIPIOFrame`.
+    """
+
+    if len(data) < SEQUENCED_IO_HEADER.size:
+        return None
+    (count, address_type, address_length, connection_id, sequence,
+     data_type, data_length, cip_sequence_count, header) = SEQUENCED_IO_HEADER.unpack_from(data)
+    if (count != 2 or address_type != 0x8002 or address_length != 8 or data_type != 0x00B1
+            or data_length < SEQUENCED_IO_HEADER.size - _CONNECTED_DATA_OFFSET
+            or _CONNECTED_DATA_OFFSET + data_length != len(data)):
+        return None
+    payload = memoryview(data)[SEQUENCED_IO_HEADER.size:]
+    if frame is None:
+        return CIPIOFrame(connection_id, sequence, cip_sequence_count, header, payload)
+    frame.connection_id = connection_id
+    frame.sequence = sequence
+    frame.CIP_Sequence_Count = cip_sequence_count
+    frame.Header = header
+    frame.payload = payload
+    frame.timestamp = None
+    return frame
+
+
 scapy_all.bind_layers(scapy_all.UDP, ENIP_UDP, sport=2222, dport=2222)
 scapy_all.bind_layers(ENIP_UDP_Item, ENIP_UDP_SequencedAddress, type_id=0x8002)
 
@@ -4,8 +4,10 @@
 #
 """Establish all what is needed to communicate with a TGV 2020 DCU"""
 import logging
+import selectors
 import socket
 import struct
+import sys
 from typing import Any, Optional
 
 from scapy import all as scapy_all
@@ -20,7 +22,8 @@ from thirdparty.scapy_cip_enip.cip import CIP, CIP_Path, CIP_ReqConnectionManage
 from thirdparty.scapy_cip_enip.enip_tcp import ENIP_TCP, ENIP_SendUnitData, ENIP_SendUnitData_Item, \
     ENIP_ConnectionAddress, ENIP_ConnectionPacket, ENIP_RegisterSession, ENIP_SendRRData
 
-from thirdparty.scapy_cip_enip.enip_udp import ENIP_UDP,ENIP_UDP_Item,ENIP_UDP_SequencedAddress,CIP_IO
+from thirdparty.scapy_cip_enip.enip_udp import ENIP_UDP,ENIP_UDP_Item,ENIP_UDP_SequencedAddress,CIP_IO, \
+    CIP_IO_OFFSET, SEQUENCE_OFFSET, SEQUENCED_IO_HEADER, CIPIOFrame, decode_sequenced_io
 
 # Global switch to make it easy to test without sending anything
 NO_NETWORK = False
@@ -39,6 +42,68 @@ logging.basicConfig(
 )
 
 
+# Largest datagram read from the multicast socket and bound on one drain.
+_IO_BUFFER_SIZE = 2000
+_MAX_DRAIN = 256
+
+_NO_FRAME = object()
+_ITEM_HEADER = struct.Struct("<HH")
+_SEQUENCED_ADDRESS = struct.Struct("<II")
+_SEQUENCE = struct.Struct("<I")
+_CIP_IO_HEADER = struct.Struct("<HI")
+_CIP_SEQUENCE_COUNT = struct.Struct("<H")
+
+# Kernel receive timestamps: Python only exports SO_TIMESTAMPNS from 3.12 on,
+# so fall back to its Linux value.  The control message carries a timespec.
+_SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35 if sys.platform.startswith("linux") else None)
+_TIMESPEC = struct.Struct("@ll")
+_TIMESTAMP_CONTROL_SIZE = socket.CMSG_SPACE(_TIMESPEC.size) if hasattr(socket, "CMSG_SPACE") else 0
+
+
+def _kernel_timestamp(ancdata):
+    """return the SO_TIMESTAMPNS wall clock time in ``ancdata``, or None"""
+
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == _SO_TIMESTAMPNS and len(data) >= _TIMESPEC.size:
+            seconds, nanoseconds = _TIMESPEC.unpack_from(data)
+            return seconds + nanoseconds * 1e-9
+    return None
+
+
+def _scan_UDP_ENIP_items(buffer, size):
+    """Return the connection id and sequence counters of a datagram carrying connected data.
+
+    Only the common packet format item headers are read.  The result is a
+    ``(connection_id, sequence, cip_sequence_count)`` tuple, with ``None``
+    for the values of a missing sequenced address item, or ``_NO_FRAME`` for
+    truncated frames and frames without a connected data item.
+    """
+
+    if size < 2:
+        return _NO_FRAME
+    (count,) = struct.unpack_from("<H", buffer, 0)
+    offset = 2
+    connection_id = sequence = cip_sequence_count = None
+    has_data = False
+    for _ in range(count):
+        if offset + _ITEM_HEADER.size > size:
+            return _NO_FRAME
+        type_id, length = _ITEM_HEADER.unpack_from(buffer, offset)
+        offset += _ITEM_HEADER.size
+        if offset + length > size:
+            return _NO_FRAME
+        if type_id == 0x8002 and length >= _SEQUENCED_ADDRESS.size and connection_id is None:
+            connection_id, sequence = _SEQUENCED_ADDRESS.unpack_from(buffer, offset)
+        elif type_id == 0x00B1:
+            has_data = True
+            if length >= _CIP_SEQUENCE_COUNT.size:
+                (cip_sequence_count,) = _CIP_SEQUENCE_COUNT.unpack_from(buffer, offset)
+        offset += length
+    if not has_data:
+        return _NO_FRAME
+    return connection_id, sequence, cip_sequence_count
+
+
 def _item_payload_bytes(payload: Any) -> bytes:
     """Return the raw bytes carried by an ENIP connected data item payload."""
 
@@ -206,6 +271,11 @@ class Client(object):
         self.PortEtherNetIPImplicitMessageIO = 2222 #TCP and UDP
         self.ot_connection_param = None
         self.to_connection_param = None
+        # Actual packet intervals (microseconds) granted by the forward open.
+        self.ot_api = None
+        self.to_api = None
+        # Forward open connection timeout multiplier code (0 = x4 ... 7 = x512).
+        self.connection_timeout_multiplier = 0
         self.logger = logging.getLogger(self.__class__.__name__)
 
         """ create two IP connection,
@@ -344,6 +414,29 @@ class Client(object):
         self.enip_connection_id_TO = 0 #required for CIP IO T->O
         self.sequence_unit_cip = 1
         self.sequence_CIP_IO = 1
+        # Reusable datagram buffers and count of T->O frames dropped unread.
+        self._receive_buffers = []
+        # recv_latest_UDP_ENIP_CIP_IO reuses one frame, the datagram buffer
+        # it points into and the per-connection table between calls.
+        self._io_frame = CIPIOFrame(0, 0, 0, 0, b"")
+        self._held_buffer = None
+        self._latest_frames = {}
+        self._receive_selector = None
+        self._receive_selector_sock = None
+        self.superseded_frames = 0
+        # Called with (connection_id, sequence, cip_sequence_count, timestamp)
+        # for every received frame carrying connected data, including
+        # superseded ones; timestamp is the kernel receive time or None.
+        self.io_frame_observer = None
+        # Set by enable_kernel_timestamps once the socket is configured.
+        self.kernel_timestamps = False
+        # Optional per-thread stage timers (see cipmaster.cip.profiler) that
+        # the receive and send calls lap when the IO cycle is being profiled.
+        self.receive_stage_timer = None
+        self.send_stage_timer = None
+        # O->T datagram template, rebuilt when the connection changes.
+        self._ot_frame = None
+        self._ot_frame_data = None
 
         # Open an Ethernet/IP session
         sessionpkt = ENIP_TCP() / ENIP_RegisterSession()
@@ -362,6 +455,8 @@ class Client(object):
     def close(self):
         """Close all sockets open during the init."""
 
+        if getattr(self, "_receive_selector", None) is not None:
+            self._close_receive_selector()
         sock = getattr(self, "Sock", None)
         if sock is not None:
             try:
@@ -441,9 +536,11 @@ class Client(object):
         return pkt
 
     def recv_UDP_ENIP_CIP_IO(self,DEBUG=bool(False),Timeout=0):
-        """receive cyclic mulicast CIP IO like <AS_DCUi_MPU_DATA>"""
-        
-        self.logger.info("TGV2020: recv_UDP_ENIP_CIP_IO executing")
+        """receive cyclic mulicast CIP IO like <AS_DCUi_MPU_DATA>
+
+        Always returns a dissected :class:`CIP_IO` packet; its ``timestamp``
+        attribute holds the kernel receive time, or ``None``.
+        """
         
         if self.MulticastSock is None:
             self.logger.warning("TGV2020: recv_UDP_ENIP_CIP_IO: self.MulticastSock is None")
@@ -452,11 +549,15 @@ class Client(object):
         
         #fix timeout
         self.MulticastSock.settimeout(Timeout)
-        self.logger.info("TGV2020: recv_UDP_ENIP_CIP_IO: Multicast timeout set")
         
         #wait CIP IO frame during Timeout
+        timestamp = None
         try:
-            (pktbytes, address) = self.MulticastSock.recvfrom(2000)
+            if self.kernel_timestamps:
+                pktbytes, ancdata, _, address = self.MulticastSock.recvmsg(_IO_BUFFER_SIZE, _TIMESTAMP_CONTROL_SIZE)
+                timestamp = _kernel_timestamp(ancdata)
+            else:
+                (pktbytes, address) = self.MulticastSock.recvfrom(_IO_BUFFER_SIZE)
         except socket.timeout:
             self.logger.warning("TGV2020: recv_UDP_ENIP_CIP_IO: NO CIP_IO packet is returned")
             return None
@@ -467,6 +568,178 @@ class Client(object):
             )
             return None
 
+        timer = self.receive_stage_timer
+        if timer is not None:
+            timer.lap("receive")
+        if self.io_frame_observer is not None:
+            scanned = _scan_UDP_ENIP_items(pktbytes, len(pktbytes))
+            if scanned is not _NO_FRAME:
+                self.io_frame_observer(*scanned, timestamp)
+        pkt = self._decode_UDP_ENIP_CIP_IO(pktbytes, address, DEBUG)
+        if pkt is not None:
+            pkt.timestamp = timestamp
+        if timer is not None:
+            timer.lap("enip_decode")
+        return pkt
+
+    def recv_latest_UDP_ENIP_CIP_IO(self, DEBUG=bool(False), Timeout=0):
+        """receive the newest cyclic multicast CIP IO, dropping older queued frames
+
+        Waits up to ``Timeout`` for a datagram with a selector, then drains
+        the socket without blocking; the socket stays in non-blocking mode so
+        no call changes its timeout.  Datagrams are read with ``recvfrom_into`` into reusable
+        buffers and only their item headers are inspected; for each connection
+        the newest datagram carrying connected data is kept and the ones it
+        replaces are counted in ``superseded_frames``.  Only the newest frame
+        of the T->O connection (or the newest frame at all, when it is not
+        known) is decoded.
+
+        In steady state nothing is allocated per call: the returned frame
+        object and the buffer its ``payload`` points into are reused, so
+        both are only valid until the next call.
+        """
+
+        sock = self.MulticastSock
+        if sock is None:
+            self.logger.warning("TGV2020: recv_latest_UDP_ENIP_CIP_IO: self.MulticastSock is None")
+            return None
+
+        pool = self._receive_buffers
+        if self._held_buffer is not None:
+            pool.append(self._held_buffer)
+            self._held_buffer = None
+
+        if not self._wait_for_UDP_ENIP_CIP_IO(sock, Timeout):
+            return None
+        timer = self.receive_stage_timer
+        if timer is not None:
+            timer.lap("wait")
+
+        buffer = pool.pop() if pool else bytearray(_IO_BUFFER_SIZE)
+        latest = self._latest_frames
+        newest = _NO_FRAME
+        kernel_timestamps = self.kernel_timestamps
+        timestamp = None
+        for _ in range(_MAX_DRAIN):
+            try:
+                if kernel_timestamps:
+                    size, ancdata, _, address = sock.recvmsg_into((buffer,), _TIMESTAMP_CONTROL_SIZE)
+                    timestamp = _kernel_timestamp(ancdata)
+                else:
+                    size, address = sock.recvfrom_into(buffer)
+            except (socket.timeout, BlockingIOError):
+                break
+            except OSError:
+                self.logger.warning(
+                    "TGV2020: recv_latest_UDP_ENIP_CIP_IO: socket error while waiting for CIP IO",
+                    exc_info=self.logger.isEnabledFor(logging.DEBUG),
+                )
+                break
+
+            scanned = _scan_UDP_ENIP_items(buffer, size)
+            if scanned is _NO_FRAME:
+                continue
+            connection_id = scanned[0]
+            if self.io_frame_observer is not None:
+                self.io_frame_observer(*scanned, timestamp)
+            previous = latest.get(connection_id)
+            if previous is not None:
+                pool.append(previous[0])
+                self.superseded_frames += 1
+            latest[connection_id] = (buffer, size, address, timestamp)
+            newest = connection_id
+            buffer = pool.pop() if pool else bytearray(_IO_BUFFER_SIZE)
+        pool.append(buffer)
+
+        if timer is not None:
+            timer.lap("receive")
+
+        if newest is _NO_FRAME:
+            return None
+        chosen = latest.get(self.enip_connection_id_TO) or latest[newest]
+        buffer, size, address, timestamp = chosen
+        try:
+            pkt = self._decode_UDP_ENIP_CIP_IO(memoryview(buffer)[:size], address, DEBUG, self._io_frame)
+            if pkt is not None and timestamp is not None:
+                pkt.timestamp = timestamp
+        finally:
+            for entry in latest.values():
+                if entry is not chosen:
+                    pool.append(entry[0])
+            latest.clear()
+            self._held_buffer = buffer
+        if timer is not None:
+            timer.lap("enip_decode")
+        return pkt
+
+    def enable_kernel_timestamps(self):
+        """have the kernel timestamp received T->O datagrams (SO_TIMESTAMPNS)
+
+        Received frames then carry the kernel receive time, on the wall
+        clock, in their ``timestamp`` attribute.  Returns whether the option
+        could be enabled on the multicast socket.
+        """
+
+        sock = self.MulticastSock
+        if sock is None or _SO_TIMESTAMPNS is None or not _TIMESTAMP_CONTROL_SIZE:
+            return False
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, _SO_TIMESTAMPNS, 1)
+        except OSError:
+            self.logger.warning(
+                "TGV2020: enable_kernel_timestamps: SO_TIMESTAMPNS is not supported",
+                exc_info=self.logger.isEnabledFor(logging.DEBUG),
+            )
+            return False
+        self.kernel_timestamps = True
+        return True
+
+    def _wait_for_UDP_ENIP_CIP_IO(self, sock, Timeout):
+        """wait up to ``Timeout`` seconds for ``sock`` to become readable"""
+
+        if self._receive_selector is None or self._receive_selector_sock is not sock:
+            self._close_receive_selector()
+            self._receive_selector = selectors.DefaultSelector()
+            self._receive_selector.register(sock, selectors.EVENT_READ)
+            self._receive_selector_sock = sock
+        if sock.gettimeout() != 0.0:
+            # recv_UDP_ENIP_CIP_IO gives the socket a timeout; drop it again.
+            sock.setblocking(False)
+        try:
+            return bool(self._receive_selector.select(Timeout))
+        except OSError:
+            self.logger.warning(
+                "TGV2020: recv_latest_UDP_ENIP_CIP_IO: socket error while waiting for CIP IO",
+                exc_info=self.logger.isEnabledFor(logging.DEBUG),
+            )
+            return False
+
+    def _close_receive_selector(self):
+        selector, self._receive_selector = self._receive_selector, None
+        self._receive_selector_sock = None
+        if selector is not None:
+            selector.close()
+
+    def _decode_UDP_ENIP_CIP_IO(self, pktbytes, address, DEBUG=bool(False), frame=None):
+        """decode one ENIP UDP datagram into its CIP IO packet
+
+        When a reusable ``frame`` is given, well-formed frames of the
+        expected connections are decoded into it with
+        :func:`decode_sequenced_io`; Scapy then only dissects frames it
+        rejects, or every frame when ``DEBUG`` asks for them to be shown.
+        Without ``frame`` the datagram is always dissected into a
+        :class:`CIP_IO` packet.
+        """
+
+        if frame is not None and not DEBUG:
+            frame = decode_sequenced_io(pktbytes, frame)
+            expected_id = self.enip_connection_id_TO
+            if frame is not None and (
+                not expected_id or frame.connection_id in (expected_id, self.enip_connection_id_OT)
+            ):
+                return frame
+
+        pktbytes = bytes(pktbytes)
         if self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug(
                 "TGV2020: recv_UDP_ENIP_CIP_IO: received %d bytes from %s:%s\n%s",
@@ -558,26 +831,50 @@ class Client(object):
 
 
     def send_UDP_ENIP_CIP_IO(self,CIP_Sequence_Count=0,Header=0,AppData=None):
-        """send cyclic unicast CIP IO like <AS_MPU_DCUi_DATA>"""
-        self.logger.info("TGV2020: send_UDP_ENIP_CIP_IO executing")
-        enippkt = ENIP_UDP(count=2,items=[
-            ENIP_UDP_Item(type_id="Sequenced_Address",length=8) / ENIP_UDP_SequencedAddress(connection_id=self.enip_connection_id_OT, sequence=self.sequence_CIP_IO),
-            ENIP_UDP_Item(type_id="Connected_Data_Item",length=len(AppData)+len(CIP_IO()))
-        ])
-        #add CIP IO part
-        enippkt /= CIP_IO(CIP_Sequence_Count=CIP_Sequence_Count,Header=Header)
-        
-        #add data application part of the project
-        enippkt /= AppData
+        """send cyclic unicast CIP IO like <AS_MPU_DCUi_DATA>
+
+        ``AppData`` may be a Scapy packet, raw bytes, or a compiled assembly
+        encoder, whose committed frame is copied straight into the datagram.  The
+        datagram is built once per connection and application data size;
+        each call only patches the sequence numbers and the application
+        bytes in place, so steady-state sends allocate nothing.
+        """
+        write_to = getattr(AppData, "write_to", None)
+        if write_to is None and not isinstance(AppData, (bytes, bytearray, memoryview)):
+            AppData = bytes(AppData)
+        frame = self._ot_frame_for(len(AppData))
+        if write_to is not None:
+            write_to(self._ot_frame_data)
+        else:
+            self._ot_frame_data[:] = AppData
 
-        #enippkt.show()
+        _SEQUENCE.pack_into(frame, SEQUENCE_OFFSET, self.sequence_CIP_IO & 0xFFFFFFFF)
+        _CIP_IO_HEADER.pack_into(frame, CIP_IO_OFFSET, CIP_Sequence_Count, Header)
         self.sequence_CIP_IO += 1
-        self.logger.info(f"TGV2020: send_UDP_ENIP_CIP_IO: sequence_CIP_IO {self.sequence_CIP_IO}")
+        timer = self.send_stage_timer
+        if timer is not None:
+            timer.lap("ot_build")
         if self.Sock1 is not None:
-            self.logger.info("TGV2020: send_UDP_ENIP_CIP_IO: Sending UDP_ENIP_CIP_IO through socket")
-            self.Sock1.send(scapy_all.raw(enippkt))
+            self.Sock1.send(frame)
         else:
             self.logger.warning("TGV2020: send_UDP_ENIP_CIP_IO: Socket error: failed to send UDP_ENIP_CIP_IO")
+        if timer is not None:
+            timer.lap("send")
+
+    def _ot_frame_for(self, size):
+        """return the preallocated O->T datagram for ``size`` bytes of application data"""
+
+        frame = self._ot_frame
+        if frame is None or len(frame) != SEQUENCED_IO_HEADER.size + size:
+            frame = bytearray(SEQUENCED_IO_HEADER.size + size)
+            SEQUENCED_IO_HEADER.pack_into(
+                frame, 0,
+                2, 0x8002, _SEQUENCED_ADDRESS.size, self.enip_connection_id_OT, 0,
+                0x00B1, _CIP_IO_HEADER.size + size, 0, 0,
+            )
+            self._ot_frame = frame
+            self._ot_frame_data = memoryview(frame)[SEQUENCED_IO_HEADER.size:]
+        return frame
 
     def _cip_status_ok(self, cippkt, context):
         status_code, status_obj = utils.cip_status_details(cippkt)
@@ -593,7 +890,8 @@ class Client(object):
         self.logger.info("TGV2020: forward_open executing")
         cippkt = CIP(service=0x54, path=CIP_Path(wordsize=2, path=b'\x20\x06\x24\x01'))
         cippkt /= CIP_ReqForwardOpen(connection_path_size=9, connection_path=b"\x34\x04\x00\x00\x00\x00\x00\x00\x00\x00\x20\x04\x24\x01\x2C\x65\x2C\x64",
-                                     OT_connection_param=self.ot_connection_param, TO_connection_param=self.to_connection_param)
+                                     OT_connection_param=self.ot_connection_param, TO_connection_param=self.to_connection_param,
+                                     connection_timeout_multiplier=self.connection_timeout_multiplier)
         self.send_rr_cip(cippkt)
         resppkt = self.recv_enippkt()
         if self.Sock is None:
@@ -606,6 +904,9 @@ class Client(object):
         assert isinstance(cippkt.payload, CIP_RespForwardOpen)
         self.enip_connection_id_OT = cippkt.payload.OT_network_connection_id
         self.enip_connection_id_TO = cippkt.payload.TO_network_connection_id
+        self._ot_frame = None
+        self.ot_api = cippkt.payload.OT_api
+        self.to_api = cippkt.payload.TO_api
         return True
 
     def forward_close(self):
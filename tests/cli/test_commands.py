@@ -0,0 +1,95 @@
+"""Tests for the non-interactive ``cipmaster`` subcommands."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from textwrap import dedent
+
+from click.testing import CliRunner
+
+from cipmaster.cli import main
+
+VALID = dedent(
+    """
+    <cip>
+      <assembly id="AS_OT" dir="in" size="16" subtype="OT_EO">
+        <usint id="Alive" offset="0" />
+      </assembly>
+      <assembly id="AS_TO" dir="out" size="8" subtype="TO">
+        <usint id="Command" offset="0" />
+      </assembly>
+    </cip>
+    """
+).strip()
+
+
+def _populate(directory: Path) -> None:
+    directory.mkdir()
+    (directory / "a_valid.xml").write_text(VALID)
+    (directory / "b_too_long.xml").write_text(VALID.replace('<usint id="Command"', '<uint id="Command"'))
+    (directory / "c_broken.xml").write_text("<cip>")
+    (directory / "notes.txt").write_text("ignored")
+
+
+def test_validate_streams_json_lines_and_fails(tmp_path: Path):
+    directory = tmp_path / "icds"
+    _populate(directory)
+
+    result = CliRunner().invoke(main, ["validate", str(directory), "--format", "jsonl", "--jobs", "2"])
+
+    assert result.exit_code == 1, result.output
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert [Path(record["path"]).name for record in records] == ["a_valid.xml", "b_too_long.xml", "c_broken.xml"]
+    assert [record["ok"] for record in records] == [True, False, False]
+    assert [name for name, _ in records[1]["failures"]] == ["Layout of Assembly 'TO'"]
+    assert records[2]["failures"][0][0] == "Parse XML"
+
+
+def test_validate_table_output_succeeds_for_valid_files(tmp_path: Path):
+    directory = tmp_path / "icds"
+    directory.mkdir()
+    (directory / "nested").mkdir()
+    (directory / "nested" / "valid.xml").write_text(VALID)
+
+    result = CliRunner().invoke(main, ["validate", str(directory), "--recursive", "--jobs", "1"])
+
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines()[0].startswith("OK")
+    assert "1/1 configuration files passed validation." in result.output
+
+
+def test_validate_defaults_to_packaged_configurations():
+    result = CliRunner().invoke(main, ["validate"])
+
+    assert result.exit_code == 0, result.output
+    assert ".xml" in result.output
+
+
+def test_validate_rejects_empty_directories(tmp_path: Path):
+    result = CliRunner().invoke(main, ["validate", str(tmp_path)])
+
+    assert result.exit_code == 2
+    assert "No XML configuration files found" in result.output
+
+
+def test_find_reports_signal_locations(tmp_path: Path):
+    directory = tmp_path / "icds"
+    directory.mkdir()
+    (directory / "valid.xml").write_text(VALID)
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["find", "Command", "--dir", str(directory), "--format", "jsonl"])
+
+    assert result.exit_code == 0, result.output
+    record = json.loads(result.output.splitlines()[0])
+    assert record["assembly"] == "AS_TO"
+    assert record["path"].endswith("valid.xml")
+
+    missing = runner.invoke(main, ["find", "NoSuchSignal", "--dir", str(directory)])
+    assert missing.exit_code == 1
+
+    # A later query without --dir keeps the files that scan indexed.
+    again = runner.invoke(main, ["find", "Command", "--format", "jsonl"])
+    assert again.exit_code == 0, again.output
+    assert json.loads(again.output.splitlines()[0])["path"] == record["path"]
@@ -0,0 +1,14 @@
+"""Shared pytest fixtures."""
+
+from __future__ import annotations
+
+import pytest
+
+from cipmaster.cip import cache as cip_cache
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep compiled layout caches out of the user's home directory."""
+
+    monkeypatch.setenv(cip_cache.CACHE_DIR_ENV, str(tmp_path_factory.mktemp("cipmaster-cache")))
@@ -0,0 +1,129 @@
+"""Tests for array-typed signals."""
+
+from __future__ import annotations
+
+import array
+import struct
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from cipmaster.cip import arrays as cip_arrays
+from cipmaster.cip import config as cip_config
+from cipmaster.cip import fields as cip_fields
+
+CONFIG = dedent(
+    """
+    <cip>
+      <assembly id="AS_OT" dir="in" size="768" subtype="OT_EO">
+        <usint id="Alive" offset="0" />
+        <uint id="Words" offset="16" length="4" />
+        <real id="Gains" offset="80" length="3" />
+        <usint id="Block" offset="192" length="64" />
+      </assembly>
+      <assembly id="AS_TO" dir="out" size="64" subtype="TO">
+        <int id="Samples" offset="0" length="4" />
+      </assembly>
+    </cip>
+    """
+).strip()
+
+
+@pytest.fixture
+def validation(tmp_path: Path) -> cip_config.CIPValidationResult:
+    xml_path = tmp_path / "arrays.xml"
+    xml_path.write_text(CONFIG)
+    result = cip_config.validate_cip_config(str(xml_path))
+    assert result.overall_status is True
+    return result
+
+
+def test_array_signals_become_single_fields(validation):
+    packet_class = validation.ot_info.packet_class
+
+    assert [field.name for field in packet_class.fields_desc if not field.name.startswith("spare_")] == [
+        "Alive",
+        "Words",
+        "Gains",
+        "Block",
+    ]
+    assert isinstance(packet_class.Words, cip_arrays.ArrayField)
+    assert len(packet_class()) == 96
+
+
+def test_encoder_bulk_set_matches_scapy_frame(validation):
+    packet_class = validation.ot_info.packet_class
+    encoder = validation.ot_info.compiled.new_encoder()
+
+    encoder.Words = [1, 2, 0x1234, 0xFFFF]
+    encoder.Gains = array.array("f", [0.5, -1.0, 2.25])
+    encoder.Block = bytes(range(64))
+
+    reference = packet_class(
+        Words=struct.pack("<4H", 1, 2, 0x1234, 0xFFFF),
+        Gains=struct.pack("<3f", 0.5, -1.0, 2.25),
+        Block=bytes(range(64)),
+    )
+    assert bytes(encoder) == bytes(reference)
+    assert encoder.Words.tolist() == [1, 2, 0x1234, 0xFFFF]
+    assert encoder.Gains.tolist() == [0.5, -1.0, 2.25]
+    assert encoder.dirty_fields == {"Words", "Gains", "Block"}
+
+
+def test_write_slice_updates_only_the_given_elements(validation):
+    encoder = validation.ot_info.compiled.new_encoder()
+    encoder.Block = [7] * 64
+    encoder.pop_dirty()
+
+    encoder.write_slice("Block", [1, 2, 3], start=10)
+
+    assert encoder.Block.tolist() == [7] * 10 + [1, 2, 3] + [7] * 51
+    assert encoder.pop_dirty() == {"Block"}
+    with pytest.raises(ValueError):
+        encoder.write_slice("Block", [0] * 5, start=60)
+    with pytest.raises(TypeError):
+        encoder.write_slice("Alive", [1])
+
+
+def test_array_values_are_range_checked(validation):
+    encoder = validation.ot_info.compiled.new_encoder()
+
+    with pytest.raises(ValueError):
+        encoder.Words = [0x10000]
+    with pytest.raises(ValueError):
+        encoder.Words = [1, 2, 3, 4, 5]
+
+    encoder.Words = [9]
+    assert encoder.Words.tolist() == [9, 0, 0, 0]
+
+
+def test_view_decodes_array_signals(validation):
+    frame = struct.pack("<4h", -1, 2, -3, 4)
+    view = validation.to_info.compiled.view(frame)
+
+    assert list(view.Samples) == [-1, 2, -3, 4]
+
+
+def test_field_table_parses_and_formats_arrays(validation):
+    encoder = validation.ot_info.compiled.new_encoder()
+    spec = cip_fields.field_table(encoder)["Gains"]
+
+    encoder.Gains = spec.encode("[1.5, 2, -3]")
+    assert spec.read(encoder) == [1.5, 2.0, -3.0]
+    assert spec.decode(bytes(spec.clear_value)) == [0.0, 0.0, 0.0]
+
+    with pytest.raises(ValueError, match="Field Gains expects up to 3 real values"):
+        spec.encode("1, 2, 3, 4")
+
+
+def test_numpy_views_are_zero_copy_and_read_only(validation):
+    numpy = pytest.importorskip("numpy")
+    frame = bytearray(struct.pack("<4h", 5, 6, 7, 8))
+    view = validation.to_info.compiled.view(frame)
+
+    samples = view.Samples
+    assert isinstance(samples, numpy.ndarray)
+    assert not samples.flags.writeable
+    frame[0] = 9
+    assert samples[0] == 9
@@ -0,0 +1,259 @@
+"""Tests for the buffer-backed assembly encoders."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from scapy import all as scapy_all
+
+from cipmaster.cip import assembly as cip_assembly
+from cipmaster.cip import config as cip_config
+from cipmaster.cip import fields as cip_fields
+
+
+def _packaged_validation() -> cip_config.CIPValidationResult:
+    files = cip_config.get_available_config_files()
+    path = next(iter(files.values()))
+    validation = cip_config.validate_cip_config(str(path))
+    assert validation.overall_status is True
+    return validation
+
+
+def test_encoder_matches_scapy_build_after_writes():
+    validation = _packaged_validation()
+    assert validation.ot_info is not None
+    packet_class = validation.ot_info.packet_class
+    encoder = validation.ot_info.compiled.new_encoder()
+    reference = packet_class()
+
+    assert bytes(encoder) == bytes(reference)
+
+    writes = {
+        "MPU_CTCMSAlive": 17,
+        "MPU_CDateTimeSec": 1_700_000_000,
+        "MPU_CTrainNum": cip_fields.encode_field_value(packet_class.MPU_CTrainNum, 0x1234),
+        "MPU_CMaintModeAuth": 1,
+        "MPU_COnDmdTestResume": 1,
+        "BCHi_CMaintLang": b"FR",
+        "MPU_CSpeed": cip_fields.encode_field_value(packet_class.MPU_CSpeed, 12.5),
+        "BCHi_CBchFltRst": 1,
+    }
+    for name, value in writes.items():
+        setattr(encoder, name, value)
+        setattr(reference, name, value)
+
+    assert bytes(encoder) == bytes(reference)
+    assert encoder.MPU_CTCMSAlive == 17
+    assert encoder.MPU_CMaintModeAuth == 1
+    assert encoder.BCHi_CMaintLang.rstrip(b"\x00") == b"FR"
+
+    encoder.MPU_CMaintModeAuth = 0
+    reference.MPU_CMaintModeAuth = 0
+    assert bytes(encoder) == bytes(reference)
+
+
+def test_encoder_tracks_dirty_fields_and_caches_frame():
+    validation = _packaged_validation()
+    encoder = validation.ot_info.compiled.new_encoder()
+
+    first = bytes(encoder)
+    assert bytes(encoder) is first
+    assert encoder.pop_dirty() == set()
+
+    encoder.MPU_CTCMSAlive = 3
+    encoder.MPU_CGpsValidity = 1
+    assert encoder.dirty_fields == {"MPU_CTCMSAlive", "MPU_CGpsValidity"}
+
+    second = bytes(encoder)
+    assert second is not first
+    assert second[0] == 3
+    assert encoder.pop_dirty() == {"MPU_CTCMSAlive", "MPU_CGpsValidity"}
+    assert encoder.dirty_fields == frozenset()
+
+
+def test_encoder_publishes_only_committed_updates():
+    compiled = _packaged_validation().ot_info.compiled
+    encoder = compiled.new_encoder()
+
+    encoder.MPU_CTCMSAlive = 1
+    first = encoder.publish()
+    encoder.MPU_CTCMSAlive = 2
+    assert first[0] == 1
+
+    entered, release = threading.Event(), threading.Event()
+
+    def writer() -> None:
+        with encoder.update():
+            encoder.MPU_CTCMSAlive = 3
+            entered.set()
+            release.wait(5)
+            encoder.MPU_CDateTimeSec = 3
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    assert entered.wait(5)
+    assert encoder.publish() is first  # the IO thread neither waits nor sees half the update
+    target = bytearray(len(first))
+    encoder.write_to(memoryview(target))
+    assert target == first  # encoders passed as AppData are committed the same way
+    release.set()
+    thread.join(5)
+
+    second = encoder.publish()
+    assert second is not first
+    assert (second[0], compiled.view(second).MPU_CDateTimeSec) == (3, 3)
+    assert encoder.publish() is first
+
+
+def test_every_field_write_waits_for_the_update_lock():
+    encoder = _packaged_validation().ot_info.compiled.new_encoder()
+    held, release = threading.Event(), threading.Event()
+
+    def holder() -> None:
+        with encoder._update_lock:
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    assert held.wait(5)
+    writer = threading.Thread(target=setattr, args=(encoder, "MPU_CDateTimeSec", 5))
+    writer.start()
+    writer.join(0.05)
+    assert writer.is_alive()  # a struct field write waits like a bit field write
+    assert encoder.MPU_CDateTimeSec == 0
+    release.set()
+    writer.join(5)
+    thread.join(5)
+    assert encoder.MPU_CDateTimeSec == 5
+    assert "MPU_CDateTimeSec" in encoder.dirty_fields
+
+
+def test_publish_waits_for_a_single_write_instead_of_skipping_the_commit():
+    encoder = _packaged_validation().ot_info.compiled.new_encoder()
+    encoder.MPU_CTCMSAlive = 7
+    held, release = threading.Event(), threading.Event()
+
+    def bit_writer() -> None:
+        # A bit field write holds the lock for its read-modify-write.
+        with encoder._update_lock:
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=bit_writer)
+    thread.start()
+    assert held.wait(5)
+    threading.Timer(0.05, release.set).start()
+    published = encoder.publish()
+    thread.join(5)
+
+    assert published[0] == 7  # the heartbeat written just before is sent
+
+
+def test_encoder_notifies_each_commit_once():
+    encoder = _packaged_validation().ot_info.compiled.new_encoder()
+    commits = []
+    encoder.set_commit_listener(lambda: commits.append(encoder.MPU_CTCMSAlive))
+
+    encoder.MPU_CTCMSAlive = 1
+    with encoder.update():
+        encoder.MPU_CTCMSAlive = 2
+        encoder.MPU_CDateTimeSec = 2
+        with encoder.update():
+            encoder.MPU_CTCMSAlive = 3
+    encoder.load(bytes(encoder))
+    encoder.set_commit_listener(None)
+    encoder.MPU_CTCMSAlive = 4
+
+    assert commits == [1, 3, 3]
+
+
+def test_multi_byte_bit_fields_round_trip():
+    class Packet(scapy_all.Packet):
+        name = "Packet"
+        fields_desc = [
+            scapy_all.BitField("head", 0, 3),
+            scapy_all.BitField("wide", 0, 10),
+            scapy_all.BitField("tail", 0, 3),
+            scapy_all.ByteField("value", 0),
+        ]
+
+    compiled = cip_assembly.compile_packet_class(Packet)
+    encoder = compiled.new_encoder()
+    reference = Packet()
+    for name, value in (("head", 5), ("wide", 0x2A5), ("tail", 6), ("value", 9)):
+        setattr(encoder, name, value)
+        setattr(reference, name, value)
+
+    assert bytes(encoder) == bytes(reference)
+    assert encoder.wide == 0x2A5
+    assert encoder.get_field("wide") is Packet.wide
+
+
+def test_compile_rejects_unaligned_layout():
+    class Broken(scapy_all.Packet):
+        name = "Broken"
+        fields_desc = [scapy_all.BitField("flag", 0, 1), scapy_all.ByteField("value", 0)]
+
+    with pytest.raises(ValueError):
+        cip_assembly.compile_packet_class(Broken)
+
+
+def test_view_decodes_fields_like_scapy_dissection():
+    validation = _packaged_validation()
+    packet_class = validation.to_info.packet_class
+    reference = packet_class(
+        BCHi_IDevIsAlive=4,
+        BCHi_ISerialNum=0x0102,
+        BCHi_IOper=1,
+        BCHi_IAutoTestOk=1,
+        BCHi_IBattFltCodStatus=b"ERR",
+    )
+    frame = bytes(reference)
+    dissected = packet_class(frame)
+
+    view = validation.to_info.compiled.view(frame)
+
+    assert len(view) == len(frame)
+    assert bytes(view) == frame
+    for field in view.fields_desc:
+        assert getattr(view, field.name) == getattr(dissected, field.name), field.name
+    assert view.get_field("BCHi_IOper") is packet_class.BCHi_IOper
+
+
+def test_view_is_read_only_and_pads_short_frames():
+    validation = _packaged_validation()
+    compiled = validation.to_info.compiled
+
+    view = compiled.view(b"\x05")
+    assert view.BCHi_IDevIsAlive == 5
+    assert view.BCHi_INetwVersionX == 0
+    assert len(view) == compiled.size
+
+    with pytest.raises(AttributeError):
+        view.BCHi_IDevIsAlive = 1
+
+
+def test_view_buffers_refill_views_in_turn():
+    compiled = _packaged_validation().to_info.compiled
+    views = cip_assembly.ViewBuffers(compiled.view_class)
+    frame = bytearray(compiled.size)
+
+    frame[0] = 1
+    first = views.load(frame)
+    frame[0] = 2
+    second = views.load(memoryview(frame))
+    assert first is not second
+    assert (first.BCHi_IDevIsAlive, second.BCHi_IDevIsAlive) == (1, 2)
+
+    third = views.load(b"\x03")
+    assert third is first
+    assert third.BCHi_IDevIsAlive == 3
+    assert bytes(third) == b"\x03" + bytes(compiled.size - 1)
+    assert views.load(bytes(frame) + b"\xff") is second
+    assert bytes(second) == bytes(frame)
+
+    with pytest.raises(ValueError):
+        cip_assembly.ViewBuffers(compiled.view_class, count=1)
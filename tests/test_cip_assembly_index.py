@@ -0,0 +1,91 @@
+"""Tests for indexing several assemblies per configuration."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from textwrap import dedent
+
+from cipmaster.cip import cache as cip_cache
+from cipmaster.cip import config as cip_config
+
+CONFIG = dedent(
+    """
+    <cip>
+      <assembly id="AS_HEARTBEAT_TO" dir="out" instanceId="0xFE" size="0" subtype="TO" />
+      <assembly id="AS_OT_A" dir="in" size="16" subtype="OT_EO" instanceId="0x65">
+        <usint id="AliveA" offset="0" />
+      </assembly>
+      <assembly id="AS_OT_B" dir="in" size="32" subtype="OT_EO" instanceId="0x67">
+        <uint id="WordB" offset="0" />
+        <usint id="Clash" offset="8" />
+      </assembly>
+      <assembly id="AS_TO_A" dir="out" size="8" subtype="TO" instanceId="0x64">
+        <usint id="Command" offset="0" />
+      </assembly>
+      <assembly id="AS_TO_B" dir="out" size="16" subtype="TO" instanceId="0x66">
+        <usint id="StatusB" offset="8" />
+      </assembly>
+    </cip>
+    """
+).strip()
+
+
+def _write_config(tmp_path: Path) -> Path:
+    xml_path = tmp_path / "multi.xml"
+    xml_path.write_text(CONFIG)
+    return xml_path
+
+
+def test_all_assemblies_are_indexed_without_compiling(tmp_path: Path):
+    validation = cip_config.validate_cip_config(str(_write_config(tmp_path)), use_cache=False)
+
+    assert validation.overall_status is True
+    index = validation.assemblies
+    assert list(index) == ["AS_HEARTBEAT_TO", "AS_OT_A", "AS_OT_B", "AS_TO_A", "AS_TO_B"]
+    assert [info.id for info in index.with_subtype("OT_EO")] == ["AS_OT_A", "AS_OT_B"]
+    assert index.by_instance(0x66) is index["AS_TO_B"]
+    assert index.by_instance(0xFE, "OT_EO") is None
+    assert validation.ot_info is index["AS_OT_A"]
+    assert validation.to_info is index["AS_TO_A"]
+
+    assert index.compiled_ids() == []
+    assert not index["AS_OT_B"].layout_compiled
+
+
+def test_assemblies_compile_on_first_use(tmp_path: Path):
+    validation = cip_config.validate_cip_config(str(_write_config(tmp_path)), use_cache=False)
+    index = validation.assemblies
+
+    encoder = index["AS_TO_B"].compiled.new_encoder()
+    encoder.StatusB = 7
+
+    assert index.compiled_ids() == ["AS_TO_B"]
+    assert bytes(encoder) == b"\x00\x07"
+    assert not index["AS_OT_B"].layout.valid
+
+
+def test_cached_index_compiles_other_assemblies_lazily(tmp_path: Path):
+    xml_path = _write_config(tmp_path)
+    cache = cip_cache.LayoutCache(tmp_path / "cache")
+
+    cip_config.validate_cip_config(str(xml_path), cache=cache)
+    validation = cip_config.validate_cip_config(str(xml_path), cache=cache)
+
+    assert validation.root is None
+    index = validation.assemblies
+    assert index["AS_OT_A"].layout_compiled
+    assert not index["AS_TO_B"].layout_compiled
+    assert index["AS_TO_B"].instance == 0x66
+    assert [signal.name for signal in index["AS_TO_B"].layout.signals] == ["StatusB"]
+    assert validation.to_info is index["AS_TO_A"]
+
+
+def test_duplicate_assembly_ids_fail_validation(tmp_path: Path):
+    xml_path = tmp_path / "duplicate.xml"
+    xml_path.write_text(CONFIG.replace('id="AS_TO_B"', 'id="AS_TO_A"'))
+
+    validation = cip_config.validate_cip_config(str(xml_path), use_cache=False)
+
+    assert dict(validation.results)["Unique Assembly Ids"] == "FAILED: AS_TO_A"
+    assert validation.overall_status is False
+    assert validation.assemblies.by_instance(0x64) is validation.assemblies["AS_TO_A"]
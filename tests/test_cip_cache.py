@@ -0,0 +1,115 @@
+"""Tests for the persistent compiled layout cache."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from textwrap import dedent
+
+from cipmaster.cip import cache as cip_cache
+from cipmaster.cip import config as cip_config
+
+CONFIG = dedent(
+    """
+    <cip>
+      <assembly id="AS_OT" dir="in" size="64" subtype="OT_EO" instanceId="0x65">
+        <usint id="Alive" offset="0" />
+        <bool id="Flag" offset="9" />
+        <real id="Speed" offset="32" />
+      </assembly>
+      <assembly id="AS_TO" dir="out" size="16" subtype="TO" instanceId="0x64">
+        <usint id="Command" offset="0" />
+      </assembly>
+    </cip>
+    """
+).strip()
+
+
+def _write_config(tmp_path: Path, content: str = CONFIG) -> Path:
+    xml_path = tmp_path / "cached.xml"
+    xml_path.write_text(content)
+    return xml_path
+
+
+def _count_parses(monkeypatch) -> list[bytes]:
+    calls: list[bytes] = []
+    original = cip_config._validate_content
+
+    def counting(content: bytes):  # type: ignore[no-untyped-def]
+        calls.append(content)
+        return original(content)
+
+    monkeypatch.setattr(cip_config, "_validate_content", counting)
+    return calls
+
+
+def test_cache_hit_skips_parsing_and_preserves_results(tmp_path: Path, monkeypatch):
+    xml_path = _write_config(tmp_path)
+    cache = cip_cache.LayoutCache(tmp_path / "cache")
+    parses = _count_parses(monkeypatch)
+
+    first = cip_config.validate_cip_config(str(xml_path), cache=cache)
+    second = cip_config.validate_cip_config(str(xml_path), cache=cache)
+
+    assert len(parses) == 1
+    assert first.results == second.results
+    assert second.overall_status is True
+    assert second.root is None
+    assert second.ot_info.layout == first.ot_info.layout
+    assert second.ot_info.assembly.attrib["size"] == "64"
+    assert second.ot_info.assembly_size == 64
+
+    encoder = second.ot_info.compiled.new_encoder()
+    encoder.Alive = 5
+    encoder.Flag = 1
+    assert bytes(encoder) == bytes(first.ot_info.packet_class(Alive=5, Flag=1))
+
+
+def test_cache_is_invalidated_by_content_and_code_changes(tmp_path: Path, monkeypatch):
+    xml_path = _write_config(tmp_path)
+    cache = cip_cache.LayoutCache(tmp_path / "cache")
+    parses = _count_parses(monkeypatch)
+
+    cip_config.validate_cip_config(str(xml_path), cache=cache)
+    xml_path.write_text(CONFIG.replace('size="16"', 'size="24"'))
+    changed = cip_config.validate_cip_config(str(xml_path), cache=cache)
+    assert len(parses) == 2
+    assert changed.to_info.assembly_size == 24
+
+    monkeypatch.setattr(cip_cache, "code_version", lambda: "next-release")
+    cip_config.validate_cip_config(str(xml_path), cache=cache)
+    assert len(parses) == 3
+
+
+def test_corrupt_entries_are_treated_as_misses(tmp_path: Path, monkeypatch):
+    xml_path = _write_config(tmp_path)
+    cache = cip_cache.LayoutCache(tmp_path / "cache")
+    parses = _count_parses(monkeypatch)
+
+    cip_config.validate_cip_config(str(xml_path), cache=cache)
+    for entry in (tmp_path / "cache").glob("*.json"):
+        entry.write_text("{not json")
+
+    validation = cip_config.validate_cip_config(str(xml_path), cache=cache)
+
+    assert len(parses) == 2
+    assert validation.overall_status is True
+
+
+def test_use_cache_false_always_parses(tmp_path: Path, monkeypatch):
+    xml_path = _write_config(tmp_path)
+    parses = _count_parses(monkeypatch)
+
+    cip_config.validate_cip_config(str(xml_path), use_cache=False)
+    validation = cip_config.validate_cip_config(str(xml_path), use_cache=False)
+
+    assert len(parses) == 2
+    assert validation.root is not None
+
+
+def test_prune_keeps_most_recent_entries(tmp_path: Path):
+    cache = cip_cache.LayoutCache(tmp_path / "cache", max_entries=2)
+
+    for index in range(4):
+        cache.store(cache.key(str(index).encode()), {"results": [], "assemblies": {}})
+
+    assert len(list((tmp_path / "cache").glob("*.json"))) == 2
@@ -0,0 +1,121 @@
+"""Tests for the cross-configuration signal catalog."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from textwrap import dedent
+
+from cipmaster.cip.catalog import SignalCatalog, SignalLocation
+
+CONFIG = dedent(
+    """
+    <cip>
+      <assembly id="AS_OT" dir="in" size="32" subtype="OT_EO">
+        <usint id="MPU_CTCMSAlive" offset="0" />
+        <string id="MPU_CLabel" offset="8" length="3" />
+      </assembly>
+      <assembly id="AS_TO" dir="out" size="16" subtype="TO">
+        <usint id="BCHi_IDevIsAlive" offset="0" />
+        <bool id="BCHi_IOper" offset="9" />
+      </assembly>
+    </cip>
+    """
+).strip()
+
+
+def _catalog(tmp_path: Path) -> SignalCatalog:
+    return SignalCatalog(tmp_path / "catalog.sqlite3")
+
+
+def test_find_by_exact_name_substring_and_glob(tmp_path: Path):
+    first = tmp_path / "a.xml"
+    second = tmp_path / "b.xml"
+    first.write_text(CONFIG)
+    second.write_text(CONFIG.replace('offset="9"', 'offset="12"'))
+
+    with _catalog(tmp_path) as catalog:
+        stats = catalog.refresh([first, second])
+        assert stats.indexed == 2
+
+        assert catalog.find("BCHi_IOper") == [
+            SignalLocation("BCHi_IOper", str(first.resolve()), "AS_TO", 9, "bool", 1),
+            SignalLocation("BCHi_IOper", str(second.resolve()), "AS_TO", 12, "bool", 1),
+        ]
+        assert {match.name for match in catalog.find("Alive")} == {"MPU_CTCMSAlive", "BCHi_IDevIsAlive"}
+        assert {match.name for match in catalog.find("MPU_*")} == {"MPU_CTCMSAlive", "MPU_CLabel"}
+        assert catalog.find("MPU_CLabel", limit=1)[0].length == 3
+        assert catalog.find("Missing") == []
+
+
+def test_refresh_is_incremental(tmp_path: Path):
+    xml_path = tmp_path / "a.xml"
+    xml_path.write_text(CONFIG)
+
+    with _catalog(tmp_path) as catalog:
+        catalog.refresh([xml_path])
+        assert catalog.refresh([xml_path]).unchanged == 1
+
+        stat = xml_path.stat()
+        os.utime(xml_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+        touched = catalog.refresh([xml_path])
+        assert (touched.unchanged, touched.indexed) == (1, 0)
+
+        xml_path.write_text(CONFIG.replace("BCHi_IOper", "BCHi_IOperational"))
+        assert catalog.refresh([xml_path]).indexed == 1
+        assert catalog.find("BCHi_IOper")[0].name == "BCHi_IOperational"
+
+
+def test_refresh_prunes_missing_files_and_persists(tmp_path: Path):
+    kept = tmp_path / "kept.xml"
+    dropped = tmp_path / "dropped.xml"
+    kept.write_text(CONFIG)
+    dropped.write_text(CONFIG.replace("MPU_CTCMSAlive", "OnlyInDropped"))
+
+    with _catalog(tmp_path) as catalog:
+        catalog.refresh([kept, dropped])
+        assert catalog.find("OnlyInDropped")
+        assert catalog.refresh([kept]).removed == 1
+
+    with _catalog(tmp_path) as catalog:
+        assert catalog.file_count() == 1
+        assert catalog.find("OnlyInDropped") == []
+        assert catalog.find("BCHi_IOper")[0].path == str(kept.resolve())
+
+
+def test_refresh_with_roots_prunes_only_inside_them(tmp_path: Path):
+    scanned = tmp_path / "scanned"
+    elsewhere = tmp_path / "elsewhere"
+    scanned.mkdir()
+    elsewhere.mkdir()
+    (scanned / "gone.xml").write_text(CONFIG.replace("MPU_CTCMSAlive", "OnlyInGone"))
+    (elsewhere / "kept.xml").write_text(CONFIG.replace("MPU_CTCMSAlive", "OnlyInKept"))
+    (elsewhere / "deleted.xml").write_text(CONFIG.replace("MPU_CTCMSAlive", "OnlyInDeleted"))
+
+    with _catalog(tmp_path) as catalog:
+        catalog.refresh([scanned / "gone.xml", elsewhere / "kept.xml", elsewhere / "deleted.xml"])
+        (scanned / "gone.xml").rename(tmp_path / "moved.xml")
+        (elsewhere / "deleted.xml").unlink()
+
+        assert catalog.refresh([], roots=[scanned]).removed == 2
+        assert catalog.find("OnlyInKept")
+        assert catalog.find("OnlyInGone") == catalog.find("OnlyInDeleted") == []
+
+
+def test_declarations_rejected_by_the_layout_are_flagged(tmp_path: Path):
+    xml_path = tmp_path / "broken.xml"
+    xml_path.write_text(
+        CONFIG.replace('<string id="MPU_CLabel" offset="8" length="3" />', '<usint id="MPU_CLabel" offset="4" />').replace(
+            '<bool id="BCHi_IOper" offset="9" />', '<float id="BCHi_IOper" offset="8" />'
+        )
+    )
+
+    with _catalog(tmp_path) as catalog:
+        catalog.refresh([xml_path])
+        label = catalog.find("MPU_CLabel")
+        oper = catalog.find("BCHi_IOper")
+        alive = catalog.find("BCHi_IDevIsAlive")
+
+    assert [(match.offset, match.problem) for match in label] == [(4, "MPU_CLabel at offset 4 is not byte aligned")]
+    assert oper[0].problem == "BCHi_IOper has unsupported type 'float'"
+    assert alive[0].problem is None
@@ -0,0 +1,122 @@
+"""Tests for the precomputed per-assembly field tables."""
+
+from __future__ import annotations
+
+import pytest
+
+from cipmaster.cip import config as cip_config
+from cipmaster.cip import fields as cip_fields
+
+
+def _packaged_validation() -> cip_config.CIPValidationResult:
+    files = cip_config.get_available_config_files()
+    return cip_config.validate_cip_config(str(next(iter(files.values()))))
+
+
+def _legacy_encode(packet_class, name, value):
+    return cip_fields.encode_field_value(
+        getattr(packet_class, name),
+        value,
+        field_name=name,
+        metadata=packet_class.signal_info.get(name),
+    )
+
+
+@pytest.mark.parametrize(
+    ("name", "value"),
+    [
+        ("MPU_CTCMSAlive", "0x2A"),
+        ("MPU_CTrainNum", 4660),
+        ("MPU_CSpeed", "12.5"),
+        ("MPU_CMaintModeAuth", "true"),
+        ("BCHi_CMaintLang", "FR"),
+    ],
+)
+def test_field_spec_encodes_like_the_codec_functions(name: str, value):
+    packet_class = _packaged_validation().ot_info.packet_class
+    spec = cip_fields.field_table(packet_class)[name]
+
+    assert spec.encode(value) == _legacy_encode(packet_class, name, value)
+    assert spec.decode(spec.encode(value)) == cip_fields.decode_field_value(
+        spec.field, spec.encode(value), metadata=packet_class.signal_info.get(name)
+    )
+
+
+@pytest.mark.parametrize(
+    ("name", "value"),
+    [("MPU_CTCMSAlive", 300), ("MPU_CTrainNum", "abc"), ("MPU_CMaintModeAuth", 2), ("BCHi_CMaintLang", "TOO LONG")],
+)
+def test_field_spec_reports_the_same_errors(name: str, value):
+    packet_class = _packaged_validation().ot_info.packet_class
+    spec = cip_fields.field_table(packet_class)[name]
+
+    with pytest.raises(ValueError) as legacy:
+        _legacy_encode(packet_class, name, value)
+    with pytest.raises(ValueError) as fast:
+        spec.encode(value)
+
+    assert str(fast.value) == str(legacy.value)
+
+
+def test_field_table_is_cached_per_class_and_shared_by_encoders():
+    info = _packaged_validation().ot_info
+    encoder = info.compiled.new_encoder()
+    table = cip_fields.field_table(encoder)
+
+    assert cip_fields.field_table(info.compiled.new_encoder()) is table
+    assert list(table) == [field.name for field in encoder.fields_desc]
+    spec = table["MPU_CSpeed"]
+    assert spec.offset == info.packet_class.signal_info["MPU_CSpeed"]["offset"]
+    assert spec.codec_name == "float"
+    with pytest.raises(TypeError):
+        spec.validation["range"] = (0, 1)  # type: ignore[index]
+    with pytest.raises(AttributeError):
+        spec.unknown = 1  # type: ignore[attr-defined]
+
+    encoder.MPU_CSpeed = spec.encode(3.5)
+    assert dict(table.decode_all(encoder))["MPU_CSpeed"] == 3.5
+
+
+def test_signed_and_double_signals_have_range_checked_codecs():
+    from cipmaster.cip.assembly import compile_assembly
+    from cipmaster.cip.layout import SignalSpec, compile_layout
+
+    layout = compile_layout(
+        "AS_WIDE",
+        176,
+        [
+            SignalSpec("Trim", "int", 0),
+            SignalSpec("Count", "dint", 16),
+            SignalSpec("Odometer", "lint", 48),
+            SignalSpec("Position", "lreal", 112),
+        ],
+    )
+    compiled = compile_assembly(layout, cip_config.build_packet_class(layout))
+    encoder = compiled.new_encoder()
+    table = cip_fields.field_table(encoder)
+
+    assert {name: spec.codec_name for name, spec in table.items()} == {
+        "Trim": "signed",
+        "Count": "signed",
+        "Odometer": "signed",
+        "Position": "double",
+    }
+    assert table["Trim"].validation["range"] == (-0x8000, 0x7FFF)
+    encoder.Trim = table["Trim"].encode("-16")
+    encoder.Count = table["Count"].encode(-(1 << 31))
+    encoder.Odometer = table["Odometer"].encode((1 << 63) - 1)
+    encoder.Position = table["Position"].encode("-2.25")
+    assert table.decode_all(encoder) == [
+        ("Trim", -16),
+        ("Count", -(1 << 31)),
+        ("Odometer", (1 << 63) - 1),
+        ("Position", -2.25),
+    ]
+    assert bytes(encoder)[:2] == b"\xf0\xff"
+    with pytest.raises(ValueError, match="within range"):
+        table["Trim"].encode(0x8000)
+    with pytest.raises(ValueError, match="within range"):
+        table["Odometer"].encode(1 << 63)
+    with pytest.raises(ValueError, match="floating point"):
+        table["Position"].encode("fast")
+    assert table["Count"].clear_value == 0
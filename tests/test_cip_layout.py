@@ -0,0 +1,120 @@
+"""Tests for the assembly layout compiler."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from textwrap import dedent
+
+from cipmaster.cip import config as cip_config
+from cipmaster.cip.layout import SignalSpec, SkipSpan, compile_layout
+
+
+def test_compile_layout_represents_gaps_as_skip_spans():
+    layout = compile_layout(
+        "AS_TEST",
+        64,
+        [
+            SignalSpec("Speed", "real", 32),
+            SignalSpec("Alive", "usint", 0),
+            SignalSpec("Flag", "bool", 10),
+        ],
+    )
+
+    assert layout.valid
+    assert [signal.name for signal in layout.signals] == ["Alive", "Flag", "Speed"]
+    assert layout.gaps == (SkipSpan(8, 2), SkipSpan(11, 21))
+    assert [type(item).__name__ for item in layout.items()] == [
+        "SignalSpec",
+        "SkipSpan",
+        "SignalSpec",
+        "SkipSpan",
+        "SignalSpec",
+    ]
+
+
+def test_compile_layout_reports_overlaps_and_misalignment():
+    layout = compile_layout(
+        "AS_TEST",
+        32,
+        [
+            SignalSpec("Word", "uint", 0),
+            SignalSpec("Inside", "bool", 9),
+            SignalSpec("Shifted", "usint", 17),
+            SignalSpec("TooFar", "udint", 16),
+            SignalSpec("Odd", "widget", 24),
+        ],
+    )
+
+    assert not layout.valid
+    assert [signal.name for signal in layout.signals] == ["Word"]
+    assert any("Inside" in error and "overlaps Word" in error for error in layout.errors)
+    assert any("Shifted" in error and "byte aligned" in error for error in layout.errors)
+    assert any("TooFar" in error and "beyond" in error for error in layout.errors)
+    assert any("Odd" in error and "unsupported type" in error for error in layout.errors)
+
+
+def test_compile_layout_scales_with_signal_count():
+    declarations = [SignalSpec(f"Flag{index}", "bool", index * 2) for index in range(20000)]
+
+    layout = compile_layout("AS_LARGE", 40000, reversed(declarations))
+
+    assert layout.valid
+    assert len(layout.signals) == 20000
+    assert len(layout.gaps) == 20000
+
+
+def test_validate_cip_config_fails_on_overlapping_signals(tmp_path: Path):
+    xml_path = tmp_path / "overlap.xml"
+    xml_path.write_text(
+        dedent(
+            """
+            <cip>
+              <assembly id="AS_OT" dir="in" size="32" subtype="OT_EO">
+                <uint id="Word" offset="0" />
+                <usint id="Clash" offset="8" />
+              </assembly>
+              <assembly id="AS_TO" dir="out" size="16" subtype="TO">
+                <usint id="Command" offset="0" />
+              </assembly>
+            </cip>
+            """
+        ).strip()
+    )
+
+    validation = cip_config.validate_cip_config(str(xml_path))
+
+    statuses = dict(validation.results)
+    assert statuses["Layout of Assembly 'OT_EO'"].startswith("FAILED: Clash")
+    assert statuses["Layout of Assembly 'TO'"] == "OK"
+    assert validation.overall_status is False
+
+
+def test_packet_class_pads_skip_spans_without_spare_fields(tmp_path: Path):
+    xml_path = tmp_path / "sparse.xml"
+    xml_path.write_text(
+        dedent(
+            """
+            <cip>
+              <assembly id="AS_OT" dir="in" size="1024" subtype="OT_EO">
+                <bool id="First" offset="3" />
+                <usint id="Last" offset="1016" />
+              </assembly>
+              <assembly id="AS_TO" dir="out" size="8" subtype="TO">
+                <usint id="Command" offset="0" />
+              </assembly>
+            </cip>
+            """
+        ).strip()
+    )
+
+    validation = cip_config.validate_cip_config(str(xml_path))
+
+    assert validation.overall_status is True
+    packet_class = validation.ot_info.packet_class
+    assert len(packet_class.fields_desc) == 5
+    assert len(packet_class()) == 128
+    encoder = validation.ot_info.compiled.new_encoder()
+    assert [field.name for field in encoder.fields_desc] == ["First", "Last"]
+    encoder.First = 1
+    encoder.Last = 0xAB
+    assert bytes(encoder) == bytes(packet_class(First=1, Last=0xAB))
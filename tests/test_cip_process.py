@@ -0,0 +1,183 @@
+"""Tests for the process-isolated IO engine."""
+
+from __future__ import annotations
+
+import queue
+import time
+
+import pytest
+
+from cipmaster.cip import process as cip_process
+from cipmaster.cip.layout import SignalSpec, compile_layout
+from cipmaster.cip.process import ProcessSession, SeqlockRegion, SharedAssemblies, detach_encoder, shared_encoder
+from cipmaster.cip.session import ConnectionParameters
+
+LAYOUT = compile_layout(
+    "AS_ECHO",
+    64,
+    [
+        SignalSpec("MPU_CTCMSAlive", "usint", 0),
+        SignalSpec("MPU_CDateTimeSec", "udint", 16),
+        SignalSpec("Speed", "uint", 48),
+    ],
+)
+
+
+class _Frame:
+    def __init__(self, payload: bytes) -> None:
+        self.payload = payload
+
+
+class _EchoClient:
+    """Target stand-in that answers every OT frame with the same bytes as a TO frame.
+
+    Defined at module level so the IO process can unpickle it.
+    """
+
+    def __init__(self, IPAddr: str, MulticastGroupIPaddr: str) -> None:
+        self.connected = True
+        self.ot_api = self.to_api = 10_000
+        self.connection_timeout_multiplier = 3
+        self._frames: queue.Queue = queue.Queue()
+
+    def forward_open(self) -> bool:
+        return True
+
+    def forward_close(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def send_UDP_ENIP_CIP_IO(self, *, CIP_Sequence_Count, Header, AppData) -> None:  # type: ignore[no-untyped-def]
+        self._frames.put(bytes(AppData))
+
+    def recv_UDP_ENIP_CIP_IO(self, debug: bool, timeout: float):  # type: ignore[no-untyped-def]
+        try:
+            return _Frame(self._frames.get(timeout=timeout))
+        except queue.Empty:
+            return None
+
+
+class _SlowEchoClient(_EchoClient):
+    def __init__(self, IPAddr: str, MulticastGroupIPaddr: str) -> None:
+        super().__init__(IPAddr, MulticastGroupIPaddr)
+        self.ot_api = self.to_api = 2_000_000
+
+
+def test_seqlock_region_round_trips_and_keeps_the_sequence_even():
+    region = SeqlockRegion(memoryview(bytearray(SeqlockRegion.span(3))), 3)
+
+    region.write(b"abc")
+    with region.writing() as data:
+        assert region.sequence % 2 == 1
+        data[1:2] = b"X"
+
+    assert region.read_sequenced() == (4, b"aXc")
+
+
+def test_seqlock_region_reader_gives_up_on_an_abandoned_write(monkeypatch):
+    region = SeqlockRegion(memoryview(bytearray(SeqlockRegion.span(2))), 2)
+    monkeypatch.setattr(cip_process, "_READ_ATTEMPTS", 3)
+    writing = region.writing()
+    writing.__enter__()
+
+    with pytest.raises(RuntimeError):
+        region.read()
+
+
+def test_shared_encoder_writes_through_until_detached():
+    assembly = cip_process._compile(LAYOUT)
+    shared = SharedAssemblies(assembly.size, assembly.size)
+    try:
+        encoder = shared_encoder(assembly, shared.ot)
+        encoder.Speed = 0x1234
+        assert assembly.view(shared.ot.read()).Speed == 0x1234
+        assert shared.ot.sequence == 2
+
+        with encoder.update():
+            encoder.Speed = 0x4321
+            assert shared.ot.sequence % 2 == 1
+        assert shared.ot.sequence == 4
+
+        detach_encoder(encoder)
+        encoder.Speed = 7
+        assert assembly.view(shared.ot.read()).Speed == 0x4321
+        assert encoder.Speed == 7
+    finally:
+        shared.close()
+
+
+def _wait_for(predicate, timeout: float = 30.0):  # type: ignore[no-untyped-def]
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.01)
+    raise AssertionError("condition not reached in time")
+
+
+def test_process_session_exchanges_assemblies_through_shared_memory():
+    timeouts = []
+    session = ProcessSession(client_factory=_EchoClient, report_interval=0.1, on_connection_timeout=timeouts.append)
+    ot_packet = cip_process._compile(LAYOUT).new_encoder()
+    ot_packet.Speed = 11
+
+    encoder = session.start(
+        ip_address="192.0.2.1",
+        multicast_address="239.192.1.1",
+        connection_params=ConnectionParameters(ot_param=0x4808, to_param=0x2808),
+        ot_layout=LAYOUT,
+        to_layout=LAYOUT,
+        ot_packet=ot_packet,
+    )
+    try:
+        assert encoder.Speed == 11
+        encoder.Speed = 4321
+        echoed = _wait_for(lambda: (packet := session.to_snapshot()) is not None and packet.Speed == 4321 and packet)
+        assert echoed.MPU_CTCMSAlive or _wait_for(lambda: session.to_snapshot().MPU_CTCMSAlive)
+        assert abs(echoed.MPU_CDateTimeSec - time.time()) < 60
+        _wait_for(lambda: session.timing is not None and session.transmit_stats.cycles > 0)
+    finally:
+        session.stop()
+
+    assert not session.running
+    assert not session.error_occurred
+    assert session.last_to_packet.Speed == 4321
+    assert session.to_snapshot() is None
+    assert session.sequence_tracker is not None
+    assert timeouts == []
+    encoder.Speed = 5  # still usable on its private copy
+    assert encoder.Speed == 5
+
+
+def test_process_session_forwards_changes_of_state():
+    session = ProcessSession(client_factory=_SlowEchoClient, report_interval=0.1, production_inhibit=0.001)
+    encoder = session.start(
+        ip_address="192.0.2.1",
+        multicast_address="239.192.1.1",
+        connection_params=ConnectionParameters(ot_param=0x4808, to_param=0x2808),
+        ot_layout=LAYOUT,
+        to_layout=LAYOUT,
+    )
+    try:
+        _wait_for(lambda: (packet := session.to_snapshot()) is not None and packet.MPU_CTCMSAlive)
+        encoder.Speed = 4321
+        started = time.monotonic()
+        _wait_for(lambda: session.to_snapshot().Speed == 4321)
+        assert time.monotonic() - started < 1.0  # well inside the 2 s packet interval
+        _wait_for(lambda: session.change_stats.sends > 0)
+    finally:
+        session.stop()
+
+    assert not session.error_occurred
+    assert session.timing_report()["change_of_state"]["sends"] >= 1
+
+
+def test_process_session_does_not_profile_across_processes():
+    session = ProcessSession()
+
+    with pytest.raises(RuntimeError):
+        session.start_profiling()
+    assert session.stop_profiling() is None
@@ -0,0 +1,134 @@
+"""Tests for the per-stage IO cycle profiler."""
+
+from __future__ import annotations
+
+import pstats
+import threading
+import time
+
+from scapy import all as scapy_all
+
+from cipmaster.cip.profiler import PROFILE_HEADERS, CycleProfiler
+from cipmaster.cip.session import CIPSession
+
+
+class _ToPacket(scapy_all.Packet):
+    name = "ToPacket"
+    fields_desc = [scapy_all.ByteField("value", 0)]
+
+
+class _OtPacket(scapy_all.Packet):
+    name = "OtPacket"
+    fields_desc = [scapy_all.ByteField("MPU_CTCMSAlive", 0)]
+
+
+class _Payload:
+    payload = b"\x05"
+
+
+class _Client:
+    def __init__(self) -> None:
+        self.sent = 0
+        self.receive_stage_timer = None
+        self.send_stage_timer = None
+
+    def recv_UDP_ENIP_CIP_IO(self, debug: bool, timeout: float):
+        time.sleep(0.002)
+        return _Payload()
+
+    def send_UDP_ENIP_CIP_IO(self, **_):  # type: ignore[no-untyped-def]
+        self.sent += 1
+
+
+def _run_session(session: CIPSession, client: _Client, frames: int) -> None:
+    updates = []
+
+    def update_to_packet(pkt: _ToPacket) -> None:
+        updates.append(pkt.value)
+        if len(updates) >= frames and client.sent >= frames:
+            session._stop_event.set()  # type: ignore[attr-defined]
+
+    assert not session.manage_io_communication(
+        client,  # type: ignore[arg-type]
+        to_packet_class=_ToPacket,
+        ot_packet=_OtPacket(),
+        heartbeat_callback=lambda *_: None,
+        update_to_packet=update_to_packet,
+        rpi=0.002,
+    )
+
+
+def test_stage_timer_laps_consecutive_stages():
+    profiler = CycleProfiler()
+    timer = profiler.timer()
+
+    assert profiler.timer() is timer
+    time.sleep(0.01)
+    timer.lap("wait")
+    timer.lap("receive")
+
+    assert profiler.wall["wait"].count == 1
+    assert profiler.wall["wait"].max >= 0.009
+    assert profiler.cpu["wait"].max < profiler.wall["wait"].max
+    assert profiler.wall["receive"].max < 0.009
+    rows = profiler.rows()
+    assert [row[0] for row in rows] == ["wait", "receive"]
+    assert all(len(row) == len(PROFILE_HEADERS) for row in rows)
+
+
+def test_session_records_stages_only_while_profiling():
+    session = CIPSession(drain_receive=False)
+    client = _Client()
+    _run_session(session, client, 5)
+    assert session.profiler is None and session.last_profile is None
+
+    session._stop_event.clear()  # type: ignore[attr-defined]
+    profiler = session.start_profiling()
+    _run_session(session, client, 10)
+
+    for stage in ("to_decode", "update_to_packet", "heartbeat", "tx_wait"):
+        assert profiler.wall[stage].count > 0, stage
+    assert profiler.wall["tx_wait"].max >= 0.001
+    assert client.receive_stage_timer is None and client.send_stage_timer is None
+    assert session.stop_profiling() is profiler
+    assert session.last_profile is profiler and session.profiler is None
+
+
+def test_cprofile_statistics_cover_the_io_threads(tmp_path):
+    session = CIPSession(drain_receive=False)
+    session.start_profiling(cprofile=True)
+    _run_session(session, _Client(), 5)
+    profiler = session.stop_profiling()
+
+    path = tmp_path / "io.prof"
+    profiler.write_cprofile(path)
+
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert "recv_UDP_ENIP_CIP_IO" in functions
+    assert "send_UDP_ENIP_CIP_IO" in functions
+
+
+def test_stack_sampler_writes_collapsed_stacks(tmp_path):
+    profiler = CycleProfiler(sample_interval=0.001)
+    stop = threading.Event()
+
+    def busy_io_thread() -> None:
+        profiler.timer()
+        deadline = time.monotonic() + 0.2
+        while not stop.is_set() and time.monotonic() < deadline:
+            pass
+        profiler.release()
+
+    worker = threading.Thread(target=busy_io_thread, name="cip-io-test")
+    worker.start()
+    worker.join()
+    profiler.stop()
+
+    path = tmp_path / "io.folded"
+    profiler.write_collapsed(path)
+    lines = path.read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.startswith("cip-io-test;")
+    assert "busy_io_thread" in stack
+    assert int(count) > 0
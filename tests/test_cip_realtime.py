@@ -0,0 +1,124 @@
+"""Tests for the IO thread real-time tuning helpers."""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+
+import pytest
+
+from cipmaster.cip import realtime
+from cipmaster.cip.realtime import RealtimeTuning, TuningStatus, format_cpu_list, parse_cpu_list, tune_current_thread
+from cipmaster.cip.session import CIPSession
+
+needs_affinity = pytest.mark.skipif(not hasattr(os, "sched_getaffinity"), reason="no CPU affinity support")
+
+
+def _in_thread(function):  # type: ignore[no-untyped-def]
+    result = []
+    worker = threading.Thread(target=lambda: result.append(function()))
+    worker.start()
+    worker.join()
+    return result[0]
+
+
+def test_cpu_lists_round_trip():
+    assert parse_cpu_list("0-2, 5,7-8") == frozenset({0, 1, 2, 5, 7, 8})
+    assert format_cpu_list(frozenset({0, 1, 2, 5, 7, 8})) == "0-2,5,7-8"
+    for text in ("", "3-1", "-1", "a"):
+        with pytest.raises(ValueError):
+            parse_cpu_list(text)
+
+
+def test_tuning_validates_its_settings():
+    assert not RealtimeTuning().enabled
+    assert RealtimeTuning(busy_poll=0).enabled
+    with pytest.raises(ValueError):
+        RealtimeTuning(fifo_priority=0)
+    with pytest.raises(ValueError):
+        RealtimeTuning(busy_poll=-1)
+
+
+@needs_affinity
+def test_tune_current_thread_pins_only_the_calling_thread():
+    allowed = frozenset(os.sched_getaffinity(0))
+    cpu = min(allowed)
+
+    status = _in_thread(lambda: tune_current_thread(RealtimeTuning(cpus=frozenset({cpu})), "receive"))
+
+    assert status.cpus == frozenset({cpu})
+    assert not status.failures
+    assert status.describe() == f"receive: CPUs {cpu}"
+    assert frozenset(os.sched_getaffinity(0)) == allowed
+
+
+def test_unprivileged_tuning_degrades_to_recorded_failures(monkeypatch):
+    def refuse(*_):  # type: ignore[no-untyped-def]
+        raise PermissionError(1, "Operation not permitted")
+
+    monkeypatch.setattr(os, "sched_setscheduler", refuse, raising=False)
+    monkeypatch.setattr(os, "sched_setaffinity", refuse, raising=False)
+
+    status = _in_thread(lambda: tune_current_thread(RealtimeTuning(cpus=frozenset({0}), fifo_priority=50), "transmit"))
+
+    assert status.cpus is None and status.fifo_priority is None
+    assert status.failures == ["CPU affinity 0: Operation not permitted", "SCHED_FIFO: Operation not permitted"]
+    assert "not applied" in status.describe()
+
+
+def test_busy_poll_is_best_effort(monkeypatch):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        status = TuningStatus("receive")
+        if realtime.enable_busy_poll(sock, 0, status):
+            assert status.busy_poll == 0
+        else:
+            assert status.failures
+
+        monkeypatch.setattr(realtime, "_SO_BUSY_POLL", None)
+        status = TuningStatus("receive")
+        assert realtime.enable_busy_poll(sock, 50, status) is False
+        assert status.failures == ["busy poll unsupported on this platform"]
+    finally:
+        sock.close()
+
+
+class _Frame:
+    payload = b"\x01"
+
+
+class _Client:
+    def recv_UDP_ENIP_CIP_IO(self, debug: bool, timeout: float):
+        return _Frame()
+
+    def send_UDP_ENIP_CIP_IO(self, **_):  # type: ignore[no-untyped-def]
+        pass
+
+
+@needs_affinity
+def test_session_reports_tuning_of_both_io_threads():
+    allowed = frozenset(os.sched_getaffinity(0))
+    session = CIPSession(drain_receive=False, realtime=RealtimeTuning(cpus=allowed, busy_poll=10))
+    frames = []
+
+    def update_to_packet(packet) -> None:  # type: ignore[no-untyped-def]
+        frames.append(packet)
+        if len(frames) == 3:
+            session._stop_event.set()  # type: ignore[attr-defined]
+
+    session.manage_io_communication(
+        _Client(),  # type: ignore[arg-type]
+        to_packet_class=bytes,  # type: ignore[arg-type]
+        ot_packet=object(),
+        heartbeat_callback=lambda *_: None,
+        update_to_packet=update_to_packet,
+        rpi=0.01,
+    )
+
+    assert set(session.tuning_status) == {"transmit", "receive"}
+    assert session.tuning_status["transmit"].cpus == allowed
+    assert session.tuning_status["receive"].failures == ["busy poll: no multicast socket"]
+    report = session.timing_report()
+    assert report is not None
+    assert report["tuning"]["transmit"].startswith("transmit: CPUs")
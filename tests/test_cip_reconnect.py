@@ -0,0 +1,143 @@
+"""Tests for the reconnect supervisor of CIP sessions."""
+
+from __future__ import annotations
+
+import itertools
+import socket
+import threading
+import time
+
+import pytest
+
+from cipmaster.cip import process as cip_process
+from cipmaster.cip.layout import SignalSpec, compile_layout
+from cipmaster.cip.reconnect import OutageStats, ReconnectPolicy, probe_target, wait_for_target
+from cipmaster.cip.session import CIPSession, ConnectionParameters
+
+
+def test_policy_backoff_is_exponential_and_bounded():
+    policy = ReconnectPolicy(initial_delay=0.1, max_delay=1.0, multiplier=2.0)
+
+    assert list(itertools.islice(policy.delays(), 6)) == pytest.approx([0.1, 0.2, 0.4, 0.8, 1.0, 1.0])
+    with pytest.raises(ValueError):
+        ReconnectPolicy(initial_delay=2.0, max_delay=1.0)
+    with pytest.raises(ValueError):
+        ReconnectPolicy(multiplier=0.5)
+
+
+def test_outage_stats_accumulate_downtime():
+    stats = OutageStats()
+
+    stats.begin(10.0)
+    stats.begin(11.0)  # still the same outage
+    assert stats.total_downtime(12.0) == pytest.approx(2.0)
+    assert stats.end(12.5) == pytest.approx(2.5)
+    assert stats.end(13.0) is None
+    stats.begin(20.0)
+    stats.end(20.5)
+
+    assert (stats.outages, stats.downtime) == (2, pytest.approx(3.0))
+    assert stats.report()["down"] is False
+
+
+def test_wait_for_target_resumes_as_soon_as_the_target_returns():
+    answers = iter([False, False, True])
+    probes = []
+
+    def probe(address, timeout):  # type: ignore[no-untyped-def]
+        probes.append(address)
+        return next(answers)
+
+    started = time.monotonic()
+    assert wait_for_target(("192.0.2.1", 44818), 30.0, 0.01, threading.Event(), probe=probe)
+
+    assert time.monotonic() - started < 1.0
+    assert probes == [("192.0.2.1", 44818)] * 3
+
+
+def test_wait_for_target_keeps_the_backoff_while_the_target_is_up():
+    started = time.monotonic()
+    assert wait_for_target(("192.0.2.1", 44818), 0.1, 0.01, threading.Event(), probe=lambda address, timeout: True)
+    assert time.monotonic() - started >= 0.1
+
+    stop = threading.Event()
+    stop.set()
+    assert not wait_for_target(("192.0.2.1", 44818), 0.1, 0.01, stop, probe=lambda address, timeout: False)
+
+
+def test_probe_target_detects_a_listening_port():
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        address = listener.getsockname()
+        assert probe_target(address, 1.0)
+    assert not probe_target(address, 1.0)
+
+
+class _Frame:
+    payload = b"\x00"
+
+
+def test_session_reconnects_and_keeps_ot_values():
+    layout = compile_layout("AS_RECONNECT", 16, [SignalSpec("Speed", "uint", 0)])
+    encoder = cip_process._compile(layout).new_encoder()
+    encoder.Speed = 7
+    sent = []
+    clients = []
+
+    class _Client:
+        """First connection drops after three frames, the target is then down once, then back."""
+
+        def __init__(self, IPAddr: str, MulticastGroupIPaddr: str) -> None:
+            clients.append(self)
+            self.index = len(clients)
+            self.connected = self.index != 2
+            self.ot_api = 5000
+            self.frames = 0
+
+        def forward_open(self) -> bool:
+            return True
+
+        def forward_close(self) -> None:
+            pass
+
+        def close(self) -> None:
+            pass
+
+        def send_UDP_ENIP_CIP_IO(self, *, CIP_Sequence_Count, Header, AppData) -> None:  # type: ignore[no-untyped-def]
+            self.frames += 1
+            if self.index == 1 and self.frames == 3:
+                encoder.Speed = 9  # written while the connection is down
+                raise OSError("connection reset")
+            sent.append((self.index, bytes(AppData)))
+            if self.index == 3 and self.frames == 3:
+                session._stop_event.set()  # type: ignore[attr-defined]
+
+        def recv_UDP_ENIP_CIP_IO(self, debug: bool, timeout: float):  # type: ignore[no-untyped-def]
+            time.sleep(min(timeout, 0.005))
+            return _Frame()
+
+    session = CIPSession(
+        client_factory=_Client,
+        reconnect=ReconnectPolicy(initial_delay=0.01, max_delay=0.05, probe_interval=0),
+    )
+    session.start(
+        ip_address="192.0.2.1",
+        multicast_address="239.192.1.1",
+        connection_params=ConnectionParameters(ot_param=0x4808, to_param=0x2808),
+        to_packet_class=cip_process._compile(layout).view_class,
+        ot_packet=encoder,
+        heartbeat_callback=lambda name, value: None,
+        update_to_packet=lambda packet: None,
+    )
+    session._thread.join(10)  # type: ignore[union-attr]
+
+    assert not session.running
+    assert not session.error_occurred
+    assert len(clients) == 3
+    assert [index for index, _ in sent] == [1, 1, 3, 3, 3]
+    assert {frame for index, frame in sent if index == 3} == {bytes(encoder)}
+    assert encoder.Speed == 9
+    stats = session.outage_stats
+    assert (stats.outages, stats.attempts, stats.down_since) == (1, 2, None)
+    assert stats.downtime > 0
@@ -0,0 +1,131 @@
+"""Tests for hot reloading configuration files into a running session."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from cipmaster.cip import config as cip_config
+from cipmaster.cip import reload as cip_reload
+from cipmaster.cip.session import CIPSession
+
+CONFIG = dedent(
+    """
+    <cip>
+      <assembly id="AS_OT" dir="in" size="32" subtype="OT_EO" instanceId="0x65">
+        <usint id="MPU_CTCMSAlive" offset="0" />
+        <usint id="Speed" offset="8" />
+        <uint id="Word" offset="16" />
+      </assembly>
+      <assembly id="AS_TO" dir="out" size="16" subtype="TO" instanceId="0x64">
+        <usint id="Status" offset="0" />
+      </assembly>
+    </cip>
+    """
+).strip()
+
+
+def _validate(tmp_path: Path, content: str = CONFIG) -> tuple[Path, cip_config.CIPValidationResult]:
+    xml_path = tmp_path / "live.xml"
+    xml_path.write_text(content)
+    return xml_path, cip_config.validate_cip_config(str(xml_path), use_cache=False)
+
+
+def test_plan_reload_compiles_only_changed_assemblies(tmp_path: Path):
+    xml_path, validation = _validate(tmp_path)
+
+    xml_path.write_text(CONFIG.replace('<usint id="Speed" offset="8" />', '<usint id="Torque" offset="8" />'))
+    plan = cip_reload.plan_reload(xml_path, ot=validation.ot_info, to=validation.to_info)
+
+    assert plan.rejected == []
+    assert plan.to is None
+    assert plan.ot is not None and plan.ot.is_compiled
+    swap = plan.to_swap()
+    assert swap.to_packet_class is None
+    assert [field.name for field in swap.ot_assembly.encoder_class.fields_desc] == ["MPU_CTCMSAlive", "Torque", "Word"]
+
+
+def test_plan_reload_rejects_size_changes(tmp_path: Path):
+    xml_path, validation = _validate(tmp_path)
+
+    xml_path.write_text(CONFIG.replace('size="16" subtype="TO"', 'size="24" subtype="TO"'))
+    plan = cip_reload.plan_reload(xml_path, ot=validation.ot_info, to=validation.to_info)
+
+    assert not plan.changed
+    assert len(plan.rejected) == 1
+    assert "AS_TO changed size from 16 to 24" in plan.rejected[0]
+
+
+def test_session_swaps_at_cycle_boundary_and_preserves_ot_values(tmp_path: Path):
+    xml_path, validation = _validate(tmp_path)
+    encoder = validation.ot_info.compiled.new_encoder()
+    encoder.Speed = 42
+    encoder.Word = 0x1234
+
+    xml_path.write_text(CONFIG.replace('<usint id="Speed" offset="8" />', '<bool id="Flag" offset="8" />'))
+    plan = cip_reload.plan_reload(xml_path, ot=validation.ot_info, to=validation.to_info)
+
+    session = CIPSession()
+    applied = []
+
+    class _Client:
+        def __init__(self) -> None:
+            self.sent = []
+
+        def recv_UDP_ENIP_CIP_IO(self, debug: bool, timeout: float):
+            class _Frame:
+                payload = b"\x01\x00"
+
+            return _Frame()
+
+        def send_UDP_ENIP_CIP_IO(self, *, CIP_Sequence_Count: int, Header: int, AppData) -> None:
+            self.sent.append(bytes(AppData))
+            if len(self.sent) == 1:
+                session.request_swap(plan.to_swap(on_applied=lambda ot, to: applied.append(ot)))
+            else:
+                session._stop_event.set()  # type: ignore[attr-defined]
+
+    client = _Client()
+    session.manage_io_communication(
+        client,
+        to_packet_class=validation.to_info.compiled.view_class,
+        ot_packet=encoder,
+        heartbeat_callback=lambda name, value: None,
+        update_to_packet=lambda packet: None,
+        rpi=0.01,
+    )
+
+    assert client.sent[0] == bytes(encoder)
+    [swapped] = applied
+    assert client.sent[1] == bytes(swapped)
+    assert swapped.Word == 0x1234
+    assert swapped.Flag == 0
+    assert not hasattr(swapped, "Speed")
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watcher_reports_changed_xml_files(tmp_path: Path, use_inotify: bool):
+    (tmp_path / "live.xml").write_text(CONFIG)
+    seen: list[Path] = []
+    event = threading.Event()
+
+    def callback(path: Path) -> None:
+        seen.append(path)
+        event.set()
+
+    watcher = cip_reload.ConfigWatcher([tmp_path], callback, poll_interval=0.05, debounce=0.01, use_inotify=use_inotify)
+    watcher.start()
+    try:
+        (tmp_path / "notes.txt").write_text("ignored")
+        (tmp_path / "live.xml").write_text(CONFIG.replace("Status", "State"))
+        assert event.wait(5)
+    finally:
+        watcher.stop()
+
+    assert seen[0] == tmp_path / "live.xml"
+    assert watcher.backend in {"inotify", "poll"}
+    if not use_inotify:
+        assert watcher.backend == "poll"
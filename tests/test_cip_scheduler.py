@@ -0,0 +1,106 @@
+"""Tests for the cyclic transmit scheduler."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from cipmaster.cip.scheduler import ChangeOfStateTrigger, CyclicScheduler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        # Every sleep overshoots a little, as real sleeps do.
+        self.now += seconds + 0.003
+
+
+def _scheduler(clock: FakeClock, period: float = 0.1) -> CyclicScheduler:
+    scheduler = CyclicScheduler(period, spin=0.0, clock=clock, sleep=clock.sleep)
+    scheduler.start()
+    return scheduler
+
+
+def test_deadlines_do_not_accumulate_sleep_error():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+
+    releases = []
+    for _ in range(50):
+        assert scheduler.wait() is True
+        releases.append(clock.now)
+
+    assert releases[0] == 100.0
+    assert releases[-1] == pytest.approx(100.0 + 49 * 0.1 + 0.003)
+    assert scheduler.stats.cycles == 50
+    assert scheduler.stats.missed == 0
+    assert scheduler.stats.max_lateness == pytest.approx(0.003)
+
+
+def test_overruns_skip_and_count_elapsed_cycles():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    scheduler.wait()
+
+    clock.now += 0.35  # the loop body took three and a half periods
+    scheduler.wait()
+
+    assert scheduler.stats.missed == 2
+    assert scheduler.next_deadline == pytest.approx(100.4)
+    scheduler.wait()
+    assert clock.now == pytest.approx(100.403)
+    assert scheduler.stats.missed == 2
+    assert scheduler.stats.cycles == 3
+
+
+def test_wait_returns_false_when_stopped():
+    scheduler = CyclicScheduler(10.0)
+    stop = threading.Event()
+    scheduler.start()
+    assert scheduler.wait(stop) is True
+
+    threading.Timer(0.05, stop.set).start()
+    assert scheduler.wait(stop) is False
+
+
+def test_period_must_be_positive():
+    with pytest.raises(ValueError):
+        CyclicScheduler(0)
+
+
+def test_change_of_state_releases_early_but_not_within_the_inhibit_time():
+    scheduler = CyclicScheduler(10.0)
+    trigger = ChangeOfStateTrigger(scheduler, 0.05)
+    stop = threading.Event()
+    scheduler.start()
+    assert trigger.wait(stop) is True  # the first cycle
+    assert not trigger.released_early
+    trigger.sending()
+
+    trigger.notify()
+    started = time.monotonic()
+    assert trigger.wait(stop) is True
+    assert trigger.released_early
+    assert 0.05 - 0.001 <= time.monotonic() - started < 1.0
+    trigger.sending()
+
+    threading.Timer(0.1, trigger.notify).start()
+    started = time.monotonic()
+    assert trigger.wait(stop) is True
+    assert 0.1 - 0.01 <= time.monotonic() - started < 1.0
+    assert (trigger.stats.sends, trigger.stats.inhibited, scheduler.stats.cycles) == (2, 1, 1)
+
+    stop.set()
+    trigger.notify()
+    assert trigger.wait(stop) is False
+    with pytest.raises(ValueError):
+        ChangeOfStateTrigger(scheduler, -1)
@@ -3,11 +3,20 @@
 from __future__ import annotations
 
 import calendar
+import gc
+import logging
+import socket
+import struct
+import threading
 import time
+import tracemalloc
 
+import pytest
 from scapy import all as scapy_all
 
-from cipmaster.cip.session import CIPSession, ConnectionParameters
+from cipmaster.cip.scheduler import DEFAULT_RPI
+from cipmaster.cip.session import CIPSession, ConnectionParameters, connection_timeout, negotiated_rpi
+from thirdparty.scapy_cip_enip.enip_udp import CIP_IO_OFFSET, SEQUENCE_OFFSET
 
 
 class DummyToPacket(scapy_all.Packet):
@@ -52,34 +61,83 @@ def test_manage_io_communication_ignores_transient_timeouts():
     session = CIPSession()
     client = _FakeClient()
     updates = []
-    heartbeats = []
 
     def update_to_packet(pkt: DummyToPacket) -> None:
         updates.append(pkt.value)
         session._stop_event.set()  # type: ignore[attr-defined]
 
-    def heartbeat_callback(name: str, value: int) -> None:
-        heartbeats.append((name, value))
-
     result = session.manage_io_communication(
         client,
         to_packet_class=DummyToPacket,
         ot_packet=DummyOtPacket(),
-        heartbeat_callback=heartbeat_callback,
+        heartbeat_callback=lambda *_: None,
         update_to_packet=update_to_packet,
+        rpi=0.01,
     )
 
     assert result is False
     assert updates == [7]
-    assert heartbeats == [("MPU_CTCMSAlive", 1)]
-    assert len(client.sent) == 1
+    assert client._recv_calls == 2
+
+
+class _SilentClient(_FakeClient):
+    """A target that never produces TO frames."""
+
+    def __init__(self, session: CIPSession, frames: int) -> None:
+        super().__init__()
+        self._session = session
+        self._frames = frames
+        self.sent_at = []
+
+    def recv_UDP_ENIP_CIP_IO(self, debug: bool, timeout: float):
+        time.sleep(0.01)
+        return None
+
+    def send_UDP_ENIP_CIP_IO(self, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        super().send_UDP_ENIP_CIP_IO(**kwargs)
+        self.sent_at.append(time.monotonic())
+        if len(self.sent) == self._frames:
+            self._session._stop_event.set()  # type: ignore[attr-defined]
+
+
+def test_manage_io_communication_transmits_without_to_frames():
+    session = CIPSession()
+    client = _SilentClient(session, frames=3)
+    heartbeats = []
+
+    result = session.manage_io_communication(
+        client,
+        to_packet_class=DummyToPacket,
+        ot_packet=DummyOtPacket(),
+        heartbeat_callback=lambda name, value: heartbeats.append((name, value)),
+        update_to_packet=lambda packet: None,
+        rpi=0.02,
+    )
+
+    assert result is False
+    assert heartbeats == [("MPU_CTCMSAlive", 1), ("MPU_CTCMSAlive", 2), ("MPU_CTCMSAlive", 3)]
+    assert [seq_count for seq_count, _, _ in client.sent] == [65500, 65501, 65502]
     seq_count, header, app_data = client.sent[0]
-    assert seq_count == 65500
     assert header == 1
     assert isinstance(app_data, DummyOtPacket)
     assert isinstance(app_data.MPU_CDateTimeSec, int)
     now = calendar.timegm(time.gmtime())
     assert now - 5 <= app_data.MPU_CDateTimeSec <= now + 5
+    assert client.sent_at[2] - client.sent_at[0] >= 0.04 - 0.001
+    assert session.transmit_stats.cycles == 3
+    report = session.timing_report()
+    assert report["ot_interdeparture"]["count"] == 2
+    assert report["ot_interdeparture"]["min"] >= 0.02 - 0.001
+    assert report["to_interarrival"]["count"] == 0
+    assert report["turnaround"]["count"] == 0
+
+
+def test_negotiated_rpi_uses_forward_open_interval():
+    client = _FakeClient()
+    assert negotiated_rpi(client) == DEFAULT_RPI
+
+    client.ot_api = 50_000  # type: ignore[attr-defined]
+    assert negotiated_rpi(client) == 0.05
 
 
 def test_manage_io_communication_accepts_scapy_payload():
@@ -103,6 +161,7 @@ def test_manage_io_communication_accepts_scapy_payload():
         ot_packet=DummyOtPacket(),
         heartbeat_callback=lambda *_: None,
         update_to_packet=update_to_packet,
+        rpi=0.01,
     )
 
     assert updates == [9]
@@ -172,3 +231,307 @@ def test_stop_waits_for_thread_and_relies_on_session_cleanup():
     assert client.forward_open_calls == 1
     assert client.forward_close_calls == 1
     assert client.close_calls == 1
+
+
+def test_manage_io_communication_accepts_assembly_view_class():
+    from cipmaster.cip.assembly import compile_packet_class
+
+    session = CIPSession()
+    client = _FakeClient()
+    view_class = compile_packet_class(DummyToPacket).view_class
+    updates = []
+
+    def update_to_packet(view) -> None:  # type: ignore[no-untyped-def]
+        updates.append((type(view), view.value))
+        if client.sent:
+            session._stop_event.set()  # type: ignore[attr-defined]
+
+    session.manage_io_communication(
+        client,
+        to_packet_class=view_class,
+        ot_packet=compile_packet_class(DummyOtPacket).new_encoder(),
+        heartbeat_callback=lambda *_: None,
+        update_to_packet=update_to_packet,
+        rpi=0.01,
+    )
+
+    assert set(updates) == {(view_class, 7)}
+    assert len(client.sent[0][2]) == 4
+
+
+class _StimulusOtPacket(scapy_all.Packet):
+    name = "StimulusOtPacket"
+    fields_desc = [scapy_all.ByteField("Stimulus", 0)]
+
+
+def test_change_of_state_sends_committed_values_ahead_of_the_cycle():
+    from cipmaster.cip.assembly import compile_packet_class
+
+    session = CIPSession(production_inhibit=0.02)
+    encoder = compile_packet_class(_StimulusOtPacket).new_encoder()
+    client = _SilentClient(session, frames=3)
+    frames = []
+    send = client.send_UDP_ENIP_CIP_IO
+
+    def send_and_stimulate(**kwargs) -> None:  # type: ignore[no-untyped-def]
+        frames.append(bytes(kwargs["AppData"]))
+        send(**kwargs)
+        if len(frames) == 1:
+            threading.Timer(0.05, setattr, (encoder, "Stimulus", 1)).start()
+        elif len(frames) == 2:
+            encoder.Stimulus = 2  # inside the inhibit time of the frame just sent
+
+    client.send_UDP_ENIP_CIP_IO = send_and_stimulate  # type: ignore[method-assign]
+    heartbeats = []
+    session.manage_io_communication(
+        client,
+        to_packet_class=DummyToPacket,
+        ot_packet=encoder,
+        heartbeat_callback=lambda name, value: heartbeats.append(value),
+        update_to_packet=lambda packet: None,
+        rpi=5.0,
+    )
+
+    assert frames == [b"\x00", b"\x01", b"\x02"]
+    assert client.sent_at[2] - client.sent_at[0] < 1.0
+    assert client.sent_at[2] - client.sent_at[1] >= 0.02 - 0.001
+    assert session.transmit_stats.cycles == 1
+    assert heartbeats == [1, 1, 1]  # only the cyclic frame advances the heartbeat
+    assert [seq_count for seq_count, _, _ in client.sent] == [65500, 65501, 65502]
+    assert (session.change_stats.sends, session.change_stats.inhibited) == (2, 1)
+    report = session.timing_report()
+    assert report["change_of_state"] == {"sends": 2, "inhibited": 1}
+    assert report["ot_interdeparture"]["count"] == 0
+
+
+def test_connection_timeout_uses_to_interval_and_multiplier():
+    client = _FakeClient()
+    assert connection_timeout(client) == pytest.approx(DEFAULT_RPI * 4)
+
+    client.to_api = 10_000  # type: ignore[attr-defined]
+    client.connection_timeout_multiplier = 2  # type: ignore[attr-defined]
+    assert connection_timeout(client) == pytest.approx(0.16)
+
+
+def test_session_stops_when_target_goes_silent():
+    timeouts = []
+    session = CIPSession(on_connection_timeout=timeouts.append)
+
+    class _DyingClient(_FakeClient):
+        to_api = 10_000
+
+        def recv_UDP_ENIP_CIP_IO(self, debug: bool, timeout: float):
+            self._recv_calls += 1
+            if self._recv_calls <= 3:
+                return _FakeCIPIOPacket(_FakePayload(b"\x01"))
+            time.sleep(timeout)
+            return None
+
+    started = time.monotonic()
+    result = session.manage_io_communication(
+        _DyingClient(),
+        to_packet_class=DummyToPacket,
+        ot_packet=DummyOtPacket(),
+        heartbeat_callback=lambda *_: None,
+        update_to_packet=lambda packet: None,
+        rpi=0.01,
+    )
+
+    assert result is True
+    assert time.monotonic() - started < 1
+    assert session.watchdog is not None
+    assert session.watchdog.frames == 3
+    assert session.watchdog.timeout_gap >= 0.04
+    assert timeouts == [session.watchdog.timeout_gap]
+
+
+class _LoopbackTarget:
+    """Stand-in for the OT socket that answers every OT frame with a TO frame."""
+
+    def __init__(self, peer, frame: bytes) -> None:  # type: ignore[no-untyped-def]
+        self._peer = peer
+        self._frame = bytearray(frame)
+        self.sequence = 0
+
+    def send(self, data) -> None:  # type: ignore[no-untyped-def]
+        self.sequence += 1
+        struct.pack_into("<I", self._frame, SEQUENCE_OFFSET, self.sequence)
+        struct.pack_into("<H", self._frame, CIP_IO_OFFSET, self.sequence & 0xFFFF)
+        self._peer.send(self._frame)
+
+
+class _CycleProbe:
+    """Counts TO updates and samples traced memory without allocating per call."""
+
+    __slots__ = ("session", "cycles", "warmup", "total", "baseline", "final", "peak", "views", "collections", "measuring")
+
+    def __init__(self, session: CIPSession, warmup: int, total: int) -> None:
+        self.session = session
+        self.cycles = 0
+        self.warmup = warmup
+        self.total = total
+        self.baseline = self.final = self.peak = 0
+        self.views: list = []
+        self.collections = 0
+        self.measuring = False
+
+    def gc_callback(self, phase: str, info: dict) -> None:
+        if self.measuring and phase == "start":
+            self.collections += 1
+
+    def __call__(self, packet) -> None:  # type: ignore[no-untyped-def]
+        self.cycles += 1
+        if self.cycles <= 4:
+            self.views.append(packet)  # kept alive so ids cannot be recycled
+        if self.cycles == self.warmup:
+            tracemalloc.reset_peak()
+            self.baseline = tracemalloc.get_traced_memory()[0]
+            self.measuring = True
+        elif self.cycles == self.total:
+            self.measuring = False
+            self.final, self.peak = tracemalloc.get_traced_memory()
+            self.session._stop_event.set()  # type: ignore[attr-defined]
+
+
+# Net bytes a steady-state IO cycle may leave allocated on average.
+MAX_NET_BYTES_PER_CYCLE = 1
+
+
+def test_steady_state_io_cycle_does_not_accumulate_allocations(caplog):
+    from cipmaster.cip.assembly import compile_packet_class
+    from thirdparty.scapy_cip_enip import tgv2020
+    from thirdparty.scapy_cip_enip.enip_udp import CIP_IO, ENIP_UDP, ENIP_UDP_Item, ENIP_UDP_SequencedAddress
+
+    caplog.set_level(logging.ERROR)
+    frame = bytes(ENIP_UDP(items=[
+        ENIP_UDP_Item(type_id=0x8002) / ENIP_UDP_SequencedAddress(connection_id=0x1111, sequence=0),
+        ENIP_UDP_Item(type_id=0x00B1) / (CIP_IO(CIP_Sequence_Count=0, Header=1) / tgv2020.AS_DCUi_MPU_DATA()),
+    ]))
+    receiver, target = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    original_flag = tgv2020.NO_NETWORK
+    tgv2020.NO_NETWORK = True
+    try:
+        client = tgv2020.Client()
+    finally:
+        tgv2020.NO_NETWORK = original_flag
+    client.MulticastSock = receiver
+    client.Sock1 = _LoopbackTarget(target, frame)
+    client.enip_connection_id_TO = 0x1111
+
+    session = CIPSession()
+    encoder = compile_packet_class(tgv2020.AS_MPU_DCUi_DATA).new_encoder()
+    probe = _CycleProbe(session, warmup=200, total=2200)
+
+    def heartbeat(name: str, value: int) -> None:
+        setattr(encoder, name, value)
+
+    gc.callbacks.append(probe.gc_callback)
+    tracemalloc.start()
+    try:
+        session.manage_io_communication(
+            client,
+            to_packet_class=compile_packet_class(tgv2020.AS_DCUi_MPU_DATA).view_class,
+            ot_packet=encoder,
+            heartbeat_callback=heartbeat,
+            update_to_packet=probe,
+            rpi=0.0005,
+        )
+    finally:
+        tracemalloc.stop()
+        gc.callbacks.remove(probe.gc_callback)
+        receiver.close()
+        target.close()
+
+    assert probe.cycles == probe.total
+    assert len({id(view) for view in probe.views}) == 2  # the TO views are refilled, not recreated
+    assert probe.collections == 0
+    steady = probe.total - probe.warmup
+    assert (probe.final - probe.baseline) / steady < MAX_NET_BYTES_PER_CYCLE
+    assert probe.peak - probe.baseline < 64 * 1024
+
+
+def test_kernel_timestamps_drive_to_arrival_times():
+    from cipmaster.cip.session import _arrival_time
+
+    assert _arrival_time(time.time() - 0.5) == pytest.approx(time.monotonic() - 0.5, abs=0.01)
+    assert _arrival_time(time.time() + 60) == pytest.approx(time.monotonic(), abs=0.01)
+
+    class _StampingClient(_FakeClient):
+        enabled = False
+
+        def enable_kernel_timestamps(self) -> bool:
+            self.enabled = True
+            return True
+
+        def recv_UDP_ENIP_CIP_IO(self, debug: bool, timeout: float):
+            packet = _FakeCIPIOPacket(_FakePayload(b"\x01"))
+            packet.timestamp = time.time() - 0.001  # type: ignore[attr-defined]
+            self.io_frame_observer(None, None, None, packet.timestamp)  # type: ignore[attr-defined]
+            return packet
+
+    session = CIPSession(kernel_timestamps=True, drain_receive=False)
+    client = _StampingClient()
+    received = []
+
+    def update_to_packet(packet) -> None:  # type: ignore[no-untyped-def]
+        received.append(packet)
+        if len(received) == 5:
+            session._stop_event.set()  # type: ignore[attr-defined]
+
+    session.manage_io_communication(
+        client,
+        to_packet_class=DummyToPacket,
+        ot_packet=DummyOtPacket(),
+        heartbeat_callback=lambda *_: None,
+        update_to_packet=update_to_packet,
+        rpi=0.01,
+    )
+
+    assert client.enabled
+    assert session.timing is not None
+    assert session.timing.kernel_timestamped >= 5
+
+
+def test_drained_frames_are_timed_at_their_kernel_arrival():
+    class _BacklogClient(_FakeClient):
+        enip_connection_id_TO = 0x1111
+        calls = 0
+        start = time.time() - 1.0
+
+        def enable_kernel_timestamps(self) -> bool:
+            return True
+
+        def recv_latest_UDP_ENIP_CIP_IO(self, debug: bool, timeout: float):
+            # Three TO frames 10 ms apart plus an OT echo queued up; only the
+            # newest TO frame is returned.
+            self.calls += 1
+            for index in range(3):
+                sequence = self.calls * 3 + index
+                arrived = self.start + sequence * 0.01
+                self.io_frame_observer(0x1111, sequence, sequence, arrived)  # type: ignore[attr-defined]
+            self.io_frame_observer(0x2222, self.calls, self.calls, arrived)  # type: ignore[attr-defined]
+            packet = _FakeCIPIOPacket(_FakePayload(b"\x01"))
+            packet.timestamp = arrived  # type: ignore[attr-defined]
+            if self.calls == 4:
+                session._stop_event.set()  # type: ignore[attr-defined]
+            return packet
+
+    session = CIPSession(kernel_timestamps=True, drain_receive=True)
+    client = _BacklogClient()
+
+    session.manage_io_communication(
+        client,
+        to_packet_class=DummyToPacket,
+        ot_packet=DummyOtPacket(),
+        heartbeat_callback=lambda *_: None,
+        update_to_packet=lambda packet: None,
+        rpi=0.01,
+    )
+
+    assert session.timing is not None
+    assert session.timing.kernel_timestamped == 3 * client.calls
+    assert session.timing.to_interarrival.count == 3 * client.calls - 1
+    assert session.timing.to_interarrival.min == pytest.approx(0.01, abs=0.002)
+    assert session.timing.to_interarrival.max == pytest.approx(0.01, abs=0.002)
+    assert session.sequence_tracker is not None
+    assert set(session.sequence_tracker.counters()) == {0x1111, 0x2222}
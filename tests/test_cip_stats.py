@@ -0,0 +1,127 @@
+"""Tests for the cycle timing statistics."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from cipmaster.cip.stats import (
+    CIP_GAP,
+    CIP_OUT_OF_ORDER,
+    DUPLICATE,
+    GAP,
+    ConnectionTiming,
+    SequenceTracker,
+    TimingHistogram,
+    format_rows,
+)
+
+
+def test_histogram_percentiles_are_within_bucket_precision():
+    rng = random.Random(7)
+    samples = [rng.uniform(0.001, 0.2) for _ in range(10_000)]
+    histogram = TimingHistogram("interval")
+    for sample in samples:
+        histogram.record(sample)
+
+    samples.sort()
+    percentiles = histogram.percentiles((50, 99, 100))
+    for percentile, value in percentiles.items():
+        exact = samples[max(0, int(len(samples) * percentile / 100) - 1)]
+        assert value == pytest.approx(exact, rel=0.02)
+    assert percentiles[100] == histogram.max == samples[-1]
+    assert histogram.count == 10_000
+    assert histogram.min == samples[0]
+
+
+def test_histogram_clamps_and_tracks_jitter():
+    histogram = TimingHistogram("interval", nominal=0.1)
+    for value in (0.098, 0.1, 0.107, -1.0, 3600.0):
+        histogram.record(value)
+
+    assert histogram.count == 5
+    assert histogram.max == 3600.0
+    assert histogram.max_jitter == pytest.approx(3599.9)
+    assert histogram.percentiles((20,))[20] == 0.0
+
+    histogram.reset()
+    assert histogram.count == 0
+    assert histogram.percentiles() == {50.0: 0.0, 90.0: 0.0, 99.0: 0.0, 99.9: 0.0}
+
+
+def test_connection_timing_records_each_direction():
+    timing = ConnectionTiming(ot_connection_id=1, to_connection_id=2, ot_rpi=0.1, to_rpi=0.1)
+
+    timing.frame_sent(10.0)
+    timing.frame_received(10.03)
+    timing.frame_received(10.13)
+    timing.frame_sent(10.1)
+    timing.frame_sent(10.2)
+    timing.frame_received(10.24)
+    timing.frame_sent(10.3)
+
+    assert timing.to_interarrival.count == 2
+    assert timing.ot_interdeparture.count == 3
+    assert timing.turnaround.count == 2
+    assert timing.turnaround.max == pytest.approx(0.06)
+    assert timing.to_interarrival.max_jitter == pytest.approx(0.01)
+
+    report = timing.report()
+    assert report["turnaround"]["count"] == 2
+    assert report["to_connection_id"] == 2
+    assert [row[0] for row in format_rows(timing)] == [
+        "TO inter-arrival",
+        "Receive-to-send turnaround",
+        "OT inter-departure",
+    ]
+
+
+def test_sequence_tracker_counts_loss_duplicates_and_reordering():
+    times = iter(range(100, 200))
+    tracker = SequenceTracker(history=3, clock=lambda: next(times))
+
+    for sequence, count in [(10, 1), (11, 2), (14, 3), (12, 3), (14, 3), (15, 3), (16, 1), (17, 4)]:
+        tracker.observe(0x99, sequence, count)
+    tracker.observe(None, 5, 5)
+
+    counters = tracker.counters()[0x99]
+    assert counters.frames == 8
+    assert counters.lost == 1
+    assert counters.duplicates == 1
+    assert counters.out_of_order == 1
+    assert counters.cip_out_of_order == 1
+    assert counters.cip_gaps == 1
+
+    anomalies = tracker.anomalies()
+    assert [anomaly.kind for anomaly in anomalies] == [DUPLICATE, CIP_OUT_OF_ORDER, CIP_GAP]
+    assert anomalies[0].timestamp == 102
+    assert (anomalies[0].expected, anomalies[0].received) == (15, 14)
+    assert tracker.report()["connections"][0x99]["lost"] == 1
+
+
+def test_sequence_tracker_handles_wraparound():
+    tracker = SequenceTracker()
+
+    tracker.observe(1, 0xFFFFFFFF, 0xFFFF)
+    tracker.observe(1, 0, 0)
+    tracker.observe(1, 2, 1)
+
+    counters = tracker.counters()[1]
+    assert counters.lost == 1
+    assert counters.cip_out_of_order == 0
+    assert [(anomaly.kind, anomaly.expected, anomaly.received) for anomaly in tracker.anomalies()] == [(GAP, 1, 2)]
+
+
+def test_kernel_timestamps_date_anomalies_and_are_counted():
+    tracker = SequenceTracker(clock=lambda: 5.0)
+    tracker.observe(1, 1, 1, 1000.25)
+    tracker.observe(1, 3, 3, 1000.5)
+    tracker.observe(1, 5, 5)
+
+    assert [anomaly.timestamp for anomaly in tracker.anomalies()] == [1000.5, 5.0]
+
+    timing = ConnectionTiming()
+    timing.frame_received(1.0, kernel=True)
+    timing.frame_received(1.1)
+    assert timing.report()["kernel_timestamped"] == 1
@@ -0,0 +1,60 @@
+"""Tests for the CIP connection watchdog."""
+
+from __future__ import annotations
+
+import pytest
+
+from cipmaster.cip.watchdog import ConnectionWatchdog, timeout_multiplier
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 50.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_timeout_multiplier_codes():
+    assert [timeout_multiplier(code) for code in range(8)] == [4, 8, 16, 32, 64, 128, 256, 512]
+    with pytest.raises(ValueError):
+        timeout_multiplier(8)
+
+
+def test_watchdog_times_out_after_silence_and_records_gap():
+    clock = FakeClock()
+    gaps = []
+    watchdog = ConnectionWatchdog(0.4, initial_timeout=1.0, on_timeout=gaps.append, clock=clock)
+    watchdog.start()
+
+    clock.now += 0.9
+    assert watchdog.check() is False
+    watchdog.feed()
+    assert watchdog.remaining() == pytest.approx(0.4)
+
+    clock.now += 0.1
+    watchdog.feed()
+    clock.now += 0.39
+    assert watchdog.check() is False
+
+    clock.now += 0.015
+    assert watchdog.check() is True
+    assert watchdog.timed_out.is_set()
+    assert watchdog.timeout_gap == pytest.approx(0.405)
+    assert gaps == [pytest.approx(0.405)]
+    assert watchdog.max_gap == pytest.approx(0.1)
+
+    assert watchdog.check() is True
+    assert len(gaps) == 1
+
+
+def test_watchdog_uses_initial_timeout_until_first_frame():
+    clock = FakeClock()
+    watchdog = ConnectionWatchdog(0.1, clock=clock)
+    watchdog.start()
+
+    clock.now += 9.9
+    assert watchdog.check() is False
+    clock.now += 0.1
+    assert watchdog.check() is True
+    assert watchdog.frames == 0
@@ -1,6 +1,12 @@
+import threading
+import time
 from typing import Any
 
+import pytest
+
 from cipmaster.cip import config as cip_config
+from cipmaster.cip import fields as cip_fields
+from cipmaster.cip.process import ProcessSession
 from cipmaster.cli.app import CIPCLI
 
 
@@ -28,3 +34,195 @@ def test_cli_loads_selected_configuration(monkeypatch):
     assert cli.cip_config(preselected_filename=name)
     assert cli.cip_config_selected == name
     assert cli.overall_cip_valid is True
+
+
+def test_cli_switches_to_io_process_keeping_session_options():
+    cli = CIPCLI(ui=DummyUI())
+    cli.session.kernel_timestamps = True
+    cli.session.production_inhibit = 0.002
+    packet = object()
+    cli.TO_packet = packet
+
+    cli.use_io_process()
+
+    assert isinstance(cli.session, ProcessSession)
+    assert cli.session.kernel_timestamps is True
+    assert cli.session.production_inhibit == 0.002
+    assert cli.TO_packet is packet  # not running: no shared-memory snapshot
+
+
+def test_cli_selects_another_assembly_pair_by_id_or_instance(tmp_path):
+    xml_path = tmp_path / "multi.xml"
+    xml_path.write_text(
+        """<cip>
+          <assembly id="AS_OT_A" dir="in" size="16" subtype="OT_EO" instanceId="0x65">
+            <usint id="AliveA" offset="0" />
+          </assembly>
+          <assembly id="AS_OT_B" dir="in" size="32" subtype="OT_EO" instanceId="0x67">
+            <uint id="WordB" offset="0" />
+            <usint id="Clash" offset="8" />
+          </assembly>
+          <assembly id="AS_TO_A" dir="out" size="8" subtype="TO" instanceId="0x64">
+            <usint id="Command" offset="0" />
+          </assembly>
+          <assembly id="AS_TO_B" dir="out" size="16" subtype="TO" instanceId="0x66">
+            <usint id="StatusB" offset="8" />
+          </assembly>
+        </cip>"""
+    )
+    cli = CIPCLI(ui=DummyUI())
+    cli.assemblies = cip_config.validate_cip_config(str(xml_path), use_cache=False).assemblies
+
+    assert cli.select_assemblies() is True
+    assert not cli.select_assemblies("AS_OT_B", "AS_TO_A")  # overlapping signals
+    assert not cli.select_assemblies("AS_TO_A", "AS_TO_B")  # wrong subtype
+    assert cli.select_assemblies("AS_OT_A", "0x66") is True
+
+    assert cli.ot_info is cli.assemblies["AS_OT_A"]
+    assert cli.to_info is cli.assemblies["AS_TO_B"]
+    cli.OT_packet.AliveA = 3
+    assert cli.TO_packet.StatusB == 0
+    assert cli.assemblies.compiled_ids() == ["AS_OT_A", "AS_TO_B"]
+
+
+def test_cli_writes_never_hold_back_the_heartbeat_of_a_published_frame(tmp_path):
+    xml_path = tmp_path / "heartbeat.xml"
+    xml_path.write_text(
+        """<cip>
+          <assembly id="AS_OT" dir="in" size="32" subtype="OT_EO" instanceId="0x65">
+            <usint id="MPU_CTCMSAlive" offset="0" />
+            <bool id="Flag" offset="8" />
+            <bool id="Other" offset="9" />
+            <uint id="Word" offset="16" />
+          </assembly>
+          <assembly id="AS_TO" dir="out" size="8" subtype="TO" instanceId="0x64">
+            <usint id="Status" offset="0" />
+          </assembly>
+        </cip>"""
+    )
+    cli = CIPCLI(ui=DummyUI())
+    cli.assemblies = cip_config.validate_cip_config(str(xml_path), use_cache=False).assemblies
+    assert cli.select_assemblies("AS_OT", "AS_TO") is True
+    encoder = cli.OT_packet
+    done = threading.Event()
+
+    def operator() -> None:
+        while not done.is_set():
+            cli.set_field("Flag", "1")
+            cli.set_field("Word", "0x1234")
+            cli.clear_field("Other")
+            cli.clear_field("Flag")
+
+    thread = threading.Thread(target=operator)
+    thread.start()
+    try:
+        for alive in range(1, 2000):
+            encoder.MPU_CTCMSAlive = alive % 256
+            assert encoder.publish()[0] == alive % 256
+    finally:
+        done.set()
+        thread.join(5)
+    assert encoder.Word == cip_fields.field_table(encoder)["Word"].encode("0x1234")
+
+
+WAVE_CONFIG = """<cip>
+  <assembly id="AS_OT" dir="in" size="256" subtype="OT_EO" instanceId="0x65">
+    <usint id="MPU_CTCMSAlive" offset="0" />
+    <real id="Speed" offset="32" />
+    <real id="Torque" offset="64" />
+    <real id="Level" offset="128" />
+  </assembly>
+  <assembly id="AS_TO" dir="out" size="8" subtype="TO" instanceId="0x64">
+    <usint id="Status" offset="0" />
+  </assembly>
+</cip>"""
+
+
+def test_cli_stops_waves_of_fields_a_reload_removed_or_re_encoded(monkeypatch, tmp_path):
+    from cipmaster.cip.session import CIPSession
+
+    xml_path = tmp_path / "waves.xml"
+    xml_path.write_text(WAVE_CONFIG)
+    cli = CIPCLI(ui=DummyUI())
+    cli.assemblies = cip_config.validate_cip_config(str(xml_path), use_cache=False).assemblies
+    assert cli.select_assemblies("AS_OT", "AS_TO") is True
+    cli.cip_xml_path = str(xml_path)
+    swaps = []
+    monkeypatch.setattr(CIPSession, "running", property(lambda self: True))
+    monkeypatch.setattr(cli.session, "request_swap", swaps.append)
+
+    cli.wave_field("Speed", 10, 0, 1000)
+    cli.tria_field("Torque", 10, 0, 1000)
+    cli.box_field("Level", 10, 0, 1000, 0.5)
+    try:
+        xml_path.write_text(
+            WAVE_CONFIG.replace('<real id="Speed" offset="32" />', '<real id="Pressure" offset="32" />').replace(
+                '<real id="Torque" offset="64" />', '<lreal id="Torque" offset="64" />'
+            )
+        )
+        cli._reload_configuration(str(xml_path))
+        [swap] = swaps
+        old_packet = cli.OT_packet
+        with cli.lock:  # as the IO thread applies it
+            swap.on_applied(swap.ot_assembly.migrate(old_packet), cli.TO_view_class)
+
+        assert cli.stop_events["Speed"].is_set()
+        assert cli.stop_events["Torque"].is_set()
+        assert not cli.stop_events["Level"].is_set()
+        assert cli.OT_packet is not old_packet
+        cli.OT_packet.Level = 0.0
+        for _ in range(500):
+            if cli.OT_packet.Level:
+                break  # the surviving wave writes into the new encoder
+            time.sleep(0.01)
+        assert cli.OT_packet.Level
+    finally:
+        cli.stop_all_thread()
+
+
+def test_cli_wave_ends_when_its_field_leaves_the_ot_assembly(tmp_path):
+    xml_path = tmp_path / "waves.xml"
+    xml_path.write_text(WAVE_CONFIG)
+    cli = CIPCLI(ui=DummyUI())
+    cli.assemblies = cip_config.validate_cip_config(str(xml_path), use_cache=False).assemblies
+    assert cli.select_assemblies("AS_OT", "AS_TO") is True
+    errors = []
+    original_hook = threading.excepthook
+    threading.excepthook = errors.append
+    try:
+        cli.wave_field("Speed", 10, 0, 1000)
+        [wave] = [thread for thread in threading.enumerate() if thread.name.endswith("(wave_thread)")]
+        cli.OT_packet = cip_config.validate_cip_config(
+            str(xml_path), use_cache=False
+        ).assemblies["AS_TO"].compiled.new_encoder()
+        wave.join(5)
+    finally:
+        threading.excepthook = original_hook
+        cli.stop_all_thread()
+
+    assert not wave.is_alive()
+    assert errors == []
+
+
+def test_cli_stops_the_config_watcher_of_a_session_that_ended(monkeypatch, tmp_path):
+    from cipmaster.cip import reload as cip_reload
+
+    class _Watcher:
+        stopped = False
+
+        def stop(self) -> None:
+            self.stopped = True
+
+    monkeypatch.setattr(cip_reload, "plan_reload", lambda *args, **kwargs: pytest.fail("reload planned"))
+    cli = CIPCLI(ui=DummyUI())
+    cli.cip_xml_path = str(tmp_path / "config.xml")
+    watcher = cli.config_watcher = _Watcher()
+
+    cli._reload_configuration(cli.cip_xml_path)  # the session is not running
+    cli.stop_comm()
+
+    assert watcher.stopped
+    assert cli.config_watcher is None
+    cli.config_watcher = watcher = _Watcher()
+    cli.shutdown()
+    assert watcher.stopped
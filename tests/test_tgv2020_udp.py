@@ -4,6 +4,8 @@ from __future__ import annotations
 
 import socket
 import struct
+import sys
+import time
 
 import pytest
 
@@ -13,9 +15,11 @@ from thirdparty.scapy_cip_enip import tgv2020
 from thirdparty.scapy_cip_enip import enip_tcp
 from thirdparty.scapy_cip_enip.enip_udp import (
     CIP_IO,
+    CIPIOFrame,
     ENIP_UDP,
     ENIP_UDP_Item,
     ENIP_UDP_SequencedAddress,
+    decode_sequenced_io,
 )
 
 
@@ -71,6 +75,39 @@ def test_recv_udp_enip_cip_io_returns_packet_with_payload():
     assert isinstance(packet, CIP_IO)
     assert packet.CIP_Sequence_Count == 42
     assert bytes(packet.payload) == bytes(payload)
+    assert tgv2020.AS_DCUi_MPU_DATA(packet.payload.load).BCHi_IDevIsAlive == 5
+
+
+def test_decode_uses_struct_fast_path_only_into_a_reusable_frame():
+    payload = tgv2020.AS_DCUi_MPU_DATA(BCHi_IDevIsAlive=5)
+    frame = _build_enip_frame(payload)
+    client = _client_with_frames([])
+    address = ("127.0.0.1", 2222)
+
+    packet = client._decode_UDP_ENIP_CIP_IO(frame, address, False, CIPIOFrame(0, 0, 0, 0, b""))
+    assert isinstance(packet, CIPIOFrame)
+    assert packet.connection_id == 0x1111
+    assert packet.CIP_Sequence_Count == 42
+    assert packet.Header == 1
+    assert bytes(packet.payload) == bytes(payload)
+
+    assert isinstance(client._decode_UDP_ENIP_CIP_IO(frame, address, False), CIP_IO)
+    assert isinstance(client._decode_UDP_ENIP_CIP_IO(frame, address, True, CIPIOFrame(0, 0, 0, 0, b"")), CIP_IO)
+
+    client.enip_connection_id_TO = 0x9999
+    packet = client._decode_UDP_ENIP_CIP_IO(frame, address, False, CIPIOFrame(0, 0, 0, 0, b""))
+    assert isinstance(packet, CIP_IO)
+    assert packet.CIP_Sequence_Count == 42
+
+
+def test_decode_sequenced_io_rejects_other_layouts():
+    frame = _build_enip_frame(tgv2020.AS_DCUi_MPU_DATA())
+
+    assert decode_sequenced_io(frame) is not None
+    assert decode_sequenced_io(frame[:-1]) is None
+    assert decode_sequenced_io(frame + b"\x00") is None
+    assert decode_sequenced_io(_build_enip_frame(tgv2020.AS_DCUi_MPU_DATA(), extra_item=True)) is None
+    assert decode_sequenced_io(frame[:20]) is None
 
 
 def test_recv_udp_enip_cip_io_ignores_additional_items():
@@ -98,6 +135,58 @@ def test_recv_udp_enip_cip_io_returns_none_without_connected_item():
     assert client.recv_UDP_ENIP_CIP_IO(False, 0.5) is None
 
 
+def _sequenced_frame(connection_id: int, sequence: int, alive: int) -> bytes:
+    return bytes(
+        ENIP_UDP(
+            items=[
+                ENIP_UDP_Item(type_id=0x8002)
+                / ENIP_UDP_SequencedAddress(connection_id=connection_id, sequence=sequence),
+                ENIP_UDP_Item(type_id=0x00B1)
+                / (CIP_IO(CIP_Sequence_Count=sequence, Header=1) / tgv2020.AS_DCUi_MPU_DATA(BCHi_IDevIsAlive=alive)),
+            ]
+        )
+    )
+
+
+def test_recv_latest_udp_enip_cip_io_decodes_only_newest_frame():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(("127.0.0.1", 0))
+        client = _client_with_frames([])
+        client.MulticastSock = receiver
+        client.enip_connection_id_TO = 0x1111
+        observed = []
+        client.io_frame_observer = lambda *counters: observed.append(counters)
+
+        for sequence in (1, 2, 3):
+            sender.sendto(_sequenced_frame(0x1111, sequence, alive=sequence), receiver.getsockname())
+        sender.sendto(_sequenced_frame(0x2222, 9, alive=9), receiver.getsockname())
+        sender.sendto(b"\x02\x00\x02\x80", receiver.getsockname())  # truncated
+
+        packet = client.recv_latest_UDP_ENIP_CIP_IO(False, 0.5)
+
+        assert packet.connection_id == 0x1111
+        assert packet.CIP_Sequence_Count == 3
+        assert tgv2020.AS_DCUi_MPU_DATA(bytes(packet.payload)).BCHi_IDevIsAlive == 3
+        assert client.superseded_frames == 2
+        assert observed == [(0x1111, 1, 1, None), (0x1111, 2, 2, None), (0x1111, 3, 3, None), (0x2222, 9, 9, None)]
+        assert client.recv_latest_UDP_ENIP_CIP_IO(False, 0.05) is None
+        assert len(client._receive_buffers) == 3
+    finally:
+        receiver.close()
+        sender.close()
+
+
+def test_scan_udp_enip_items_reads_connection_ids():
+    frame = _sequenced_frame(0x1234, 5, alive=1)
+
+    assert tgv2020._scan_UDP_ENIP_items(frame, len(frame)) == (0x1234, 5, 5)
+    assert tgv2020._scan_UDP_ENIP_items(frame, len(frame) - 1) is tgv2020._NO_FRAME
+    unsequenced = bytes(ENIP_UDP(items=[ENIP_UDP_Item(type_id=0x00B1) / CIP_IO()]))
+    assert tgv2020._scan_UDP_ENIP_items(unsequenced, len(unsequenced)) == (None, None, 0)
+
+
 def _register_session_response() -> bytes:
     return bytes(
         enip_tcp.ENIP_TCP(command_id=0x0065, session=0x1234)
@@ -209,3 +298,200 @@ def test_client_falls_back_to_any_when_interface_unknown(monkeypatch, _patched_s
     )
 
     client.close()
+
+
+class _RecordingUdpSocket:
+    def __init__(self) -> None:
+        self.sent: list[bytes] = []
+
+    def send(self, data: bytes) -> None:
+        self.sent.append(bytes(data))
+
+
+def test_send_udp_enip_cip_io_accepts_compiled_encoder():
+    from cipmaster.cip.assembly import compile_packet_class
+
+    encoder = compile_packet_class(tgv2020.AS_MPU_DCUi_DATA).new_encoder()
+    encoder.MPU_CTCMSAlive = 9
+    reference = tgv2020.AS_MPU_DCUi_DATA(MPU_CTCMSAlive=9)
+
+    frames = []
+    for app_data in (reference, encoder):
+        client = _client_with_frames([])
+        client.Sock1 = _RecordingUdpSocket()
+        client.send_UDP_ENIP_CIP_IO(CIP_Sequence_Count=5, Header=1, AppData=app_data)
+        frames.append(client.Sock1.sent[0])
+
+    assert frames[0] == frames[1]
+
+
+class _CountingSocket:
+    def __init__(self) -> None:
+        self.sends = 0
+        self.last = b""
+
+    def send(self, data) -> None:  # type: ignore[no-untyped-def]
+        self.sends += 1
+        self.last = data
+
+
+def _scapy_ot_frame(connection_id: int, sequence: int, count: int, app_data: bytes) -> bytes:
+    return bytes(
+        ENIP_UDP(
+            count=2,
+            items=[
+                ENIP_UDP_Item(type_id=0x8002, length=8)
+                / ENIP_UDP_SequencedAddress(connection_id=connection_id, sequence=sequence),
+                ENIP_UDP_Item(type_id=0x00B1, length=len(app_data) + 6),
+            ],
+        )
+        / CIP_IO(CIP_Sequence_Count=count, Header=1)
+        / scapy_all.Raw(load=app_data)
+    )
+
+
+def test_send_udp_enip_cip_io_patches_prebuilt_frame():
+    from cipmaster.cip.assembly import compile_packet_class
+
+    client = _client_with_frames([])
+    client.enip_connection_id_OT = 0x4242
+    client.Sock1 = _CountingSocket()
+    app_packet = tgv2020.AS_MPU_DCUi_DATA(MPU_CTCMSAlive=3)
+    encoder = compile_packet_class(tgv2020.AS_MPU_DCUi_DATA).new_encoder()
+    encoder.MPU_CTCMSAlive = 4
+
+    client.send_UDP_ENIP_CIP_IO(CIP_Sequence_Count=65535, Header=1, AppData=app_packet)
+    assert bytes(client.Sock1.last) == _scapy_ot_frame(0x4242, 1, 65535, bytes(app_packet))
+    frame = client.Sock1.last
+
+    client.send_UDP_ENIP_CIP_IO(CIP_Sequence_Count=0, Header=1, AppData=encoder)
+    assert client.Sock1.last is frame
+    assert bytes(frame) == _scapy_ot_frame(0x4242, 2, 0, bytes(encoder))
+
+    client.send_UDP_ENIP_CIP_IO(CIP_Sequence_Count=1, Header=1, AppData=b"\x01\x02")
+    assert bytes(client.Sock1.last) == _scapy_ot_frame(0x4242, 3, 1, b"\x01\x02")
+
+
+def test_send_udp_enip_cip_io_does_not_allocate_per_cycle():
+    import tracemalloc
+
+    from cipmaster.cip.assembly import compile_packet_class
+
+    class _Large(scapy_all.Packet):
+        fields_desc = [scapy_all.StrFixedLenField("Block", b"", 4096)]
+
+    client = _client_with_frames([])
+    client.Sock1 = _CountingSocket()
+    encoder = compile_packet_class(_Large).new_encoder()
+    send = client.send_UDP_ENIP_CIP_IO
+    send(CIP_Sequence_Count=1, Header=1, AppData=encoder)
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        for _ in range(100):
+            send(CIP_Sequence_Count=1, Header=1, AppData=encoder)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert client.Sock1.sends == 101
+    assert peak - baseline < 1024
+
+
+def test_recv_latest_waits_with_selector_and_keeps_socket_non_blocking():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(("127.0.0.1", 0))
+        client = _client_with_frames([])
+        client.MulticastSock = receiver
+
+        assert client.recv_latest_UDP_ENIP_CIP_IO(False, 0.01) is None
+        assert receiver.gettimeout() == 0.0
+        selector = client._receive_selector
+
+        assert client.recv_UDP_ENIP_CIP_IO(False, 0.01) is None
+        sender.sendto(_sequenced_frame(0x1111, 1, alive=1), receiver.getsockname())
+        assert client.recv_latest_UDP_ENIP_CIP_IO(False, 0.5).CIP_Sequence_Count == 1
+        assert receiver.gettimeout() == 0.0
+        assert client._receive_selector is selector
+
+        client.close()
+        assert client._receive_selector is None
+    finally:
+        receiver.close()
+        sender.close()
+
+
+def test_receive_and_send_lap_profiler_stages():
+    from cipmaster.cip.profiler import CycleProfiler
+
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(("127.0.0.1", 0))
+        client = _client_with_frames([])
+        client.MulticastSock = receiver
+        client.Sock1 = _RecordingUdpSocket()
+        profiler = CycleProfiler()
+        client.receive_stage_timer = client.send_stage_timer = profiler.timer()
+
+        sender.sendto(_sequenced_frame(0x1111, 1, alive=1), receiver.getsockname())
+        assert client.recv_latest_UDP_ENIP_CIP_IO(False, 0.5) is not None
+        client.send_UDP_ENIP_CIP_IO(CIP_Sequence_Count=1, Header=1, AppData=b"\x00" * 4)
+
+        counts = {stage: profiler.wall[stage].count for stage in ("wait", "receive", "enip_decode", "ot_build", "send")}
+        assert counts == {"wait": 1, "receive": 1, "enip_decode": 1, "ot_build": 1, "send": 1}
+    finally:
+        receiver.close()
+        sender.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="SO_TIMESTAMPNS is Linux specific")
+def test_kernel_timestamps_are_attached_to_received_frames():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(("127.0.0.1", 0))
+        client = _client_with_frames([])
+        client.MulticastSock = receiver
+        observed = []
+        client.io_frame_observer = lambda *counters: observed.append(counters)
+
+        assert client.enable_kernel_timestamps()
+        # The kernel switches receive timestamping on asynchronously; until it
+        # has, datagrams are stamped when read instead of when they arrive.
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline:
+            sender.sendto(_sequenced_frame(0x1111, 0, alive=0), receiver.getsockname())
+            time.sleep(0.02)
+            read_at = time.time()
+            probe = client.recv_latest_UDP_ENIP_CIP_IO(False, 0.5)
+            if probe is not None and probe.timestamp is not None and probe.timestamp <= read_at - 0.01:
+                break
+        observed.clear()
+        before = time.time()
+        sender.sendto(_sequenced_frame(0x1111, 1, alive=1), receiver.getsockname())
+        time.sleep(0.05)
+        packet = client.recv_latest_UDP_ENIP_CIP_IO(False, 0.5)
+        after = time.time()
+
+        assert before - 0.01 <= packet.timestamp <= after - 0.04
+        assert observed == [(0x1111, 1, 1, packet.timestamp)]
+
+        sender.sendto(_sequenced_frame(0x1111, 2, alive=2), receiver.getsockname())
+        packet = client.recv_UDP_ENIP_CIP_IO(False, 0.5)
+        assert packet.timestamp >= observed[0][3]
+        assert observed[1] == (0x1111, 2, 2, packet.timestamp)
+    finally:
+        receiver.close()
+        sender.close()
+
+
+def test_frames_carry_no_timestamp_unless_enabled():
+    frame = _sequenced_frame(0x1111, 1, alive=1)
+    client = _client_with_frames([frame])
+
+    assert client.kernel_timestamps is False
+    assert client.recv_UDP_ENIP_CIP_IO(False, 0.1).timestamp is None